@@ -7,6 +7,7 @@ This example demonstrates progressively richer RQA analyses:
     4. Cross-RQA on 3D speed for both hip sides combined
     5. Windowed cross-RQA to see coordination over time
     6. Cross-RQA on vertical hip displacement (the "bounce") using deltas from start
+    7. Multidimensional RQA (MdRQA) on the hip velocities of both dancers together
 
 Notes on threshold selection:
     RQA compares absolute values, so raw marker positions won't work for
@@ -23,7 +24,7 @@ import pandas as pd
 
 from mopipe.core.analysis import Pipeline
 from mopipe.core.data import MocapReader
-from mopipe.segment import CrossRQAStats, RQAStats, SimpleGapFilling, WindowedCrossRQAStats
+from mopipe.segment import CrossRQAStats, MdRQAStats, RQAStats, SimpleGapFilling, WindowedCrossRQAStats
 
 # --- Load and preprocess ---
 data_path = Path("tests/fixtures/sample_dance_with_header.tsv")
@@ -175,4 +176,23 @@ cross_bounce_result = cross_pipeline.run(x=bounce_df, col_a=0, col_b=1, threshol
 print("\n6b) Cross-RQA: Follower vs Leader vertical hip displacement (threshold=0.2)")
 print(cross_bounce_result.to_string(index=False))
 
+
+# ==========================================================================
+# 7. MdRQA: all hip markers of both dancers as one system
+# ==========================================================================
+# Instead of reducing the hips to one signal per person, MdRQA treats every
+# frame as a single point with one coordinate per column, so the recurrence
+# plot shows when the dyad as a whole returns to a previous configuration.
+# Each velocity column is z-normalized so that no axis dominates the distances.
+
+hip_cols = [
+    f"{person}_{side}_hip_{axis}" for person in ("Follow", "Lead") for side in ("left", "right") for axis in "xyz"
+]
+hip_velocities = cleaned[hip_cols].diff().dropna()
+
+md_pipeline = Pipeline([MdRQAStats("md_rqa")])
+md_result = md_pipeline.run(x=hip_velocities, normalize=True, threshold=1.0)
+print(f"\n7) MdRQA: {len(hip_cols)} hip velocity columns of both dancers (normalized, threshold=1.0)")
+print(md_result.to_string(index=False))
+
 print("\nDone!")
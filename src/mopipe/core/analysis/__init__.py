@@ -1,2 +1,40 @@
+from .cache import CACHE_STORAGES, CacheManager, ColumnarStoreBackend, MemoryCache  # noqa: F401, TID252
+from .embedding import (  # noqa: F401, TID252
+    average_mutual_information,
+    delay_embed,
+    false_nearest_neighbours,
+    suggest_dim,
+    suggest_tau,
+)
+from .network import NETWORK_MEASURES, degree_distribution, network_measures, recurrence_network  # noqa: F401, TID252
 from .pipeline import Pipeline  # noqa: F401, TID252
-from .rqa import calc_rqa  # noqa: F401, TID252
+from .recurrence import BandedRecurrenceMatrix, PackedRecurrenceMatrix  # noqa: F401, TID252
+from .rqa import (  # noqa: F401, TID252
+    APPROXIMATE_RQA_MEASURES,
+    RQA_EXTENDED_MEASURES,
+    RQA_MEASURES,
+    WINDOWED_RQA_BACKENDS,
+    approximate_rqa,
+    auto_rqa,
+    banded_recurrence_matrix,
+    calc_rqa,
+    cross_recurrence_profile,
+    fan_recurrence_matrix,
+    fan_rqa,
+    pairwise_rqa,
+    recurrence_matrix,
+    rqa_from_matrix,
+    rqa_surrogate_test,
+    rqa_threshold_sweep,
+    rr_threshold,
+    sliding_window_recurrence,
+    surrogate_p_values,
+    windowed_rqa,
+)
+from .surrogates import (  # noqa: F401, TID252
+    SURROGATE_METHODS,
+    iaaft_surrogates,
+    shuffle_surrogates,
+    surrogates,
+    time_shift_surrogates,
+)
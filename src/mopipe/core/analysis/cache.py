@@ -0,0 +1,586 @@
+"""cache.py
+
+This module contains the caches used by the Pipeline class to reuse segment
+results, the columnar storage of the disk cache, and the CacheManager used to
+keep the disk cache in bounds, which is also available as the mopipe-cache
+command.
+"""
+
+import argparse
+import ast
+import datetime as dt
+import json
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+import time
+import typing as t
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import register_store_backend
+
+# joblib has no public name for its default store backend, which ColumnarStoreBackend extends;
+# the supported joblib versions are pinned in pyproject.toml and the interface is checked by the tests
+from joblib._store_backends import FileSystemStoreBackend
+
+# joblib stores every cached result in a directory named by the hash of its arguments
+_ITEM_DIR = re.compile("[a-f0-9]{32}")
+_ENTRY_COLUMNS = ["path", "function", "segment", "input_key", "nbytes", "created", "last_access"]
+_NUMBER = re.compile(r"\s*\d+(?:\.\d+)?\s*")
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+CACHE_STORAGES = ("pickle", "columnar")
+# the name of the joblib store backend of the pipeline disk cache
+STORE_BACKEND = "mopipe"
+# numpy dtype kinds stored as .npy files: booleans, numbers and datetimes
+_COLUMNAR_KINDS = "biufcmM"
+
+
+def _nbytes(value: t.Any) -> int:
+    """Estimate the memory used by a cached value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # an int for a Series, a Series of per-column sizes for a DataFrame
+        return int(np.sum(value.memory_usage(deep=True, index=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def _shallow_copy(value: t.Any) -> t.Any:
+    """Copy a DataFrame or Series without its data, so that changing its columns leaves the original as is."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    return value
+
+
+class MemoryCache:
+    """MemoryCache
+
+    An in-process cache of segment results with a byte budget and least
+    recently used (LRU) eviction. DataFrames and Series are stored and
+    returned as shallow copies, so segments that add or replace columns of
+    their input in place do not change the cached value, without copying
+    the data. Other values are stored and returned as they are.
+    """
+
+    _entries: "OrderedDict[str, tuple[t.Any, int]]"
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialize a MemoryCache.
+
+        Parameters
+        ----------
+        max_bytes : int
+            The byte budget. Values larger than the budget are never stored.
+        """
+        if max_bytes < 0:
+            msg = f"max_bytes must be non-negative, got {max_bytes}."
+            raise ValueError(msg)
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        """The byte budget."""
+        return self._max_bytes
+
+    @property
+    def nbytes(self) -> int:
+        """The estimated number of bytes used by the cached values."""
+        return self._nbytes
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """The hit, miss and eviction counters, and the number and size of the entries."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "nbytes": self._nbytes,
+            "max_bytes": self._max_bytes,
+        }
+
+    def get(self, key: str, default: t.Any = None) -> t.Any:
+        """Get a value, marking it as the most recently used.
+
+        Parameters
+        ----------
+        key : str
+            The key of the value.
+        default : Any, optional
+            The value returned if the key is not cached.
+
+        Returns
+        -------
+        Any
+            The cached value, or default.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return _shallow_copy(entry[0])
+
+    def put(self, key: str, value: t.Any) -> bool:
+        """Store a value, evicting the least recently used values to stay within the budget.
+
+        Parameters
+        ----------
+        key : str
+            The key of the value.
+        value : Any
+            The value to store.
+
+        Returns
+        -------
+        bool
+            Whether the value was stored.
+        """
+        size = _nbytes(value)
+        self.discard(key)
+        if size > self._max_bytes:
+            return False
+        while self._nbytes + size > self._max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._nbytes -= evicted
+            self.evictions += 1
+        self._entries[key] = (_shallow_copy(value), size)
+        self._nbytes += size
+        return True
+
+    def discard(self, key: str) -> None:
+        """Remove a value if it is cached."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._nbytes -= entry[1]
+
+    def clear(self) -> None:
+        """Remove all values. The counters are kept."""
+        self._entries.clear()
+        self._nbytes = 0
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"MemoryCache(entries={len(self._entries)}, nbytes={self._nbytes}, max_bytes={self._max_bytes})"
+
+
+def _is_columnar(dtype: t.Any) -> bool:
+    """Whether values of a dtype can be stored as a .npy file and memory-mapped."""
+    return isinstance(dtype, np.dtype) and dtype.kind in _COLUMNAR_KINDS
+
+
+def _write_npy(values: np.ndarray, filename: str) -> None:
+    """Write an array as a .npy file, through a temporary file so readers never see a partial one."""
+    fd, temp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(filename))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, values, allow_pickle=False)
+        os.replace(temp, filename)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+class _ColumnarItem:
+    """The pickled part of a result stored in columns.
+
+    The columns (and the index, if it is numeric) are stored as .npy files next to
+    it. Everything else (columns of other dtypes, the labels and the attrs) is kept
+    as an opaque pickle, so that joblib does not memory-map the arrays inside it.
+    """
+
+    def __init__(self, kind: str, parts: t.Optional[dict[str, t.Any]] = None) -> None:
+        self.kind = kind
+        self.payload = pickle.dumps(parts or {}, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path: str, mmap_mode: t.Optional[str]) -> t.Any:
+        """Rebuild the result, memory-mapping the .npy files if mmap_mode is set."""
+
+        def array(name: str) -> np.ndarray:
+            # a plain view, so the np.memmap subclass does not leak into the result
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False).view(np.ndarray)
+
+        if self.kind == "array":
+            return array("array")
+        parts = pickle.loads(self.payload)  # noqa: S301
+        # None stands for a .npy file, for the index and for every column
+        index = parts["index"]
+        if index is None:
+            index = pd.Index(array("index"), name=parts["index_name"], copy=False)
+        data = {i: array(f"column_{i}") if values is None else values for i, values in enumerate(parts["columns"])}
+        if self.kind == "series":
+            out: t.Any = pd.Series(data[0], index=index, name=parts["name"], copy=False)
+        else:
+            # a dict of arrays is not consolidated into blocks without copy, so every column stays mapped
+            out = pd.DataFrame(data, index=index, copy=False)
+            out.columns = parts["labels"]
+        out.attrs = parts["attrs"]
+        return out
+
+
+def _split_columnar(item: t.Any) -> t.Optional[tuple[_ColumnarItem, dict[str, np.ndarray]]]:
+    """Split a result into its pickled part and its .npy files, or None if it is not columnar."""
+    if isinstance(item, np.ndarray):
+        return (_ColumnarItem("array"), {"array": item}) if _is_columnar(item.dtype) else None
+    if isinstance(item, pd.Series):
+        kind, frame = "series", item.to_frame()
+    elif isinstance(item, pd.DataFrame):
+        kind, frame = "frame", item
+    else:
+        return None
+    arrays = {}
+    columns: list[t.Any] = []
+    for i in range(frame.shape[1]):
+        column = frame.iloc[:, i]
+        if _is_columnar(column.dtype):
+            arrays[f"column_{i}"] = column.to_numpy()
+            columns.append(None)
+        else:
+            columns.append(column.array)
+    index: t.Optional[pd.Index] = frame.index
+    if type(index) is pd.Index and _is_columnar(index.dtype):
+        arrays["index"] = index.to_numpy()
+        index = None
+    parts = {
+        "columns": columns,
+        "index": index,
+        "index_name": frame.index.name,
+        "labels": frame.columns,
+        "name": item.name if kind == "series" else None,
+        "attrs": item.attrs,
+    }
+    return _ColumnarItem(kind, parts), arrays
+
+
+class ColumnarStoreBackend(FileSystemStoreBackend):
+    """ColumnarStoreBackend
+
+    The joblib store backend of the pipeline disk cache. With the "columnar"
+    backend option, DataFrame, Series and ndarray results are written with one
+    .npy file per column, which are memory-mapped when loaded (with the
+    mmap_mode of the joblib.Memory), so a cache hit costs next to nothing until
+    the data is touched. Other results, and columns of object or extension
+    dtypes, are pickled as usual. Results stored either way are always read
+    back correctly.
+    """
+
+    columnar: bool = False
+
+    def configure(self, location: str, verbose: int = 1, backend_options: t.Optional[dict] = None) -> None:
+        """Configure the store backend, with the extra backend option columnar."""
+        backend_options = dict(backend_options or {})
+        self.columnar = bool(backend_options.pop("columnar", False))
+        super().configure(location, verbose, backend_options)
+
+    def dump_item(self, call_id: t.Sequence[str], item: t.Any, verbose: int = 1) -> None:
+        """Dump a result, in columns if possible."""
+        split = _split_columnar(item) if self.columnar else None
+        if split is None:
+            super().dump_item(call_id, item, verbose)
+            return
+        skeleton, arrays = split
+        item_path = os.path.join(self.location, *call_id)
+        try:
+            self.create_location(item_path)
+            for name, values in arrays.items():
+                _write_npy(values, os.path.join(item_path, f"{name}.npy"))
+        except OSError as e:
+            warnings.warn(f"Unable to cache to disk. Exception: {e}.", stacklevel=2)
+            return
+        # the pickled part is written last, so a result is only found once all its columns are written
+        super().dump_item(call_id, skeleton, verbose)
+
+    def load_item(
+        self,
+        call_id: t.Sequence[str],
+        verbose: int = 1,
+        timestamp: t.Optional[float] = None,
+        metadata: t.Optional[dict] = None,
+    ) -> t.Any:
+        """Load a result, memory-mapping its columns if it was stored in columns."""
+        item = super().load_item(call_id, verbose, timestamp, metadata)
+        if isinstance(item, _ColumnarItem):
+            return item.load(os.path.join(self.location, *call_id), self.mmap_mode)
+        return item
+
+
+register_store_backend(STORE_BACKEND, ColumnarStoreBackend)
+
+
+def _literal(value: t.Optional[str]) -> t.Optional[str]:
+    """Parse a string argument from the repr stored in joblib's metadata."""
+    if value is None:
+        return None
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return None
+    return parsed if isinstance(parsed, str) else None
+
+
+class CacheManager:
+    """CacheManager
+
+    Inspects and trims the disk cache of a Pipeline. Every cached result is an
+    entry, attributed to the segment class that produced it and, for runs with
+    chained keys, to the key of the pipeline input it was derived from. The
+    last access of an entry is the access time of its files, so its precision
+    depends on how the file system records access times.
+    """
+
+    def __init__(self, cache_dir: t.Union[str, Path]) -> None:
+        """Initialize a CacheManager.
+
+        Parameters
+        ----------
+        cache_dir : str or Path
+            The cache_dir of the pipeline.
+        """
+        self._cache_dir = Path(cache_dir)
+
+    @property
+    def cache_dir(self) -> Path:
+        """The cache directory."""
+        return self._cache_dir
+
+    def entries(self) -> pd.DataFrame:
+        """List the cached results.
+
+        Returns
+        -------
+        DataFrame
+            One row per cached result, with its directory (path), the cached
+            function, the qualified class name of the segment, the key of the
+            pipeline input (None unless the run chained keys), its size in
+            bytes, and the UTC time it was created and last accessed.
+        """
+        rows = []
+        for dirpath, _, filenames in os.walk(self._cache_dir / "joblib"):
+            path = Path(dirpath)
+            # results still being written have no metadata yet
+            if not _ITEM_DIR.fullmatch(path.name) or "metadata.json" not in filenames:
+                continue
+            try:
+                stats = [os.stat(path / filename) for filename in filenames]
+                with open(path / "metadata.json") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                # removed by another process in the meantime
+                continue
+            args = metadata.get("input_args", {})
+            rows.append(
+                {
+                    "path": str(path),
+                    "function": path.parent.name,
+                    "segment": _literal(args.get("segment_class")),
+                    "input_key": _literal(args.get("input_key")),
+                    "nbytes": sum(st.st_size for st in stats),
+                    "created": metadata.get("time"),
+                    # reading the metadata here must not count as an access
+                    "last_access": max(
+                        (st.st_atime for name, st in zip(filenames, stats) if name != "metadata.json"),
+                        default=stats[0].st_atime,
+                    ),
+                }
+            )
+        entries = pd.DataFrame(rows, columns=_ENTRY_COLUMNS)
+        entries["nbytes"] = entries["nbytes"].astype(np.int64)
+        entries["created"] = pd.to_datetime(entries["created"], unit="s")
+        entries["last_access"] = pd.to_datetime(entries["last_access"], unit="s")
+        return entries
+
+    def size(self) -> int:
+        """The total size of the cached results in bytes."""
+        return int(self.entries()["nbytes"].sum())
+
+    def report(self) -> pd.DataFrame:
+        """Summarize the cache usage per segment class.
+
+        Returns
+        -------
+        DataFrame
+            One row per segment class (index "segment"), largest first, with
+            the number of entries, their total size in bytes, the number of
+            distinct inputs and the last access.
+        """
+        entries = self.entries()
+        entries["segment"] = entries["segment"].fillna("<unknown>")
+        report = entries.groupby("segment").agg(
+            entries=("path", "size"),
+            nbytes=("nbytes", "sum"),
+            inputs=("input_key", "nunique"),
+            last_access=("last_access", "max"),
+        )
+        return report.sort_values("nbytes", ascending=False)
+
+    def _remove(self, paths: t.Iterable[str]) -> int:
+        """Remove cached results, returning how many were removed."""
+        removed = 0
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def evict(
+        self,
+        max_bytes: t.Optional[int] = None,
+        max_age: t.Optional[t.Union[float, str, dt.timedelta]] = None,
+    ) -> int:
+        """Evict cached results by age and size.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            Evict the least recently used results until the cache is at most
+            this many bytes.
+        max_age : float, str or timedelta, optional
+            Evict results not accessed for longer than this, in seconds (also
+            as a string without a unit) or as a pandas Timedelta string such
+            as "7 days".
+
+        Returns
+        -------
+        int
+            The number of evicted results.
+        """
+        entries = self.entries().sort_values("last_access")
+        drop = np.zeros(entries.shape[0], dtype=bool)
+        if max_age is not None:
+            age = _to_timedelta(max_age)
+            drop |= (entries["last_access"] < pd.Timestamp(time.time(), unit="s") - age).to_numpy()
+        if max_bytes is not None:
+            kept = np.where(drop, 0, entries["nbytes"].to_numpy())
+            excess = kept.sum() - max_bytes
+            if excess > 0:
+                # drop in order of last access until the bytes dropped cover the excess
+                drop |= (np.cumsum(kept) - kept < excess) & (kept > 0)
+        return self._remove(entries["path"][drop])
+
+    def invalidate(self, segment: t.Optional[t.Union[str, type]] = None, input_key: t.Optional[str] = None) -> int:
+        """Remove the cached results of one segment class, one input, or both.
+
+        Parameters
+        ----------
+        segment : str or type, optional
+            The segment class, or its name, qualified or not.
+        input_key : str, optional
+            The key of the pipeline input, e.g. the content_key of its reader.
+
+        Returns
+        -------
+        int
+            The number of removed results.
+        """
+        if segment is None and input_key is None:
+            msg = "Give a segment, an input_key or both to invalidate."
+            raise ValueError(msg)
+        entries = self.entries()
+        match = np.ones(entries.shape[0], dtype=bool)
+        if segment is not None:
+            if isinstance(segment, type):
+                segment = f"{segment.__module__}.{segment.__qualname__}"
+            names = entries["segment"].fillna("")
+            match &= ((names == segment) | names.str.endswith(f".{segment}")).to_numpy()
+        if input_key is not None:
+            match &= (entries["input_key"] == input_key).to_numpy()
+        return self._remove(entries["path"][match])
+
+    def clear(self) -> int:
+        """Remove all cached results, returning how many were removed."""
+        return self._remove(self.entries()["path"])
+
+
+def _parse_size(size: str) -> int:
+    """Parse a size such as 500M or 10G (binary units) into bytes."""
+    parsed = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", size, flags=re.IGNORECASE)
+    if parsed is None:
+        msg = f"Invalid size {size!r}, expected e.g. 500M or 10G."
+        raise argparse.ArgumentTypeError(msg)
+    return int(float(parsed.group(1)) * _SIZE_UNITS[parsed.group(2).upper()])
+
+
+def _to_timedelta(age: t.Union[float, str, dt.timedelta]) -> pd.Timedelta:
+    """Convert an age to a Timedelta, reading numbers without a unit as seconds rather than nanoseconds."""
+    if isinstance(age, (int, float)) or (isinstance(age, str) and _NUMBER.fullmatch(age)):
+        return pd.Timedelta(seconds=float(age))
+    return pd.Timedelta(age)
+
+
+def _parse_age(age: str) -> pd.Timedelta:
+    """Parse an age such as 3600 (seconds), 12h or '7 days'."""
+    try:
+        return _to_timedelta(age)
+    except ValueError:
+        msg = f"Invalid age {age!r}, expected e.g. 3600 (seconds), 12h or '7 days'."
+        raise argparse.ArgumentTypeError(msg) from None
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    """Run the mopipe-cache maintenance command.
+
+    Parameters
+    ----------
+    argv : Sequence[str], optional
+        The command line arguments. Defaults to sys.argv[1:].
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="mopipe-cache", description="Inspect and trim a mopipe pipeline cache.")
+    parser.add_argument("cache_dir", type=Path, help="the cache_dir of the pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="show the cache usage per segment class")
+    evict = commands.add_parser("evict", help="evict results by size and age")
+    evict.add_argument("--max-size", type=_parse_size, help="evict least recently used results above e.g. 10G")
+    evict.add_argument(
+        "--max-age", type=_parse_age, help="evict results not accessed for e.g. '7 days', 12h or 3600 (seconds)"
+    )
+    invalidate = commands.add_parser("invalidate", help="remove the results of a segment class or an input")
+    invalidate.add_argument("--segment", help="the segment class name")
+    invalidate.add_argument("--input-key", help="the key of the pipeline input")
+    commands.add_parser("clear", help="remove all results")
+    args = parser.parse_args(argv)
+
+    manager = CacheManager(args.cache_dir)
+    if args.command == "report":
+        report = manager.report()
+        sys.stdout.write(f"{report.to_string()}\n" if not report.empty else "The cache is empty.\n")
+        sys.stdout.write(f"Total: {int(report['nbytes'].sum())} bytes in {int(report['entries'].sum())} entries\n")
+        return 0
+    if args.command == "evict":
+        if args.max_size is None and args.max_age is None:
+            parser.error("evict needs --max-size, --max-age or both")
+        removed = manager.evict(max_bytes=args.max_size, max_age=args.max_age)
+    elif args.command == "invalidate":
+        if args.segment is None and args.input_key is None:
+            parser.error("invalidate needs --segment, --input-key or both")
+        removed = manager.invalidate(segment=args.segment, input_key=args.input_key)
+    else:
+        removed = manager.clear()
+    sys.stdout.write(f"Removed {removed} entries.\n")
+    return 0
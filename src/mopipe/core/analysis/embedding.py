@@ -0,0 +1,198 @@
+"""embedding.py
+
+This module contains time-delay embedding, shared by the nonlinear analyses, and
+the estimation of its parameters.
+"""
+
+import typing as t
+
+import numpy as np
+import scipy  # type: ignore
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas.api.extensions import ExtensionArray
+
+
+def delay_embed(x: ExtensionArray | np.ndarray, dim: int = 1, tau: int = 1) -> np.ndarray:
+    """Time-delay embed a series without copying it.
+
+    Row t of the embedding holds x[t], x[t + tau], ..., x[t + (dim - 1) * tau]. The
+    result is a read-only strided view of x, so embedding is free regardless of the
+    length of the series.
+
+    A 2D input is treated as a multivariate series with one point per row, and row t
+    of its embedding holds the dim delayed points one after the other. In particular,
+    a 2D input with dim=1 is returned unchanged, which is how an already-embedded
+    series is passed to the analyses.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, 1D or 2D (one point per row).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+
+    Returns:
+        np.ndarray: The embedded series, one point per row. This is a view of x whenever
+            the memory layout allows it (always for 1D inputs).
+    """
+    if dim < 1 or tau < 1:
+        msg = f"dim and tau must be positive integers, got dim={dim} and tau={tau}."
+        raise ValueError(msg)
+    data = np.asarray(x)
+    if data.ndim == 1:
+        data = data[:, np.newaxis]
+    elif data.ndim != 2:  # noqa: PLR2004
+        msg = f"Can only embed 1D or 2D arrays, got {data.ndim} dimensions."
+        raise ValueError(msg)
+    n, c = data.shape
+    span = (dim - 1) * tau + 1
+    if n < span:
+        return np.empty((0, dim * c), dtype=data.dtype)
+    windows = sliding_window_view(data, span, axis=0)[:, :, ::tau]
+    return windows.transpose(0, 2, 1).reshape(n - span + 1, dim * c)
+
+
+def _bin_codes(x: np.ndarray, bins: int) -> np.ndarray:
+    """Assign every sample to one of bins equal-width bins spanning the range of x."""
+    lo, hi = x.min(), x.max()
+    if hi <= lo:
+        return np.zeros(x.shape[0], dtype=np.int64)
+    return np.minimum(((x - lo) * (bins / (hi - lo))).astype(np.int64), bins - 1)
+
+
+def average_mutual_information(
+    x: ExtensionArray | np.ndarray, max_lag: int = 50, bins: t.Optional[int] = None
+) -> np.ndarray:
+    """Calculate the average mutual information between a series and its lagged copies.
+
+    The series is binned once, and the joint histograms of all lags are filled with a
+    single bincount over a strided view of the binned series, in chunks of rows to
+    bound memory use.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series.
+        max_lag (int, optional): The largest lag. Defaults to 50.
+        bins (int | None, optional): The number of equal-width bins. Defaults to None
+            (Sturges' rule, log2(n) + 1).
+
+    Returns:
+        np.ndarray: The mutual information (in nats) for every lag from 0 to max_lag.
+    """
+    data = np.asarray(x, dtype=float)
+    if data.ndim != 1:
+        msg = f"Can only calculate the mutual information of 1D series, got {data.ndim} dimensions."
+        raise ValueError(msg)
+    n = data.shape[0]
+    if n < 2 or max_lag < 0:  # noqa: PLR2004
+        msg = f"Need at least 2 samples and a non-negative max_lag, got {n} samples and max_lag={max_lag}."
+        raise ValueError(msg)
+    max_lag = min(max_lag, n - 1)
+    if bins is None:
+        bins = int(np.ceil(np.log2(n))) + 1
+    codes = _bin_codes(data, bins)
+
+    # row t holds the bins of samples t, t + 1, ..., t + max_lag, or -1 past the end of the series
+    windows = sliding_window_view(np.concatenate((codes, np.full(max_lag, -1))), max_lag + 1)
+    offsets = np.arange(max_lag + 1) * bins * bins
+    joint = np.zeros((max_lag + 1) * bins * bins, dtype=np.int64)
+    chunk = max(1, (1 << 22) // (max_lag + 1))
+    for start in range(0, n, chunk):
+        block = windows[start : start + chunk]
+        keys = block[:, :1] * bins + block + offsets
+        joint += np.bincount(keys[block >= 0], minlength=joint.shape[0])
+
+    p = joint.reshape(max_lag + 1, bins, bins) / (n - np.arange(max_lag + 1))[:, np.newaxis, np.newaxis]
+    p_a = p.sum(axis=2, keepdims=True)
+    p_b = p.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(p > 0, p * np.log(p / (p_a * p_b)), 0.0)
+    return terms.sum(axis=(1, 2))
+
+
+def suggest_tau(mutual_information: np.ndarray) -> int:
+    """Suggest a time delay from an average mutual information curve.
+
+    Args:
+        mutual_information (np.ndarray): The mutual information for lags 0, 1, 2, ...
+
+    Returns:
+        int: The lag of the first local minimum, or of the global minimum (excluding lag 0)
+            if the curve has no local minimum.
+    """
+    ami = np.asarray(mutual_information)
+    if ami.shape[0] < 2:  # noqa: PLR2004
+        return 1
+    minima = np.flatnonzero((ami[1:-1] < ami[:-2]) & (ami[1:-1] <= ami[2:])) + 1
+    if minima.shape[0] > 0:
+        return int(minima[0])
+    return int(np.argmin(ami[1:])) + 1
+
+
+def false_nearest_neighbours(
+    x: ExtensionArray | np.ndarray,
+    tau: int = 1,
+    max_dim: int = 10,
+    rtol: float = 15.0,
+    atol: float = 2.0,
+    *,
+    workers: int = 1,
+) -> np.ndarray:
+    """Calculate the fraction of false nearest neighbours for a range of embedding dimensions.
+
+    The nearest neighbour of every point is found with a KD-tree. A neighbour in dimension d
+    is false if adding the next delay coordinate increases its distance by more than rtol
+    times the distance in dimension d, or makes the distance larger than atol times the
+    standard deviation of the series (Kennel et al., 1992).
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series.
+        tau (int, optional): The time delay. Defaults to 1.
+        max_dim (int, optional): The largest embedding dimension. Defaults to 10.
+        rtol (float, optional): The distance ratio threshold. Defaults to 15.0.
+        atol (float, optional): The attractor size threshold. Defaults to 2.0.
+        workers (int, optional): The number of threads for the KD-tree queries, -1 uses all
+            CPUs. Defaults to 1.
+
+    Returns:
+        np.ndarray: The fraction of false nearest neighbours for dimensions 1 to max_dim.
+    """
+    data = np.asarray(x, dtype=float)
+    if data.ndim != 1:
+        msg = f"Can only calculate false nearest neighbours of 1D series, got {data.ndim} dimensions."
+        raise ValueError(msg)
+    n = data.shape[0]
+    sigma = data.std()
+    fractions = np.zeros(max_dim)
+    for d in range(1, max_dim + 1):
+        # only points whose next delay coordinate still lies within the series
+        n_points = n - d * tau
+        if n_points < 2:  # noqa: PLR2004
+            fractions = fractions[: d - 1]
+            break
+        points = delay_embed(data, d, tau)[:n_points]
+        dist, idx = scipy.spatial.cKDTree(points).query(points, k=2, workers=workers)
+        own = np.arange(n_points)
+        neighbour = np.where(idx[:, 0] == own, idx[:, 1], idx[:, 0])
+        dist = dist[:, 1]
+        extra = np.abs(data[own + d * tau] - data[neighbour + d * tau])
+        false = (extra > rtol * dist) | (np.sqrt(dist**2 + extra**2) > atol * sigma)
+        fractions[d - 1] = false.mean()
+    return fractions
+
+
+def suggest_dim(fnn_fractions: np.ndarray, threshold: float = 0.01) -> int:
+    """Suggest an embedding dimension from false nearest neighbour fractions.
+
+    Args:
+        fnn_fractions (np.ndarray): The fractions of false nearest neighbours for dimensions 1, 2, ...
+        threshold (float, optional): The fraction considered negligible. Defaults to 0.01.
+
+    Returns:
+        int: The smallest dimension whose fraction is at most threshold, or the dimension with the
+            smallest fraction if none is.
+    """
+    fractions = np.asarray(fnn_fractions)
+    if fractions.shape[0] == 0:
+        return 1
+    below = np.flatnonzero(fractions <= threshold)
+    if below.shape[0] > 0:
+        return int(below[0]) + 1
+    return int(np.argmin(fractions)) + 1
@@ -0,0 +1,112 @@
+"""network.py
+
+This module contains recurrence network analysis, which reads a recurrence matrix as
+the adjacency matrix of an undirected graph with one node per embedded point.
+"""
+
+import typing as t
+
+import numpy as np
+import scipy  # type: ignore
+from pandas.api.extensions import ExtensionArray
+
+from mopipe.core.analysis.rqa import sparse_recurrence_matrix
+
+NETWORK_MEASURES = (
+    "edge_density",
+    "mean_degree",
+    "transitivity",
+    "clustering",
+    "avg_path_length",
+)
+
+
+def recurrence_network(
+    x: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    *,
+    theiler: int = 1,
+) -> t.Any:
+    """Calculate the sparse adjacency matrix of the recurrence network of a series.
+
+    Only recurrent pairs are ever stored, found with KD-tree radius queries, so the
+    network is never held as a dense N x N matrix.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        theiler (int, optional): Leave out edges between points less than theiler samples apart.
+            Defaults to 1 (no self-loops).
+
+    Returns:
+        scipy.sparse.csr_matrix: The symmetric boolean adjacency matrix.
+    """
+    if theiler < 1:
+        msg = f"theiler must be at least 1 (a recurrence network has no self-loops), got {theiler}."
+        raise ValueError(msg)
+    rm = sparse_recurrence_matrix(x, x, dim, tau, threshold)
+    keep = np.abs(rm.row - rm.col) >= theiler
+    return scipy.sparse.csr_matrix((rm.data[keep], (rm.row[keep], rm.col[keep])), shape=rm.shape)
+
+
+def network_measures(adjacency: t.Any, block_size: int = 1024) -> np.ndarray:
+    """Calculate the measures of a recurrence network.
+
+    Triangles and shortest paths are computed for block_size nodes at a time, so memory
+    stays proportional to block_size times the number of nodes.
+
+    Args:
+        adjacency (scipy.sparse.spmatrix): The symmetric adjacency matrix, without self-loops.
+        block_size (int, optional): The number of nodes per block. Defaults to 1024.
+
+    Returns:
+        np.ndarray: The measures, in the order of NETWORK_MEASURES: the fraction of possible edges
+            present, the mean degree, the transitivity (the fraction of connected triples that are
+            triangles), the global clustering coefficient (the mean local clustering coefficient,
+            0 for nodes with fewer than 2 neighbours) and the average shortest path length between
+            connected pairs of nodes.
+    """
+    a = scipy.sparse.csr_matrix(adjacency, dtype=np.int64)
+    n = a.shape[0]
+    degree = np.asarray(a.sum(axis=1)).ravel()
+    triangles = np.empty(n)
+    path_sum, path_count = 0.0, 0
+    for start in range(0, n, block_size):
+        rows = a[start : start + block_size]
+        # twice the number of triangles through each node
+        triangles[start : start + rows.shape[0]] = np.asarray((rows @ a).multiply(rows).sum(axis=1)).ravel()
+        lengths = scipy.sparse.csgraph.shortest_path(
+            a, unweighted=True, directed=False, indices=np.arange(start, start + rows.shape[0])
+        )
+        connected = np.isfinite(lengths) & (lengths > 0)
+        path_sum += lengths[connected].sum()
+        path_count += int(connected.sum())
+
+    triples = degree * (degree - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        local = np.where(triples > 0, triangles / triples, 0.0)
+    return np.array(
+        [
+            degree.sum() / (n * (n - 1)) if n > 1 else np.nan,
+            degree.mean() if n > 0 else np.nan,
+            triangles.sum() / triples.sum() if triples.sum() > 0 else np.nan,
+            local.mean() if n > 0 else np.nan,
+            path_sum / path_count if path_count > 0 else np.nan,
+        ]
+    )
+
+
+def degree_distribution(adjacency: t.Any) -> np.ndarray:
+    """Calculate the degree distribution of a recurrence network.
+
+    Args:
+        adjacency (scipy.sparse.spmatrix): The adjacency matrix.
+
+    Returns:
+        np.ndarray: The number of nodes with each degree, from 0 to the largest degree.
+    """
+    return np.bincount(np.asarray(adjacency.sum(axis=1)).ravel().astype(np.int64))
@@ -5,18 +5,67 @@ analysis steps (segments) on the data.
 """
 
 import typing as t
+from functools import partial
 from pathlib import Path
 
+import joblib
 from joblib import Memory
 
+from mopipe.core.analysis.cache import CACHE_STORAGES, STORE_BACKEND, CacheManager, MemoryCache
 from mopipe.core.segments import Segment
 
+# sentinel for results missing from the in-process cache, which may legitimately hold None
+_MISSING = object()
 
-def _execute_segment(segment: Segment, **kwargs) -> t.Any:
-    """Execute a segment. Top-level function for joblib caching compatibility."""
+
+def _execute_segment(fingerprint: str, segment_class: str, segment: Segment, **kwargs) -> t.Any:  # noqa: ARG001
+    """Execute a segment. Top-level function for joblib caching compatibility.
+
+    The segment itself is ignored by the cache, which is keyed by its fingerprint instead.
+    The segment class is recorded in the cache metadata, for the CacheManager.
+    """
+    return segment(**kwargs)
+
+
+def _execute_keyed(
+    key: str, segment_class: str, input_key: str, segment: Segment, kwargs: dict[str, t.Any]  # noqa: ARG001
+) -> t.Any:
+    """Execute a segment. Top-level function for joblib caching compatibility.
+
+    Only the key, the segment class and the key of the pipeline input are hashed by the
+    cache; the segment and its arguments are ignored. The segment class and input key are
+    recorded in the cache metadata, for the CacheManager.
+    """
     return segment(**kwargs)
 
 
+class _CacheMissError(Exception):
+    """Raised by _cache_miss, when a result expected in the disk cache is not there."""
+
+
+def _cache_miss(**kwargs) -> t.NoReturn:  # noqa: ARG001
+    """Stand in for a segment whose result must be loaded from the disk cache, never computed."""
+    raise _CacheMissError
+
+
+def _segment_fingerprint(segment: t.Any) -> str:
+    """Get the fingerprint of a segment, or hash any other callable used as a pipeline step."""
+    if isinstance(segment, Segment):
+        return segment.fingerprint
+    return joblib.hash(segment)
+
+
+def _segment_class(segment: t.Any) -> str:
+    """Get the qualified class name of a pipeline step."""
+    cls = type(segment)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _chain_key(key: str, segment: t.Any, params: dict[str, t.Any]) -> str:
+    """Derive the key of a segment's output from the key of its input, its fingerprint and params."""
+    return joblib.hash((key, _segment_fingerprint(segment), params))
+
+
 class Pipeline(t.MutableSequence[Segment]):
     """Pipeline
 
@@ -29,6 +78,11 @@ class Pipeline(t.MutableSequence[Segment]):
         self,
         segments: t.Optional[t.MutableSequence[Segment]] = None,
         cache_dir: t.Optional[t.Union[str, Path]] = None,
+        *,
+        chain_keys: bool = False,
+        memory_budget: t.Optional[int] = None,
+        max_cache_bytes: t.Optional[int] = None,
+        storage: str = "pickle",
     ) -> None:
         """Initialize a Pipeline.
 
@@ -38,13 +92,60 @@ class Pipeline(t.MutableSequence[Segment]):
             The segments to include in the pipeline.
         cache_dir : str or Path, optional
             Directory for caching segment results using joblib.Memory.
-            If None, caching is disabled.
+            Results are keyed by the segment's fingerprint (class, version
+            and configuration) and its inputs, so they are reused across
+            runs and processes. If None, caching is disabled.
+        chain_keys : bool, optional
+            If True, the input is hashed once per run and the key of every
+            segment's output is derived from the key of its input, the
+            segment's fingerprint and the other arguments, instead of hashing
+            the data passed to every segment. Fully cached runs then only load
+            the output of the last segment. Passing input_key to run enables
+            this mode for that run. Defaults to False.
+        memory_budget : int, optional
+            Byte budget of an in-process cache of segment results, in front
+            of the disk cache (or on its own if cache_dir is None), with least
+            recently used eviction. DataFrame and Series results are kept as
+            shallow copies (see MemoryCache). Setting it implies chain_keys. If
+            None, results are only cached on disk.
+        max_cache_bytes : int, optional
+            Maximum size of cache_dir. After every run that added results,
+            the least recently used results are evicted until the cache fits
+            (see CacheManager).
+            If None, the cache grows without bound.
+        storage : str, optional
+            How results are stored in cache_dir. "pickle" pickles them with
+            joblib. "columnar" stores DataFrame, Series and ndarray results
+            with one .npy file per column, which are memory-mapped
+            (copy-on-write) when loaded, so a cache hit only reads the columns
+            that are used. Defaults to "pickle".
         """
+        if storage not in CACHE_STORAGES:
+            msg = f"Invalid storage {storage}, must be one of {CACHE_STORAGES}."
+            raise ValueError(msg)
         self._segments = [] if segments is None else segments
         self._cache_dir = cache_dir
+        self._chain_keys = chain_keys or memory_budget is not None
+        self._max_cache_bytes = max_cache_bytes
+        self._storage = storage
         self._memory: t.Optional[Memory] = None
+        self._cache_manager: t.Optional[CacheManager] = None
         if cache_dir is not None:
-            self._memory = Memory(str(cache_dir), verbose=0)
+            columnar = storage == "columnar"
+            self._memory = Memory(
+                str(cache_dir),
+                backend=STORE_BACKEND,
+                mmap_mode="c" if columnar else None,
+                verbose=0,
+                backend_options={"columnar": columnar},
+            )
+            self._cache_manager = CacheManager(cache_dir)
+        self._memory_cache: t.Optional[MemoryCache] = None
+        if memory_budget is not None:
+            self._memory_cache = MemoryCache(memory_budget)
+        self._disk_hits = 0
+        self._disk_misses = 0
+        self._disk_writes = 0
 
     @property
     def segments(self) -> t.MutableSequence[Segment]:
@@ -71,18 +172,147 @@ class Pipeline(t.MutableSequence[Segment]):
         self._segments.append(segment)
         return len(self._segments) - 1
 
+    @property
+    def storage(self) -> str:
+        """How results are stored in the cache directory."""
+        return self._storage
+
+    @property
+    def cache_manager(self) -> t.Optional[CacheManager]:
+        """The manager of the disk cache, if a cache_dir was set."""
+        return self._cache_manager
+
+    @property
+    def memory_cache(self) -> t.Optional[MemoryCache]:
+        """The in-process cache, if a memory_budget was set."""
+        return self._memory_cache
+
+    @property
+    def cache_stats(self) -> dict[str, int]:
+        """The cache counters.
+
+        memory_hits, memory_misses and evictions count lookups in and
+        evictions from the in-process cache, memory_nbytes is its current size.
+        disk_hits and disk_misses count disk cache lookups of runs with chained
+        keys (other runs leave the lookups to joblib).
+        """
+        stats = {"disk_hits": self._disk_hits, "disk_misses": self._disk_misses}
+        if self._memory_cache is not None:
+            memory = self._memory_cache.stats
+            stats.update(
+                memory_hits=memory["hits"],
+                memory_misses=memory["misses"],
+                evictions=memory["evictions"],
+                memory_nbytes=memory["nbytes"],
+            )
+        return stats
+
     def clear_cache(self) -> None:
-        """Clear the pipeline cache."""
+        """Clear the pipeline cache, in memory and on disk."""
+        if self._memory_cache is not None:
+            self._memory_cache.clear()
         if self._memory is not None:
             self._memory.clear(warn=False)
 
-    def run(self, *, cache: bool = True, **kwargs) -> t.Any:
+    @property
+    def chain_keys(self) -> bool:
+        """Whether cache keys are chained from the input key instead of hashing every input."""
+        return self._chain_keys
+
+    def _compute(self, segment: Segment, **kwargs) -> t.Any:
+        """Run a segment behind the disk cache, which only calls it to compute a missing result."""
+        self._disk_writes += 1
+        return segment(**kwargs)
+
+    def _run_keyed(
+        self, cached_fn: t.Any, call: tuple[str, str, str], segment: Segment, kwargs: dict[str, t.Any]
+    ) -> t.Any:
+        """Run a segment through the in-process cache, then the disk cache.
+
+        call holds the arguments hashed by the disk cache: the key of the output, the
+        segment class and the key of the pipeline input.
+        """
+        key = call[0]
+        if self._memory_cache is not None:
+            result = self._memory_cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+        if cached_fn is None:
+            result = segment(**kwargs)
+        else:
+            if cached_fn.check_call_in_cache(*call, None, None):
+                self._disk_hits += 1
+            else:
+                self._disk_misses += 1
+            result = cached_fn(*call, partial(self._compute, segment), kwargs)
+        if self._memory_cache is not None:
+            self._memory_cache.put(key, result)
+        return result
+
+    def _load_keyed(self, cached_fn: t.Any, call: tuple[str, str, str]) -> t.Any:
+        """Load a segment's result from the in-process cache, then the disk cache, without running it.
+
+        Returns _MISSING if the result is in neither, e.g. because it was evicted
+        since it was last looked up.
+        """
+        key = call[0]
+        if self._memory_cache is not None:
+            result = self._memory_cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+        if cached_fn is None:
+            return _MISSING
+        try:
+            # the segment is not hashed, so this loads the stored result or raises
+            result = cached_fn(*call, _cache_miss, {})
+        except _CacheMissError:
+            return _MISSING
+        self._disk_hits += 1
+        if self._memory_cache is not None:
+            self._memory_cache.put(key, result)
+        return result
+
+    def _run_chained(self, input_key: str, kwargs: dict[str, t.Any]) -> t.Any:
+        """Run the pipeline with chained cache keys.
+
+        All keys are derived up front, so the run resumes from the last segment
+        whose output is cached, and earlier outputs are never loaded. If that output
+        is gone by the time it is loaded, the run starts over from the first segment.
+        """
+        cached_fn = None
+        if self._memory is not None:
+            cached_fn = self._memory.cache(_execute_keyed, ignore=["segment", "kwargs"])
+        params = {k: v for k, v in kwargs.items() if k != "x"}
+        calls = []
+        key = input_key
+        for segment in self._segments:
+            key = _chain_key(key, segment, params)
+            calls.append((key, _segment_class(segment), input_key))
+        start = 0
+        for i in range(len(calls) - 1, -1, -1):
+            in_memory = self._memory_cache is not None and calls[i][0] in self._memory_cache
+            if in_memory or (cached_fn is not None and cached_fn.check_call_in_cache(*calls[i], None, None)):
+                result = self._load_keyed(cached_fn, calls[i])
+                if result is not _MISSING:
+                    kwargs["x"] = result
+                    start = i + 1
+                break
+        for segment, call in zip(self._segments[start:], calls[start:]):
+            kwargs["x"] = self._run_keyed(cached_fn, call, segment, kwargs)
+        return kwargs["x"]
+
+    def run(self, *, cache: bool = True, input_key: t.Optional[str] = None, **kwargs) -> t.Any:
         """Run the pipeline.
 
         Parameters
         ----------
         cache : bool, optional
             Whether to use caching (if cache_dir was set). Defaults to True.
+        input_key : str, optional
+            A key identifying the input, e.g. the content_key of the reader
+            that produced it. If given, cache keys are chained from it (see
+            chain_keys) and the input is never hashed, so it must change
+            whenever the input does. Defaults to None.
         **kwargs
             Arguments passed to the segments. Must include 'x' as the input data.
 
@@ -92,14 +322,29 @@ class Pipeline(t.MutableSequence[Segment]):
             The output of the last segment in the pipeline.
         """
         self._check_kwargs(**kwargs)
-        use_cache = cache and self._memory is not None
-        for segment in self._segments:
-            if use_cache:
-                cached_fn = self._memory.cache(_execute_segment)  # type: ignore[union-attr]
-                kwargs["x"] = cached_fn(segment, **kwargs)
-            else:
-                kwargs["x"] = segment(**kwargs)
-        return kwargs["x"]
+        disk_writes = self._disk_writes
+        use_cache = cache and (self._memory is not None or self._memory_cache is not None)
+        if use_cache and (self._chain_keys or input_key is not None):
+            if input_key is None:
+                input_key = joblib.hash(kwargs["x"])
+            result = self._run_chained(input_key, kwargs)
+        else:
+            for segment in self._segments:
+                if use_cache:
+                    cached_fn = self._memory.cache(_execute_segment, ignore=["segment"])  # type: ignore[union-attr]
+                    kwargs["x"] = cached_fn(
+                        _segment_fingerprint(segment),
+                        _segment_class(segment),
+                        partial(self._compute, segment),
+                        **kwargs,
+                    )
+                else:
+                    kwargs["x"] = segment(**kwargs)
+            result = kwargs["x"]
+        # only new results can push the cache over its size, so fully cached runs skip the walk
+        if self._disk_writes > disk_writes and self._cache_manager is not None and self._max_cache_bytes is not None:
+            self._cache_manager.evict(max_bytes=self._max_cache_bytes)
+        return result
 
     def __repr__(self) -> str:
         return f"Pipeline(segments={self._segments})"
@@ -0,0 +1,310 @@
+"""recurrence.py
+
+This module contains compact representations of recurrence matrices.
+"""
+
+import typing as t
+from pathlib import Path
+
+import numpy as np
+
+# number of set bits in every possible byte
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class PackedRecurrenceMatrix:
+    """PackedRecurrenceMatrix
+
+    A boolean recurrence matrix stored with one bit per cell, packed along the
+    rows with np.packbits. This uses 8x less memory than a NumPy bool array,
+    which makes it possible to keep recurrence plots of whole sessions around
+    for later inspection.
+    """
+
+    _packed: np.ndarray
+    _shape: tuple[int, int]
+
+    def __init__(self, packed: np.ndarray, shape: tuple[int, int]) -> None:
+        """Initialize a PackedRecurrenceMatrix.
+
+        Args:
+            packed (np.ndarray): The uint8 array of rows packed with np.packbits(axis=1).
+            shape (tuple[int, int]): The shape of the unpacked matrix.
+        """
+        n, m = shape
+        if packed.dtype != np.uint8 or packed.shape != (n, (m + 7) // 8):
+            msg = f"Packed array of dtype {packed.dtype} and shape {packed.shape} does not match shape {shape}."
+            raise ValueError(msg)
+        self._packed = packed
+        self._shape = (n, m)
+
+    @classmethod
+    def from_dense(cls, recurrence_matrix: np.ndarray) -> "PackedRecurrenceMatrix":
+        """Pack a dense boolean recurrence matrix.
+
+        Args:
+            recurrence_matrix (np.ndarray): The boolean recurrence matrix.
+
+        Returns:
+            PackedRecurrenceMatrix: The packed recurrence matrix.
+        """
+        n, m = recurrence_matrix.shape
+        return cls(np.packbits(recurrence_matrix, axis=1), (n, m))
+
+    @classmethod
+    def from_tiles(
+        cls, tiles: t.Iterable[tuple[np.ndarray, int, int]], shape: tuple[int, int]
+    ) -> "PackedRecurrenceMatrix":
+        """Pack a recurrence matrix from tiles, without holding the dense matrix.
+
+        Args:
+            tiles (Iterable[tuple[np.ndarray, int, int]]): Boolean tiles and the row and column of
+                their top left cell. Every column offset must be a multiple of 8.
+            shape (tuple[int, int]): The shape of the full matrix.
+
+        Returns:
+            PackedRecurrenceMatrix: The packed recurrence matrix.
+        """
+        n, m = shape
+        packed = np.zeros((n, (m + 7) // 8), dtype=np.uint8)
+        for tile, row, col in tiles:
+            if col % 8 != 0:
+                msg = f"Tile column offset {col} is not a multiple of 8."
+                raise ValueError(msg)
+            tile_packed = np.packbits(tile, axis=1)
+            packed[row : row + tile.shape[0], col // 8 : col // 8 + tile_packed.shape[1]] |= tile_packed
+        return cls(packed, shape)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """The shape of the unpacked matrix."""
+        return self._shape
+
+    @property
+    def packed(self) -> np.ndarray:
+        """The packed uint8 array, one packed row per matrix row."""
+        return self._packed
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the packed array."""
+        return self._packed.nbytes
+
+    def count(self) -> int:
+        """The number of recurrent points."""
+        return int(_POPCOUNT[self._packed].sum(dtype=np.int64))
+
+    def _bits(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Extract individual cells."""
+        return ((self._packed[rows, cols >> 3] >> (7 - (cols & 7))) & 1).astype(bool)
+
+    def row(self, i: int) -> np.ndarray:
+        """Get a row of the matrix.
+
+        Args:
+            i (int): The row index.
+
+        Returns:
+            np.ndarray: The boolean row.
+        """
+        return np.unpackbits(self._packed[i], count=self._shape[1]).astype(bool)
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """Get a block of consecutive rows of the matrix.
+
+        Args:
+            start (int): The first row.
+            stop (int): The row after the last row.
+
+        Returns:
+            np.ndarray: The boolean block of rows.
+        """
+        return np.unpackbits(self._packed[start:stop], axis=1, count=self._shape[1]).astype(bool)
+
+    def column(self, j: int) -> np.ndarray:
+        """Get a column of the matrix.
+
+        Args:
+            j (int): The column index.
+
+        Returns:
+            np.ndarray: The boolean column.
+        """
+        n = self._shape[0]
+        return self._bits(np.arange(n), np.full(n, j))
+
+    def diagonal(self, k: int = 0) -> np.ndarray:
+        """Get a diagonal of the matrix, following the np.diagonal offset convention.
+
+        Args:
+            k (int, optional): The diagonal offset, positive above the main diagonal. Defaults to 0.
+
+        Returns:
+            np.ndarray: The boolean diagonal.
+        """
+        n, m = self._shape
+        rows = np.arange(max(0, -k), max(0, min(n, m - k)))
+        return self._bits(rows, rows + k)
+
+    def column_runs(self, j: int) -> np.ndarray:
+        """Get the lengths of the vertical lines in a column.
+
+        Args:
+            j (int): The column index.
+
+        Returns:
+            np.ndarray: The length of every vertical line, top to bottom.
+        """
+        padded = np.zeros(self._shape[0] + 2, dtype=np.int8)
+        padded[1:-1] = self.column(j)
+        edges = np.flatnonzero(np.diff(padded))
+        return edges[1::2] - edges[::2]
+
+    def iter_rows(self, block_rows: int = 1024) -> t.Iterator[tuple[np.ndarray, int]]:
+        """Iterate over the matrix in unpacked blocks of rows.
+
+        Args:
+            block_rows (int, optional): The number of rows per block. Defaults to 1024.
+
+        Yields:
+            tuple[np.ndarray, int]: The boolean block and the index of its first row.
+        """
+        for start in range(0, self._shape[0], block_rows):
+            yield self.rows(start, start + block_rows), start
+
+    def to_dense(self) -> np.ndarray:
+        """Unpack the full matrix.
+
+        Returns:
+            np.ndarray: The boolean recurrence matrix.
+        """
+        return self.rows(0, self._shape[0])
+
+    def to_image(self) -> np.ndarray:
+        """Render the matrix as a grayscale image, with recurrent points in black.
+
+        Returns:
+            np.ndarray: The uint8 image, 0 for recurrent points and 255 otherwise.
+        """
+        return np.where(self.to_dense(), np.uint8(0), np.uint8(255))
+
+    def to_pbm(self, path: t.Union[str, Path]) -> None:
+        """Write the matrix as a binary PBM (netpbm P4) image, with recurrent points in black.
+
+        The packed rows are already in the P4 layout, so this never unpacks the matrix.
+
+        Args:
+            path (str | Path): The file to write.
+        """
+        n, m = self._shape
+        with open(path, "wb") as f:
+            f.write(f"P4\n{m} {n}\n".encode("ascii"))
+            f.write(np.ascontiguousarray(self._packed).tobytes())
+
+    def __repr__(self) -> str:
+        return f"PackedRecurrenceMatrix(shape={self._shape}, nbytes={self.nbytes})"
+
+
+class BandedRecurrenceMatrix:
+    """BandedRecurrenceMatrix
+
+    The diagonals of a recurrence matrix within width - 1 cells of the main diagonal,
+    stored as one row of 2 * width - 1 cells per matrix row. This uses O(n * width)
+    memory, and every square block of at most width x width cells centred on the main
+    diagonal (e.g. the recurrence matrix of a moving window) can be read from it
+    without copying.
+    """
+
+    _band: np.ndarray
+    _shape: tuple[int, int]
+    _width: int
+
+    def __init__(self, band: np.ndarray, shape: tuple[int, int], width: int) -> None:
+        """Initialize a BandedRecurrenceMatrix.
+
+        Args:
+            band (np.ndarray): The boolean band, of shape (n, 2 * width - 1). Cell (i, k) holds
+                cell (i, i + k - width + 1) of the matrix, and cells outside the matrix are False.
+            shape (tuple[int, int]): The shape of the full matrix.
+            width (int): The half-width of the band, including the main diagonal.
+        """
+        n, m = shape
+        if width < 1 or band.dtype != bool or band.shape != (n, 2 * width - 1):
+            msg = f"Band of dtype {band.dtype} and shape {band.shape} does not match shape {shape} and width {width}."
+            raise ValueError(msg)
+        self._band = np.ascontiguousarray(band)
+        self._shape = (n, m)
+        self._width = width
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """The shape of the full matrix."""
+        return self._shape
+
+    @property
+    def width(self) -> int:
+        """The half-width of the band, including the main diagonal."""
+        return self._width
+
+    @property
+    def band(self) -> np.ndarray:
+        """The boolean band, one row of 2 * width - 1 cells per matrix row."""
+        return self._band
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the band."""
+        return self._band.nbytes
+
+    def diagonal(self, k: int = 0) -> np.ndarray:
+        """Get a diagonal of the matrix, following the np.diagonal offset convention.
+
+        Args:
+            k (int, optional): The diagonal offset, at most width - 1 in either direction. Defaults to 0.
+
+        Returns:
+            np.ndarray: The boolean diagonal.
+        """
+        if abs(k) >= self._width:
+            msg = f"Diagonal {k} lies outside the band of width {self._width}."
+            raise ValueError(msg)
+        n, m = self._shape
+        return self._band[max(0, -k) : max(0, min(n, m - k)), k + self._width - 1]
+
+    def block(self, start: int, size: int) -> np.ndarray:
+        """Get the square block of the matrix starting at cell (start, start).
+
+        Args:
+            start (int): The first row and column of the block.
+            size (int): The number of rows and columns, at most width.
+
+        Returns:
+            np.ndarray: A read-only boolean view of the block.
+        """
+        n, m = self._shape
+        if size > self._width or start < 0 or start + size > min(n, m):
+            msg = f"Block of size {size} at {start} does not fit in the band of width {self._width}."
+            raise ValueError(msg)
+        # one row down in the matrix is one row down and one cell left in the band, so the block
+        # is a strided view with a row stride of 2 * width - 2 cells
+        flat = self._band.reshape(-1)[start * self._band.shape[1] + self._width - 1 :]
+        itemsize = self._band.itemsize
+        return np.lib.stride_tricks.as_strided(
+            flat, shape=(size, size), strides=((self._band.shape[1] - 1) * itemsize, itemsize), writeable=False
+        )
+
+    def to_dense(self) -> np.ndarray:
+        """Expand the band into the full matrix, False outside the band.
+
+        Returns:
+            np.ndarray: The boolean recurrence matrix.
+        """
+        n, m = self._shape
+        dense = np.zeros((n, m), dtype=bool)
+        for k in range(-self._width + 1, self._width):
+            rows = np.arange(max(0, -k), max(0, min(n, m - k)))
+            dense[rows, rows + k] = self._band[rows, k + self._width - 1]
+        return dense
+
+    def __repr__(self) -> str:
+        return f"BandedRecurrenceMatrix(shape={self._shape}, width={self._width}, nbytes={self.nbytes})"
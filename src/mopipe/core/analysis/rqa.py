@@ -1,7 +1,861 @@
+import typing as t
+
 import numpy as np
 import scipy  # type: ignore
+from joblib import Parallel, delayed, effective_n_jobs
+from numpy.lib.stride_tricks import sliding_window_view
 from pandas.api.extensions import ExtensionArray
 
+from mopipe.core.analysis.embedding import delay_embed
+from mopipe.core.analysis.recurrence import BandedRecurrenceMatrix, PackedRecurrenceMatrix
+from mopipe.core.analysis.surrogates import (
+    SURROGATE_METHODS,
+    iaaft_surrogates,
+    shuffle_surrogates,
+    time_shift_shifts,
+)
+
+RQA_BACKENDS = ("dense", "sparse")
+# measures that approximate_rqa can estimate from sampled cells
+APPROXIMATE_RQA_MEASURES = ("recurrence_rate", "determinism", "laminarity")
+# windowed analyses can also compute the band around the main diagonal once for the whole series
+WINDOWED_RQA_BACKENDS = (*RQA_BACKENDS, "banded")
+RQA_MEASURES = (
+    "recurrence_rate",
+    "determinism",
+    "laminarity",
+    "avg_diag_length",
+    "avg_vert_length",
+    "d_entropy",
+    "v_entropy",
+)
+# further measures, only calculated when selected with measures=
+RQA_EXTENDED_MEASURES = (
+    "max_diag_length",
+    "max_vert_length",
+    "divergence",
+    "trapping_time",
+    "ratio",
+    "recurrence_time_entropy",
+)
+
+
+def _line_runs(lines: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find all runs of True values along the rows of a boolean array.
+
+    Each row is padded with False on both sides, so runs never continue from one
+    row into the next, and the rising/falling edges of the flattened array mark the
+    start and end of every run.
+
+    Args:
+        lines (np.ndarray): 2D boolean array, one line per row.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The row, start position and (exclusive)
+            end position of every run, in row-major order.
+    """
+    width = lines.shape[1] + 2
+    padded = np.zeros((lines.shape[0], width), dtype=np.int8)
+    padded[:, 1:-1] = lines
+    edges = np.flatnonzero(np.diff(padded.ravel()))
+    starts, ends = edges[::2], edges[1::2]
+    return starts // width, starts % width, ends % width
+
+
+def _line_dist(counts: np.ndarray, n_lines: int, n_false: int) -> np.ndarray:
+    """Convert counts of lines by length into a line length histogram.
+
+    Bin 0 follows the convention of counting every non-recurrent cell that does
+    not terminate a line, plus one per scanned line that ends on a non-recurrent
+    cell.
+
+    Args:
+        counts (np.ndarray): The number of lines of each length.
+        n_lines (int): The number of scanned lines (diagonals or columns).
+        n_false (int): The number of non-recurrent cells.
+
+    Returns:
+        np.ndarray: The line length histogram, indexed by line length.
+    """
+    line_dist = counts.astype(float)
+    line_dist[0] = n_false - counts[1:].sum() + n_lines
+    return line_dist
+
+
+def _point_runs(key: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    """Find the lengths of all runs of consecutive positions among a set of points.
+
+    Args:
+        key (np.ndarray): The line each point lies on.
+        pos (np.ndarray): The position of each point along its line.
+
+    Returns:
+        np.ndarray: The length of every run.
+    """
+    if key.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((pos, key))
+    key, pos = key[order], pos[order]
+    breaks = np.flatnonzero((np.diff(key) != 0) | (np.diff(pos) != 1)) + 1
+    bounds = np.concatenate(([0], breaks, [key.shape[0]]))
+    return np.diff(bounds)
+
+
+class LineDistAccumulator:
+    """Accumulate diagonal and vertical line length histograms tile by tile.
+
+    Tiles of the recurrence matrix must be added in row-major order (all tiles of
+    a row block before the next row block, left to right within a row block), which
+    guarantees that the cell preceding any line entering a tile has already been
+    seen. Lines that run off the bottom or right edge of a tile are carried over
+    to the tile that continues them, so only O(rows + cols) state is kept between
+    tiles, and the result is identical to scanning the whole matrix at once.
+
+    Optionally, the lengths of the white vertical lines between two recurrent
+    points (the recurrence times) are accumulated as well.
+    """
+
+    def __init__(self, shape: tuple[int, int], *, recurrence_times: bool = False) -> None:
+        """Initialize a LineDistAccumulator.
+
+        Args:
+            shape (tuple[int, int]): The shape of the full recurrence matrix.
+            recurrence_times (bool, optional): Also accumulate the recurrence time histogram.
+                Defaults to False.
+        """
+        self._shape = shape
+        n, m = shape
+        self._size = max(n, m)
+        self._d_counts = np.zeros(self._size + 1, dtype=np.int64)
+        self._v_counts = np.zeros(self._size + 1, dtype=np.int64)
+        # run length ending at the last seen cell of each diagonal (k + n - 1) and column
+        self._d_carry = np.zeros(n + m - 1, dtype=np.int64)
+        self._v_carry = np.zeros(m, dtype=np.int64)
+        self._rr_sum = 0
+        # end of the last vertical line seen in each column, -1 before the first one
+        self._rt_counts = np.zeros(self._size + 1, dtype=np.int64) if recurrence_times else None
+        self._v_last = np.full(m, -1, dtype=np.int64)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """The shape of the full recurrence matrix."""
+        return self._shape
+
+    @property
+    def rr_sum(self) -> int:
+        """The number of recurrent points seen so far."""
+        return self._rr_sum
+
+    @property
+    def d_line_dist(self) -> np.ndarray:
+        """The diagonal line length histogram, indexed by line length."""
+        n, m = self._shape
+        return _line_dist(self._d_counts, n + m - 1, n * m - self.rr_sum)
+
+    @property
+    def v_line_dist(self) -> np.ndarray:
+        """The vertical line length histogram, indexed by line length."""
+        n, m = self._shape
+        return _line_dist(self._v_counts, m, n * m - self.rr_sum)
+
+    @property
+    def rt_line_dist(self) -> t.Optional[np.ndarray]:
+        """The histogram of white vertical line lengths between two recurrent points, if accumulated."""
+        return self._rt_counts
+
+    def _close(self, counts: np.ndarray, lengths: np.ndarray) -> None:
+        """Add finished lines to a histogram."""
+        counts += np.bincount(lengths, minlength=counts.shape[0])
+
+    def _add_lines(
+        self,
+        lines: np.ndarray,
+        first: np.ndarray,
+        last: np.ndarray,
+        entry: np.ndarray,
+        exit_open: np.ndarray,
+        carry: np.ndarray,
+        counts: np.ndarray,
+        runs: t.Optional[tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """Run-length encode the lines of one tile, continuing and carrying over runs.
+
+        Args:
+            lines (np.ndarray): 2D boolean array, one line per row.
+            first (np.ndarray): The position of the first real cell of each line.
+            last (np.ndarray): The position of the last real cell of each line.
+            entry (np.ndarray): Whether each line continues a line from a previous tile.
+            exit_open (np.ndarray): Whether each line continues into a later tile.
+            carry (np.ndarray): The run length carried into each line.
+            counts (np.ndarray): The histogram to add finished lines to.
+            runs (tuple[np.ndarray, np.ndarray, np.ndarray] | None, optional): The result of
+                _line_runs(lines), if already known. Defaults to None.
+
+        Returns:
+            np.ndarray: The run length carried out of each line.
+        """
+        rows, starts, ends = _line_runs(lines) if runs is None else runs
+        lengths = ends - starts
+        continued = entry[rows] & (starts == first[rows])
+        lengths[continued] += carry[rows[continued]]
+        # carried runs that stop right at the tile edge
+        dropped = entry & (carry > 0)
+        dropped[rows[continued]] = False
+        self._close(counts, carry[dropped])
+
+        is_open = exit_open[rows] & (ends - 1 == last[rows])
+        self._close(counts, lengths[~is_open])
+        carry_out = np.zeros(lines.shape[0], dtype=np.int64)
+        carry_out[rows[is_open]] = lengths[is_open]
+        return carry_out
+
+    def _add_gaps(
+        self, runs: tuple[np.ndarray, np.ndarray, np.ndarray], offset: int, last_end: np.ndarray
+    ) -> np.ndarray:
+        """Add the gaps between consecutive vertical lines of one tile to the recurrence times.
+
+        Args:
+            runs (tuple[np.ndarray, np.ndarray, np.ndarray]): The result of _line_runs for the tile.
+            offset (int): The position of the first cell of the tile's lines.
+            last_end (np.ndarray): The (exclusive) end of the last run seen in each line, or -1.
+
+        Returns:
+            np.ndarray: The end of the last run seen in each line after this tile.
+        """
+        rows, starts, ends = runs
+        if rows.shape[0] == 0 or self._rt_counts is None:
+            return last_end
+        starts, ends = starts + offset, ends + offset
+        first_run = np.ones(rows.shape[0], dtype=bool)
+        first_run[1:] = rows[1:] != rows[:-1]
+        previous = np.empty_like(ends)
+        previous[first_run] = last_end[rows[first_run]]
+        previous[1:][~first_run[1:]] = ends[:-1][~first_run[1:]]
+        # a run starting right where the last one ended continues it across the tile edge
+        gaps = starts - previous
+        self._close(self._rt_counts, gaps[(previous >= 0) & (gaps > 0)])
+        last_run = np.ones(rows.shape[0], dtype=bool)
+        last_run[:-1] = first_run[1:]
+        last_out = last_end.copy()
+        last_out[rows[last_run]] = ends[last_run]
+        return last_out
+
+    def add(self, tile: np.ndarray, row: int = 0, col: int = 0) -> None:
+        """Add a tile of the recurrence matrix.
+
+        Args:
+            tile (np.ndarray): The boolean recurrence values of the tile.
+            row (int, optional): The row of the top left cell of the tile. Defaults to 0.
+            col (int, optional): The column of the top left cell of the tile. Defaults to 0.
+        """
+        n = self._shape[0]
+        h, w = tile.shape
+        if h == 0 or w == 0:
+            return
+        self._rr_sum += int(np.count_nonzero(tile))
+        # vertical lines are the columns of the tile
+        self._add_vertical(tile.T, col, row, entry=row > 0, exit_open=row + h < n)
+        self._add_diagonals(tile, row, col)
+
+    def _add_vertical(self, lines: np.ndarray, index: int, offset: int, *, entry: bool, exit_open: bool) -> None:
+        """Add segments of consecutive vertical lines.
+
+        Args:
+            lines (np.ndarray): 2D boolean array, one line segment per row.
+            index (int): The index of the first line.
+            offset (int): The position of the first cell of the segments along their lines.
+            entry (bool): Whether the segments continue segments from a previous tile.
+            exit_open (bool): Whether the segments continue into a later tile.
+        """
+        k, length = lines.shape
+        runs = _line_runs(lines)
+        self._v_carry[index : index + k] = self._add_lines(
+            lines,
+            np.zeros(k, dtype=np.int64),
+            np.full(k, length - 1, dtype=np.int64),
+            np.full(k, entry),
+            np.full(k, exit_open),
+            self._v_carry[index : index + k],
+            self._v_counts,
+            runs,
+        )
+        self._v_last[index : index + k] = self._add_gaps(runs, offset, self._v_last[index : index + k])
+
+    def _add_diagonals(self, tile: np.ndarray, row: int, col: int) -> None:
+        """Add the diagonal line segments of a non-empty tile."""
+        n, m = self._shape
+        h, w = tile.shape
+        # skew the tile so that local diagonal kl = b - a becomes row kl + h - 1
+        skewed = np.zeros((h, h + w), dtype=bool)
+        view = np.lib.stride_tricks.as_strided(
+            skewed.ravel()[h - 1 :], shape=(h, w), strides=((h + w - 1) * skewed.itemsize, skewed.itemsize)
+        )
+        view[...] = tile
+        kl = np.arange(-h + 1, w)
+        d_first = np.maximum(0, -kl)
+        d_last = np.minimum(h - 1, w - 1 - kl)
+        d_entry = (row + d_first > 0) & (col + d_first + kl > 0)
+        d_exit = (row + d_last + 1 < n) & (col + d_last + kl + 1 < m)
+        k0 = col - row - h + 1 + n - 1
+        self._d_carry[k0 : k0 + h + w - 1] = self._add_lines(
+            skewed.T[:-1], d_first, d_last, d_entry, d_exit, self._d_carry[k0 : k0 + h + w - 1], self._d_counts
+        )
+
+
+class SymmetricLineDistAccumulator(LineDistAccumulator):
+    """SymmetricLineDistAccumulator
+
+    Accumulates the line length histograms of a symmetric (auto-)recurrence
+    matrix from the tiles on and above the main diagonal only. The lower
+    triangle mirrors the upper one, so its diagonal lines are counted twice,
+    and every vertical line of column j is followed down the column to the
+    main diagonal and then along row j, which holds the same cells as the
+    lower part of the column.
+
+    Tiles must lie on a square grid, i.e. use the same block boundaries for
+    rows and columns, and be added in row-major order. Tiles on the main
+    diagonal must be square, and only their upper triangle is used.
+    """
+
+    def __init__(self, size: int, *, recurrence_times: bool = False) -> None:
+        """Initialize a SymmetricLineDistAccumulator.
+
+        Args:
+            size (int): The number of rows (and columns) of the recurrence matrix.
+            recurrence_times (bool, optional): Also accumulate the recurrence time histogram.
+                Defaults to False.
+        """
+        super().__init__((size, size), recurrence_times=recurrence_times)
+        self._main = np.zeros(size, dtype=bool)
+
+    @property
+    def rr_sum(self) -> int:
+        """The number of recurrent points in the full matrix."""
+        return 2 * self._rr_sum + int(np.count_nonzero(self._main))
+
+    @property
+    def d_line_dist(self) -> np.ndarray:
+        """The diagonal line length histogram of the full matrix."""
+        n = self._shape[0]
+        _, starts, ends = _line_runs(self._main[np.newaxis])
+        counts = 2 * self._d_counts + np.bincount(ends - starts, minlength=n + 1)
+        return _line_dist(counts, 2 * n - 1, n * n - self.rr_sum)
+
+    def add(self, tile: np.ndarray, row: int = 0, col: int = 0) -> None:
+        """Add a tile on or above the main diagonal.
+
+        Args:
+            tile (np.ndarray): The boolean recurrence values of the tile.
+            row (int, optional): The row of the top left cell of the tile. Defaults to 0.
+            col (int, optional): The column of the top left cell of the tile. Defaults to 0.
+        """
+        n = self._shape[0]
+        h, w = tile.shape
+        if h == 0 or w == 0:
+            return
+        if row == col:
+            upper = np.triu(tile, 1)
+            self._main[row : row + h] = np.diagonal(tile)
+            # column j of the tile down to the main diagonal, then along row j
+            self._add_vertical(
+                np.where(np.tri(h, dtype=bool), tile.T, tile), row, row, entry=row > 0, exit_open=row + h < n
+            )
+        else:
+            upper = tile
+            self._add_vertical(tile.T, col, row, entry=row > 0, exit_open=True)
+            self._add_vertical(tile, row, col, entry=True, exit_open=col + w < n)
+        self._rr_sum += int(np.count_nonzero(upper))
+        self._add_diagonals(upper, row, col)
+
+
+def _sparse_line_dist(recurrence_matrix: t.Any, *, diagonal: bool) -> np.ndarray:
+    """Calculate a line length histogram directly from the recurrent points of a sparse matrix.
+
+    Args:
+        recurrence_matrix (scipy.sparse.spmatrix): The sparse recurrence matrix.
+        diagonal (bool): Whether to count diagonal (True) or vertical (False) lines.
+
+    Returns:
+        np.ndarray: The line length histogram, indexed by line length.
+    """
+    n, m = recurrence_matrix.shape
+    coo = recurrence_matrix.tocoo()
+    rows, cols = coo.row[coo.data != 0].astype(np.int64), coo.col[coo.data != 0].astype(np.int64)
+    runs = _point_runs(cols - rows if diagonal else cols, rows)
+    counts = np.bincount(runs, minlength=max(n, m) + 1)
+    return _line_dist(counts, n + m - 1 if diagonal else m, n * m - rows.shape[0])
+
+
+def _sparse_recurrence_times(recurrence_matrix: t.Any) -> np.ndarray:
+    """Calculate the recurrence time histogram directly from the recurrent points of a sparse matrix.
+
+    Args:
+        recurrence_matrix (scipy.sparse.spmatrix): The sparse recurrence matrix.
+
+    Returns:
+        np.ndarray: The histogram of white vertical line lengths between two recurrent points.
+    """
+    n, m = recurrence_matrix.shape
+    coo = recurrence_matrix.tocoo()
+    rows, cols = coo.row[coo.data != 0].astype(np.int64), coo.col[coo.data != 0].astype(np.int64)
+    order = np.lexsort((rows, cols))
+    rows, cols = rows[order], cols[order]
+    gaps = np.diff(rows)[np.diff(cols) == 0] - 1
+    return np.bincount(gaps[gaps > 0], minlength=max(n, m) + 1)
+
+
+def _theiler_mask(block: np.ndarray, row: int, theiler: int) -> np.ndarray:
+    """Set the cells of a block of rows starting at row less than theiler cells from the main diagonal to False."""
+    if theiler <= 0:
+        return block
+    h, w = block.shape
+    lag = np.arange(w)[np.newaxis, :] - np.arange(row, row + h)[:, np.newaxis]
+    return block & (np.abs(lag) >= theiler)
+
+
+def _line_dists(
+    recurrence_matrix: t.Any, *, recurrence_times: bool = False, theiler: int = 0
+) -> tuple[np.ndarray, np.ndarray, t.Optional[np.ndarray], int]:
+    """Calculate both line length histograms of a recurrence matrix in one pass.
+
+    Args:
+        recurrence_matrix (np.ndarray | PackedRecurrenceMatrix | scipy.sparse.spmatrix): The
+            recurrence matrix.
+        recurrence_times (bool, optional): Also calculate the recurrence time histogram.
+            Defaults to False.
+        theiler (int, optional): Leave out the cells less than theiler cells from the main
+            diagonal, without changing the input matrix. Defaults to 0.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray | None, int]: The diagonal and vertical line
+            length histograms, the recurrence time histogram (None unless requested), and the
+            number of recurrent points.
+    """
+    if scipy.sparse.issparse(recurrence_matrix):
+        if theiler > 0:
+            coo = recurrence_matrix.tocoo()
+            keep = np.abs(coo.col.astype(np.int64) - coo.row) >= theiler
+            recurrence_matrix = scipy.sparse.coo_matrix(
+                (coo.data[keep], (coo.row[keep], coo.col[keep])), shape=coo.shape
+            )
+        return (
+            _sparse_line_dist(recurrence_matrix, diagonal=True),
+            _sparse_line_dist(recurrence_matrix, diagonal=False),
+            _sparse_recurrence_times(recurrence_matrix) if recurrence_times else None,
+            int(recurrence_matrix.count_nonzero()),
+        )
+    acc = LineDistAccumulator(recurrence_matrix.shape, recurrence_times=recurrence_times)
+    if isinstance(recurrence_matrix, PackedRecurrenceMatrix):
+        # unpack a few megabytes worth of rows at a time
+        block_rows = max(1, (1 << 22) // max(1, recurrence_matrix.shape[1]))
+        for block, row in recurrence_matrix.iter_rows(block_rows):
+            acc.add(_theiler_mask(block, row, theiler), row, 0)
+    else:
+        acc.add(_theiler_mask(np.asarray(recurrence_matrix), 0, theiler))
+    return acc.d_line_dist, acc.v_line_dist, acc.rt_line_dist, acc.rr_sum
+
+
+def diagonal_line_dist(recurrence_matrix: t.Any) -> np.ndarray:
+    """Calculate the diagonal line length histogram of a recurrence matrix.
+
+    Args:
+        recurrence_matrix (np.ndarray | PackedRecurrenceMatrix | scipy.sparse.spmatrix): The
+            boolean recurrence matrix.
+
+    Returns:
+        np.ndarray: The diagonal line length histogram, indexed by line length.
+    """
+    return _line_dists(recurrence_matrix)[0]
+
+
+def vertical_line_dist(recurrence_matrix: t.Any) -> np.ndarray:
+    """Calculate the vertical line length histogram of a recurrence matrix.
+
+    Args:
+        recurrence_matrix (np.ndarray | PackedRecurrenceMatrix | scipy.sparse.spmatrix): The
+            boolean recurrence matrix.
+
+    Returns:
+        np.ndarray: The vertical line length histogram, indexed by line length.
+    """
+    return _line_dists(recurrence_matrix)[1]
+
+
+def _distance_tiles(
+    embed_x: np.ndarray, embed_y: np.ndarray, block_size: int
+) -> t.Iterator[tuple[np.ndarray, int, int]]:
+    """Compute the distance matrix one block_size x block_size tile at a time, in row-major order.
+
+    Args:
+        embed_x (np.ndarray): The embedded x series, one point per row.
+        embed_y (np.ndarray): The embedded y series, one point per row.
+        block_size (int): The maximum number of rows/columns in a tile.
+
+    Yields:
+        tuple[np.ndarray, int, int]: The distance tile and the row and column of its top left cell.
+    """
+    for row in range(0, embed_x.shape[0], block_size):
+        for col in range(0, embed_y.shape[0], block_size):
+            distances = scipy.spatial.distance_matrix(embed_x[row : row + block_size], embed_y[col : col + block_size])
+            yield distances, row, col
+
+
+def _recurrence_tiles(
+    embed_x: np.ndarray, embed_y: np.ndarray, threshold: float, block_size: int
+) -> t.Iterator[tuple[np.ndarray, int, int]]:
+    """Compute the recurrence matrix one block_size x block_size tile at a time, in row-major order.
+
+    Args:
+        embed_x (np.ndarray): The embedded x series, one point per row.
+        embed_y (np.ndarray): The embedded y series, one point per row.
+        threshold (float): The recurrence threshold.
+        block_size (int): The maximum number of rows/columns in a tile.
+
+    Yields:
+        tuple[np.ndarray, int, int]: The boolean tile and the row and column of its top left cell.
+    """
+    for distances, row, col in _distance_tiles(embed_x, embed_y, block_size):
+        yield distances < threshold, row, col
+
+
+def _sparse_recurrence(embed_x: np.ndarray, embed_y: np.ndarray, threshold: float) -> t.Any:
+    """Find all recurrent points with KD-tree radius queries.
+
+    Only pairs closer than the threshold are ever visited, so time and memory scale
+    with the number of recurrent points rather than with the size of the matrix.
+
+    Args:
+        embed_x (np.ndarray): The embedded x series, one point per row.
+        embed_y (np.ndarray): The embedded y series, one point per row.
+        threshold (float): The recurrence threshold.
+
+    Returns:
+        scipy.sparse.coo_matrix: The boolean recurrence matrix.
+    """
+    tree_x = scipy.spatial.cKDTree(embed_x)
+    tree_y = scipy.spatial.cKDTree(embed_y)
+    pairs = tree_x.sparse_distance_matrix(tree_y, threshold, output_type="ndarray")
+    pairs = pairs[pairs["v"] < threshold]
+    return scipy.sparse.coo_matrix(
+        (np.ones(pairs.shape[0], dtype=bool), (pairs["i"], pairs["j"])),
+        shape=(embed_x.shape[0], embed_y.shape[0]),
+    )
+
+
+def sparse_recurrence_matrix(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+) -> t.Any:
+    """Calculate a sparse (COO) recurrence matrix for the input series.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+
+    Returns:
+        scipy.sparse.coo_matrix: The boolean recurrence matrix.
+    """
+    return _sparse_recurrence(delay_embed(x, dim, tau), delay_embed(y, dim, tau), threshold)
+
+
+def _tile_size(block_size: t.Optional[int], shape: tuple[int, int]) -> int:
+    """Validate the block size, defaulting to a single tile covering the whole matrix."""
+    if block_size is None:
+        return max(shape)
+    if block_size < 1:
+        msg = f"block_size must be a positive integer, got {block_size}."
+        raise ValueError(msg)
+    return block_size
+
+
+def packed_recurrence_matrix(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    *,
+    block_size: t.Optional[int] = None,
+) -> PackedRecurrenceMatrix:
+    """Calculate a bit-packed recurrence matrix for the input series.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        block_size (int | None, optional): If set, distances are computed in tiles of at most
+            block_size x block_size (rounded up to a multiple of 8), so the dense matrices are
+            never held in memory. Defaults to None (a single tile).
+
+    Returns:
+        PackedRecurrenceMatrix: The packed recurrence matrix.
+    """
+    embed_data_x, embed_data_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    shape = (embed_data_x.shape[0], embed_data_y.shape[0])
+    block_size = -(-_tile_size(block_size, shape) // 8) * 8
+    return PackedRecurrenceMatrix.from_tiles(
+        _recurrence_tiles(embed_data_x, embed_data_y, threshold, block_size), shape
+    )
+
+
+def recurrence_matrix(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    *,
+    block_size: t.Optional[int] = None,
+    backend: str = "dense",
+) -> t.Any:
+    """Calculate a compact recurrence matrix for the input series.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        block_size (int | None, optional): The tile size for the dense backend. Defaults to None.
+        backend (str, optional): "dense" or "sparse". Defaults to "dense".
+
+    Returns:
+        PackedRecurrenceMatrix | scipy.sparse.coo_matrix: A bit-packed matrix for the dense
+            backend, a sparse matrix for the sparse backend.
+    """
+    if backend not in RQA_BACKENDS:
+        msg = f"Invalid backend {backend}, must be one of {RQA_BACKENDS}."
+        raise ValueError(msg)
+    if backend == "sparse":
+        return sparse_recurrence_matrix(x, y, dim, tau, threshold)
+    return packed_recurrence_matrix(x, y, dim, tau, threshold, block_size=block_size)
+
+
+def _theiler_distances(embed_x: np.ndarray, embed_y: np.ndarray, theiler: int) -> np.ndarray:
+    """The sorted distances of the cells less than theiler cells from the main diagonal."""
+    n, m = embed_x.shape[0], embed_y.shape[0]
+    parts = [np.empty(0)]
+    for lag in range(1 - theiler, theiler):
+        rows = np.arange(max(0, -lag), min(n, m - lag))
+        parts.append(np.linalg.norm(embed_x[rows] - embed_y[rows + lag], axis=1))
+    return np.sort(np.concatenate(parts))
+
+
+def rr_threshold(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    target_rr: float,
+    dim: int = 1,
+    tau: int = 1,
+    *,
+    sample_size: int = 100_000,
+    refine: bool = True,
+    seed: t.Optional[int] = None,
+    theiler: int = 0,
+) -> float:
+    """Find the recurrence threshold that gives a target recurrence rate.
+
+    The threshold is the target_rr quantile of the pairwise distances, found without
+    sorting (or even computing) all of them. Small matrices are searched exactly with
+    partial selection. For larger ones, the quantile is estimated from a random
+    sample of pairs along with a 99.9% confidence interval from the order statistics,
+    and, if refine is set, that interval is narrowed down with KD-tree neighbour
+    counts, which give the exact number of pairs within any radius.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        target_rr (float): The target recurrence rate, between 0 and 1.
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        sample_size (int, optional): The number of sampled pairs. Defaults to 100000.
+        refine (bool, optional): Whether to refine the sampled estimate with KD-tree neighbour
+            counts. Defaults to True.
+        seed (int | None, optional): The seed for sampling pairs. Defaults to None.
+        theiler (int, optional): The Theiler window, see auto_rqa. The cells less than theiler
+            cells from the main diagonal are left out, so the target is the recurrence rate of
+            the RQA measures computed with the same window. Defaults to 0 (nothing excluded).
+
+    Returns:
+        float: The recurrence threshold.
+    """
+    if not 0 < target_rr <= 1:
+        msg = f"target_rr must be in (0, 1], got {target_rr}."
+        raise ValueError(msg)
+    if theiler < 0:
+        msg = f"theiler must be a non-negative integer, got {theiler}."
+        raise ValueError(msg)
+    embed_data_x, embed_data_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    n, m = embed_data_x.shape[0], embed_data_y.shape[0]
+    n_cells = n * m - _theiler_cells(n, m, theiler)
+    if n_cells <= 0:
+        msg = f"No cells outside the Theiler window of {theiler} to pick a threshold from."
+        raise ValueError(msg)
+    # number of recurrent points wanted
+    k = max(1, round(target_rr * n_cells))
+
+    if n * m <= sample_size:
+        distances = scipy.spatial.distance_matrix(embed_data_x, embed_data_y)
+        if theiler > 0:
+            lag = np.subtract.outer(np.arange(n), np.arange(m))
+            distances = distances[np.abs(lag) >= theiler]
+        return float(np.nextafter(np.partition(distances.ravel(), k - 1)[k - 1], np.inf))
+
+    rng = np.random.default_rng(seed)
+    rows, cols = rng.integers(0, n, sample_size), rng.integers(0, m, sample_size)
+    if theiler > 0:
+        # resample the pairs that fall in the Theiler window
+        inside = np.abs(rows - cols) < theiler
+        while np.any(inside):
+            rows[inside] = rng.integers(0, n, size=inside.sum())
+            cols[inside] = rng.integers(0, m, size=inside.sum())
+            inside = np.abs(rows - cols) < theiler
+    distances = np.linalg.norm(embed_data_x[rows] - embed_data_y[cols], axis=1)
+    spread = 3.29 * np.sqrt(sample_size * target_rr * (1 - target_rr))
+    centre = target_rr * sample_size
+    ranks = np.clip(np.array([centre - spread, centre, centre + spread]).astype(int), 0, sample_size - 1)
+    lo, estimate, hi = np.partition(distances, ranks)[ranks]
+    if not refine:
+        return float(np.nextafter(estimate, np.inf))
+
+    tree_x = scipy.spatial.cKDTree(embed_data_x)
+    tree_y = scipy.spatial.cKDTree(embed_data_y)
+    window = _theiler_distances(embed_data_x, embed_data_y, theiler)
+    for _ in range(8):
+        radii = np.linspace(lo, hi, 16)
+        # pairs within each radius (inclusive), outside the Theiler window
+        counts = tree_x.count_neighbors(tree_y, radii) - np.searchsorted(window, radii, side="right")
+        if counts[0] >= k and lo > 0:
+            lo, hi = 0.0, lo
+            continue
+        if counts[-1] < k:
+            lo, hi = hi, 2 * hi if hi > 0 else np.finfo(float).eps
+            continue
+        idx = int(np.argmax(counts >= k))
+        lo, hi = radii[max(idx - 1, 0)], radii[idx]
+        if counts[idx] - k <= 0.001 * k or lo == hi:
+            break
+    return float(np.nextafter(hi, np.inf))
+
+
+def _measure_names(measures: t.Optional[t.Sequence[str]]) -> tuple[str, ...]:
+    """Validate a selection of RQA measures, defaulting to RQA_MEASURES."""
+    if measures is None:
+        return RQA_MEASURES
+    unknown = [m for m in measures if m not in RQA_MEASURES + RQA_EXTENDED_MEASURES]
+    if unknown:
+        msg = f"Unknown RQA measures {unknown}, must be in {RQA_MEASURES + RQA_EXTENDED_MEASURES}."
+        raise ValueError(msg)
+    return tuple(measures)
+
+
+def _entropy(counts: np.ndarray) -> float:
+    """The Shannon entropy of a histogram."""
+    probs = counts[counts > 0].astype(float)
+    probs /= probs.sum()
+    return float(-(probs * np.log(probs)).sum())
+
+
+def _rqa_measures(
+    d_line_dist: np.ndarray,
+    v_line_dist: np.ndarray,
+    rr_sum: int,
+    n_cells: int,
+    lmin: int,
+    rt_line_dist: t.Optional[np.ndarray] = None,
+    measures: t.Sequence[str] = RQA_MEASURES,
+) -> list[float]:
+    """Calculate the RQA statistics from the line length histograms.
+
+    Args:
+        d_line_dist (np.ndarray): The diagonal line length histogram.
+        v_line_dist (np.ndarray): The vertical line length histogram.
+        rr_sum (int): The number of recurrent points.
+        n_cells (int): The number of cells in the recurrence matrix.
+        lmin (int): The minimum line length.
+        rt_line_dist (np.ndarray | None, optional): The recurrence time histogram, required for
+            "recurrence_time_entropy". Defaults to None.
+        measures (Sequence[str], optional): The measures to calculate. Defaults to RQA_MEASURES.
+
+    Returns:
+        list[float]: The RQA statistics, in the order of measures.
+    """
+    lengths = np.arange(d_line_dist.shape[0])[lmin:]
+    d_lines, v_lines = d_line_dist[lmin:], v_line_dist[lmin:]
+    rr = rr_sum / n_cells if n_cells > 0 else 0
+    det = (d_lines * lengths).sum() / rr_sum if rr_sum > 0 else 0
+    lam = (v_lines * lengths).sum() / rr_sum if rr_sum > 0 else 0
+
+    d_sum = d_lines.sum()
+    avg_diag_length = (d_lines * lengths).sum() / d_sum if d_sum > 0 else 0
+    v_sum = v_lines.sum()
+    avg_vert_length = (v_lines * lengths).sum() / v_sum if v_sum > 0 else 0
+    max_diag_length = lengths[d_lines > 0].max() if d_sum > 0 else 0
+    max_vert_length = lengths[v_lines > 0].max() if v_sum > 0 else 0
+
+    values = {
+        "recurrence_rate": rr,
+        "determinism": det,
+        "laminarity": lam,
+        "avg_diag_length": avg_diag_length,
+        "avg_vert_length": avg_vert_length,
+        "d_entropy": _entropy(d_lines),
+        "v_entropy": _entropy(v_lines),
+        "max_diag_length": max_diag_length,
+        "max_vert_length": max_vert_length,
+        "divergence": 1 / max_diag_length if max_diag_length > 0 else 0,
+        "trapping_time": avg_vert_length,
+        "ratio": det / rr if rr > 0 else 0,
+    }
+    if "recurrence_time_entropy" in measures:
+        if rt_line_dist is None:
+            msg = "recurrence_time_entropy needs the recurrence time histogram."
+            raise ValueError(msg)
+        values["recurrence_time_entropy"] = _entropy(rt_line_dist[1:])
+    return [values[m] for m in measures]
+
+
+def rqa_from_matrix(
+    recurrence_matrix: t.Any,
+    lmin: int = 2,
+    *,
+    theiler: int = 0,
+    measures: t.Optional[t.Sequence[str]] = None,
+) -> list[float]:
+    """Calculate Recurrence Quantification Analysis (RQA) statistics from a recurrence matrix.
+
+    Args:
+        recurrence_matrix (np.ndarray | PackedRecurrenceMatrix | scipy.sparse.spmatrix): The
+            boolean recurrence matrix.
+        lmin (int, optional): The minimum line length. Defaults to 2.
+        theiler (int, optional): The Theiler window, see auto_rqa. The cells less than theiler
+            cells from the main diagonal are left out of the statistics, and of the recurrence
+            rate's denominator. Defaults to 0 (nothing excluded).
+        measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES
+            and RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+
+    Returns:
+        list[float]: The RQA statistics.
+    """
+    measures = _measure_names(measures)
+    if theiler < 0:
+        msg = f"theiler must be a non-negative integer, got {theiler}."
+        raise ValueError(msg)
+    d_line_dist, v_line_dist, rt_line_dist, rr_sum = _line_dists(
+        recurrence_matrix, recurrence_times="recurrence_time_entropy" in measures, theiler=theiler
+    )
+    n, m = recurrence_matrix.shape
+    n_cells = n * m - _theiler_cells(n, m, theiler)
+    return _rqa_measures(d_line_dist, v_line_dist, rr_sum, n_cells, lmin, rt_line_dist, measures)
+
 
 def calc_rqa(
     x: ExtensionArray | np.ndarray,
@@ -10,69 +864,985 @@ def calc_rqa(
     tau: int = 1,
     threshold: float = 0.1,
     lmin: int = 2,
+    *,
+    block_size: t.Optional[int] = None,
+    backend: str = "dense",
+    measures: t.Optional[t.Sequence[str]] = None,
 ) -> list[float]:
     """Calculate Recurrence Quantification Analysis (RQA) statistics for the input series.
 
+    All measures are derived from the line length histograms (and, for
+    "recurrence_time_entropy", the recurrence time histogram) gathered in a
+    single pass over the recurrence matrix.
+
     Args:
-        x (ExtensionArray | np.ndarray): The input series.
-        y (ExtensionArray | np.ndarray): The input series.
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
         dim (int, optional): The embedding dimension. Defaults to 1.
         tau (int, optional): The time delay. Defaults to 1.
         threshold (float, optional): The recurrence threshold. Defaults to 0.1.
         lmin (int, optional): The minimum line length. Defaults to 2.
+        block_size (int | None, optional): If set, the distance and recurrence matrices are
+            computed in tiles of at most block_size x block_size, so the full matrices are never
+            held in memory. Only used by the dense backend. Defaults to None (a single tile).
+        backend (str, optional): "dense" computes the full distance matrix, "sparse" finds only
+            the recurrent points with KD-tree radius queries, which is much cheaper for low
+            recurrence rates. Defaults to "dense".
+        measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES
+            and RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
 
     Returns:
         list[float]: The RQA statistics.
     """
-    embed_data_x: list[np.ndarray] | np.ndarray = []
-    embed_data_y: list[np.ndarray] | np.ndarray = []
-    for i in range(dim):
-        embed_data_x.append(x[i * tau : x.shape[0] - (dim - i - 1) * tau])  # type: ignore
-        embed_data_y.append(y[i * tau : y.shape[0] - (dim - i - 1) * tau])  # type: ignore
-    embed_data_x, embed_data_y = np.array(embed_data_x), np.array(embed_data_y)
-
-    distance_matrix = scipy.spatial.distance_matrix(embed_data_x.T, embed_data_y.T)
-    recurrence_matrix = distance_matrix < threshold
-    msize = recurrence_matrix.shape[0]
-
-    d_line_dist = np.zeros(msize + 1)
-    for i in range(-msize + 1, msize):
-        cline = 0
-        for e in np.diagonal(recurrence_matrix, i):
-            if e:
-                cline += 1
-            else:
-                d_line_dist[cline] += 1
-                cline = 0
-        d_line_dist[cline] += 1
-
-    v_line_dist = np.zeros(msize + 1)
-    for i in range(msize):
-        cline = 0
-        for e in recurrence_matrix[:, i]:
-            if e:
-                cline += 1
+    if backend not in RQA_BACKENDS:
+        msg = f"Invalid backend {backend}, must be one of {RQA_BACKENDS}."
+        raise ValueError(msg)
+    measures = _measure_names(measures)
+    embed_data_x, embed_data_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    shape = (embed_data_x.shape[0], embed_data_y.shape[0])
+
+    if backend == "sparse":
+        return rqa_from_matrix(_sparse_recurrence(embed_data_x, embed_data_y, threshold), lmin, measures=measures)
+
+    block_size = _tile_size(block_size, shape)
+    acc = LineDistAccumulator(shape, recurrence_times="recurrence_time_entropy" in measures)
+    for tile, row, col in _recurrence_tiles(embed_data_x, embed_data_y, threshold, block_size):
+        acc.add(tile, row, col)
+    return _rqa_measures(
+        acc.d_line_dist, acc.v_line_dist, acc.rr_sum, shape[0] * shape[1], lmin, acc.rt_line_dist, measures
+    )
+
+
+def _theiler_cells(n: int, m: int, theiler: int) -> int:
+    """Count the cells of an n x m matrix less than theiler cells from the main diagonal."""
+    lags = np.arange(1 - theiler, theiler)
+    return int(np.maximum(0, np.minimum(n, m - lags) - np.maximum(0, -lags)).sum())
+
+
+def _upper_recurrence_tiles(
+    embed: np.ndarray, threshold: float, block_size: int, theiler: int
+) -> t.Iterator[tuple[np.ndarray, int, int]]:
+    """Yield the tiles of an auto-recurrence matrix on and above the main diagonal.
+
+    Tiles on the main diagonal are computed from the condensed pairwise distances,
+    so only their upper triangle is ever evaluated. Cells closer to the main diagonal
+    than the Theiler window are set to False.
+
+    Args:
+        embed (np.ndarray): The embedded series, one point per row.
+        threshold (float): The recurrence threshold.
+        block_size (int): The maximum number of rows and columns per tile.
+        theiler (int): The Theiler window.
+
+    Yields:
+        tuple[np.ndarray, int, int]: The boolean tile and the row and column of its top left cell.
+    """
+    n = embed.shape[0]
+    for row in range(0, n, block_size):
+        block = embed[row : row + block_size]
+        for col in range(row, n, block_size):
+            if col == row:
+                tile = scipy.spatial.distance.squareform(scipy.spatial.distance.pdist(block) < threshold)
+                np.fill_diagonal(tile, threshold > 0)
             else:
-                v_line_dist[cline] += 1
-                cline = 0
-        v_line_dist[cline] += 1
+                tile = scipy.spatial.distance_matrix(block, embed[col : col + block_size]) < threshold
+            h, w = tile.shape
+            if col - (row + h - 1) < theiler:
+                lag = np.arange(col, col + w)[np.newaxis, :] - np.arange(row, row + h)[:, np.newaxis]
+                tile &= np.abs(lag) >= theiler
+            yield tile, row, col
+
+
+def auto_rqa(
+    x: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    lmin: int = 2,
+    *,
+    theiler: int = 0,
+    block_size: t.Optional[int] = None,
+    backend: str = "dense",
+    measures: t.Optional[t.Sequence[str]] = None,
+) -> list[float]:
+    """Calculate auto-RQA statistics, using the symmetry of the recurrence matrix.
+
+    Only the distances on and above the main diagonal are computed, which halves the
+    work and memory of calc_rqa(x, x, ...) while giving the same statistics.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        lmin (int, optional): The minimum line length. Defaults to 2.
+        theiler (int, optional): The Theiler window. Pairs of points less than theiler
+            samples apart are excluded from the analysis, which removes the trivial
+            recurrences of the main diagonal (theiler=1) and of temporally correlated
+            neighbours (theiler>1). Defaults to 0 (nothing excluded).
+        block_size (int | None, optional): If set, the upper triangle is computed in tiles of
+            at most block_size x block_size. Only used by the dense backend. Defaults to None.
+        backend (str, optional): "dense" or "sparse", see calc_rqa. Defaults to "dense".
+        measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES
+            and RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+
+    Returns:
+        list[float]: The RQA statistics.
+    """
+    if backend not in RQA_BACKENDS:
+        msg = f"Invalid backend {backend}, must be one of {RQA_BACKENDS}."
+        raise ValueError(msg)
+    measures = _measure_names(measures)
+    recurrence_times = "recurrence_time_entropy" in measures
+    if theiler < 0:
+        msg = f"theiler must be a non-negative integer, got {theiler}."
+        raise ValueError(msg)
+    embed_data = delay_embed(x, dim, tau)
+    n = embed_data.shape[0]
+    n_cells = n * n - _theiler_cells(n, n, theiler)
+
+    if backend == "sparse":
+        rm = _sparse_recurrence(embed_data, embed_data, threshold)
+        d_line_dist, v_line_dist, rt_line_dist, rr_sum = _line_dists(
+            rm, recurrence_times=recurrence_times, theiler=theiler
+        )
+        return _rqa_measures(d_line_dist, v_line_dist, rr_sum, n_cells, lmin, rt_line_dist, measures)
+
+    block_size = _tile_size(block_size, (n, n))
+    acc = SymmetricLineDistAccumulator(n, recurrence_times=recurrence_times)
+    for tile, row, col in _upper_recurrence_tiles(embed_data, threshold, block_size, theiler):
+        acc.add(tile, row, col)
+    return _rqa_measures(acc.d_line_dist, acc.v_line_dist, acc.rr_sum, n_cells, lmin, acc.rt_line_dist, measures)
+
+
+def rqa_threshold_sweep(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    thresholds: t.Sequence[float],
+    dim: int = 1,
+    tau: int = 1,
+    lmin: int = 2,
+    *,
+    block_size: t.Optional[int] = None,
+    measures: t.Optional[t.Sequence[str]] = None,
+) -> np.ndarray:
+    """Calculate RQA statistics for several recurrence thresholds at once.
+
+    The series are embedded and every tile of the distance matrix is computed only
+    once, then thresholded at each of the thresholds, which is much cheaper than
+    calling calc_rqa once per threshold.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        thresholds (Sequence[float]): The recurrence thresholds.
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        lmin (int, optional): The minimum line length. Defaults to 2.
+        block_size (int | None, optional): If set, the distance matrix is computed in tiles of at
+            most block_size x block_size. Defaults to None (a single tile).
+        measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES
+            and RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+
+    Returns:
+        np.ndarray: The RQA statistics, one row per threshold with one column per measure.
+    """
+    measures = _measure_names(measures)
+    embed_data_x, embed_data_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    shape = (embed_data_x.shape[0], embed_data_y.shape[0])
+    block_size = _tile_size(block_size, shape)
+    accs = [LineDistAccumulator(shape, recurrence_times="recurrence_time_entropy" in measures) for _ in thresholds]
+    for distances, row, col in _distance_tiles(embed_data_x, embed_data_y, block_size):
+        for threshold, acc in zip(thresholds, accs):
+            acc.add(distances < threshold, row, col)
+    stats = np.empty((len(accs), len(measures)))
+    for i, acc in enumerate(accs):
+        stats[i] = _rqa_measures(
+            acc.d_line_dist, acc.v_line_dist, acc.rr_sum, shape[0] * shape[1], lmin, acc.rt_line_dist, measures
+        )
+    return stats
+
+
+def sliding_window_recurrence(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    window: int = 100,
+    step: int = 10,
+) -> t.Iterator[np.ndarray]:
+    """Calculate the recurrence matrix of every window of the input series, incrementally.
+
+    Both series are embedded once, and consecutive windows reuse the overlapping
+    block of the previous window's recurrence matrix, so only the rows and columns
+    entering the window are computed. Each window's matrix is identical to the one
+    obtained by embedding and thresholding that window on its own.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        window (int, optional): The window size. Defaults to 100.
+        step (int, optional): The step size. Defaults to 10.
+
+    Yields:
+        np.ndarray: The boolean recurrence matrix of each window.
+    """
+    size = window - (dim - 1) * tau
+    if size < 1:
+        msg = f"Window of {window} samples is too short to embed with dim={dim} and tau={tau}."
+        raise ValueError(msg)
+    embed_data_x, embed_data_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    keep = size - step
+    rm: t.Optional[np.ndarray] = None
+    for w in range(0, x.shape[0] - window + 1, step):
+        if rm is None or keep <= 0:
+            rm = scipy.spatial.distance_matrix(embed_data_x[w : w + size], embed_data_y[w : w + size]) < threshold
+        else:
+            new_rm = np.empty_like(rm)
+            new_rm[:keep, :keep] = rm[step:, step:]
+            new_rm[keep:, :] = (
+                scipy.spatial.distance_matrix(embed_data_x[w + keep : w + size], embed_data_y[w : w + size]) < threshold
+            )
+            new_rm[:keep, keep:] = (
+                scipy.spatial.distance_matrix(embed_data_x[w : w + keep], embed_data_y[w + keep : w + size]) < threshold
+            )
+            rm = new_rm
+        yield rm
+
+
+def _windowed_rqa_chunk(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int,
+    tau: int,
+    threshold: float,
+    lmin: int,
+    window: int,
+    step: int,
+    block_size: t.Optional[int],
+    backend: str,
+    return_matrix: bool,  # noqa: FBT001
+    measures: tuple[str, ...],
+    neighbours: t.Optional[int] = None,
+    workers: int = 1,
+) -> tuple[np.ndarray, list[t.Any]]:
+    """Calculate the RQA statistics of consecutive windows. Top-level function for joblib workers."""
+    starts = range(0, x.shape[0] - window + 1, step)
+    stats = np.empty((len(starts), len(measures)))
+    matrices: list[t.Any] = []
+    if neighbours is not None:
+        embed_data_x, embed_data_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+        size = window - (dim - 1) * tau
+        for i, w in enumerate(starts):
+            rm = _fan_recurrence(embed_data_x[w : w + size], embed_data_y[w : w + size], neighbours, 0, workers)
+            stats[i] = rqa_from_matrix(rm, lmin, measures=measures)
+            if return_matrix:
+                matrices.append(rm)
+        return stats, matrices
+    if backend == "dense" and block_size is None:
+        for i, rm in enumerate(sliding_window_recurrence(x, y, dim, tau, threshold, window, step)):
+            stats[i] = rqa_from_matrix(rm, lmin, measures=measures)
+            if return_matrix:
+                matrices.append(PackedRecurrenceMatrix.from_dense(rm))
+        return stats, matrices
+    # embed once, the points of each window are a view into the full embedding
+    embed_data_x, embed_data_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    size = window - (dim - 1) * tau
+    if backend == "banded":
+        band = _banded_recurrence(embed_data_x, embed_data_y, threshold, size)
+        for i, w in enumerate(starts):
+            rm = band.block(w, size)
+            stats[i] = rqa_from_matrix(rm, lmin, measures=measures)
+            if return_matrix:
+                matrices.append(PackedRecurrenceMatrix.from_dense(rm))
+        return stats, matrices
+    for i, w in enumerate(starts):
+        ex, ey = embed_data_x[w : w + size], embed_data_y[w : w + size]
+        if return_matrix:
+            rm = recurrence_matrix(ex, ey, threshold=threshold, block_size=block_size, backend=backend)
+            stats[i] = rqa_from_matrix(rm, lmin, measures=measures)
+            matrices.append(rm)
+        else:
+            stats[i] = calc_rqa(
+                ex, ey, threshold=threshold, lmin=lmin, block_size=block_size, backend=backend, measures=measures
+            )
+    return stats, matrices
+
+
+def windowed_rqa(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    lmin: int = 2,
+    window: int = 100,
+    step: int = 10,
+    *,
+    block_size: t.Optional[int] = None,
+    backend: str = "dense",
+    n_jobs: t.Optional[int] = None,
+    return_matrix: bool = False,
+    measures: t.Optional[t.Sequence[str]] = None,
+    neighbours: t.Optional[int] = None,
+    workers: int = 1,
+) -> t.Union[np.ndarray, tuple[np.ndarray, list[t.Any]]]:
+    """Calculate RQA statistics between two input series in a moving window.
+
+    The windows are split into contiguous chunks, one per worker, so each worker
+    can still reuse the overlap between its consecutive windows. Results are
+    written into a single preallocated array.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        lmin (int, optional): The minimum line length. Defaults to 2.
+        window (int, optional): The window size. Defaults to 100.
+        step (int, optional): The step size. Defaults to 10.
+        block_size (int | None, optional): The tile size for the dense backend. Defaults to None.
+        backend (str, optional): "dense", "sparse" or "banded" (the recurrence band of width
+            window around the main diagonal is computed once, in O(N * window) memory, and every
+            window's matrix is a view into it). Defaults to "dense".
+        n_jobs (int | None, optional): The number of joblib workers, following the joblib
+            convention (-1 uses all CPUs). Defaults to None (serial).
+        return_matrix (bool, optional): Also return the recurrence matrix of every window.
+            Defaults to False.
+        measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES
+            and RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+        neighbours (int | None, optional): If set, use a fixed amount of neighbours (FAN) recurrence
+            matrix within every window instead of threshold (see fan_recurrence_matrix); block_size
+            and backend are then ignored. Defaults to None.
+        workers (int, optional): The number of threads for the FAN KD-tree queries. Defaults to 1.
+
+    Returns:
+        np.ndarray | tuple[np.ndarray, list]: The RQA statistics, one row per window with one
+            column per measure, and the recurrence matrices if return_matrix is True.
+    """
+    if backend not in WINDOWED_RQA_BACKENDS:
+        msg = f"Invalid backend {backend}, must be one of {WINDOWED_RQA_BACKENDS}."
+        raise ValueError(msg)
+    if window - (dim - 1) * tau < 1:
+        msg = f"Window of {window} samples is too short to embed with dim={dim} and tau={tau}."
+        raise ValueError(msg)
+    measures = _measure_names(measures)
+    starts = np.arange(0, x.shape[0] - window + 1, step)
+    stats = np.empty((starts.shape[0], len(measures)))
+    matrices: list[t.Any] = []
+    n_chunks = min(effective_n_jobs(n_jobs), starts.shape[0])
+    if n_chunks <= 1:
+        stats[:], matrices = _windowed_rqa_chunk(
+            x,
+            y,
+            dim,
+            tau,
+            threshold,
+            lmin,
+            window,
+            step,
+            block_size,
+            backend,
+            return_matrix,
+            measures,
+            neighbours,
+            workers,
+        )
+    else:
+        chunks = [c for c in np.array_split(np.arange(starts.shape[0]), n_chunks) if c.shape[0] > 0]
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_windowed_rqa_chunk)(
+                x[starts[c[0]] : starts[c[-1]] + window],
+                y[starts[c[0]] : starts[c[-1]] + window],
+                dim,
+                tau,
+                threshold,
+                lmin,
+                window,
+                step,
+                block_size,
+                backend,
+                return_matrix,
+                measures,
+                neighbours,
+                workers,
+            )
+            for c in chunks
+        )
+        for c, (chunk_stats, chunk_matrices) in zip(chunks, results):
+            stats[c[0] : c[-1] + 1] = chunk_stats
+            matrices.extend(chunk_matrices)
+    if return_matrix:
+        return stats, matrices
+    return stats
+
+
+def _pairwise_rqa_chunk(
+    x: np.ndarray,
+    y: np.ndarray,
+    pairs: np.ndarray,
+    dim: int,
+    tau: int,
+    threshold: float,
+    lmin: int,
+    block_size: t.Optional[int],
+    backend: str,
+    measures: tuple[str, ...],
+) -> np.ndarray:
+    """Calculate the RQA statistics of a list of column pairs. Top-level function for joblib workers."""
+    # every column is embedded (as a view) once, however many pairs it takes part in
+    embed_x = {i: delay_embed(x[:, i], dim, tau) for i in np.unique(pairs[:, 0])}
+    embed_y = {j: delay_embed(y[:, j], dim, tau) for j in np.unique(pairs[:, 1])}
+    stats = np.empty((pairs.shape[0], len(measures)))
+    for k, (i, j) in enumerate(pairs):
+        stats[k] = calc_rqa(
+            embed_x[i],
+            embed_y[j],
+            threshold=threshold,
+            lmin=lmin,
+            block_size=block_size,
+            backend=backend,
+            measures=measures,
+        )
+    return stats
+
+
+def pairwise_rqa(
+    x: np.ndarray,
+    y: t.Optional[np.ndarray] = None,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    lmin: int = 2,
+    *,
+    block_size: t.Optional[int] = None,
+    backend: str = "dense",
+    n_jobs: t.Optional[int] = None,
+    measures: t.Optional[t.Sequence[str]] = None,
+) -> np.ndarray:
+    """Calculate cross-RQA statistics between every column of x and every column of y.
+
+    Each column is embedded once per worker rather than once per pair, and the pairs
+    are split into contiguous chunks, one per joblib worker (processes by default).
+
+    Args:
+        x (np.ndarray): The first set of series, one series per column.
+        y (np.ndarray | None, optional): The second set of series, one series per column, with
+            as many rows as x. Defaults to None (all pairs of columns of x).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        lmin (int, optional): The minimum line length. Defaults to 2.
+        block_size (int | None, optional): The tile size for the dense backend. Defaults to None.
+        backend (str, optional): "dense" or "sparse". Defaults to "dense".
+        n_jobs (int | None, optional): The number of joblib workers, following the joblib
+            convention (-1 uses all CPUs). Defaults to None (serial).
+        measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES
+            and RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+
+    Returns:
+        np.ndarray: The RQA statistics, of shape (x columns, y columns, measures).
+    """
+    if backend not in RQA_BACKENDS:
+        msg = f"Invalid backend {backend}, must be one of {RQA_BACKENDS}."
+        raise ValueError(msg)
+    measures = _measure_names(measures)
+    x = np.asarray(x)
+    y = x if y is None else np.asarray(y)
+    if x.ndim != 2 or y.ndim != 2 or x.shape[0] != y.shape[0]:  # noqa: PLR2004
+        msg = f"x and y must be 2D arrays with the same number of rows, got shapes {x.shape} and {y.shape}."
+        raise ValueError(msg)
+    n_x, n_y = x.shape[1], y.shape[1]
+    pairs = np.stack(np.unravel_index(np.arange(n_x * n_y), (n_x, n_y)), axis=1)
+    stats = np.empty((pairs.shape[0], len(measures)))
+    n_chunks = min(effective_n_jobs(n_jobs), pairs.shape[0])
+    if n_chunks <= 1:
+        stats[:] = _pairwise_rqa_chunk(x, y, pairs, dim, tau, threshold, lmin, block_size, backend, measures)
+    else:
+        chunks = [c for c in np.array_split(np.arange(pairs.shape[0]), n_chunks) if c.shape[0] > 0]
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_pairwise_rqa_chunk)(x, y, pairs[c], dim, tau, threshold, lmin, block_size, backend, measures)
+            for c in chunks
+        )
+        for c, chunk_stats in zip(chunks, results):
+            stats[c] = chunk_stats
+    return stats.reshape(n_x, n_y, len(measures))
+
+
+def _band_tiles(
+    embed_x: np.ndarray, embed_y: np.ndarray, threshold: float, min_lag: int, max_lag: int
+) -> t.Iterator[tuple[np.ndarray, int]]:
+    """Compute the diagonals min_lag to max_lag of the recurrence matrix, a block of rows at a time.
+
+    Cell (i, k) of a tile holds the recurrence of row i with column i + min_lag + k, so the
+    tile columns are the diagonals (np.diagonal offsets) of the recurrence matrix. Cells
+    falling outside the matrix are False.
+
+    Args:
+        embed_x (np.ndarray): The embedded x series, one point per row.
+        embed_y (np.ndarray): The embedded y series, one point per row.
+        threshold (float): The recurrence threshold.
+        min_lag (int): The first diagonal.
+        max_lag (int): The last diagonal.
+
+    Yields:
+        tuple[np.ndarray, int]: The boolean tile, of shape (rows, max_lag - min_lag + 1), and the
+            index of its first row.
+    """
+    n, m = embed_x.shape[0], embed_y.shape[0]
+    n_lags = max_lag - min_lag + 1
+    # pad y with NaN points, which are never recurrent, so every row sees a full window of columns
+    before, after = max(0, -min_lag), max(0, n + max_lag - m)
+    padded = np.full((before + m + after, embed_y.shape[1]), np.nan)
+    padded[before : before + m] = embed_y
+    windows = sliding_window_view(padded, n_lags, axis=0)
+    offset = min_lag + before
+    block_rows = max(1, (1 << 22) // (n_lags * embed_y.shape[1]))
+    for row in range(0, n, block_rows):
+        block_x = embed_x[row : row + block_rows]
+        block_y = windows[row + offset : row + offset + block_x.shape[0]]
+        with np.errstate(invalid="ignore"):
+            distances = np.sqrt(np.square(block_y - block_x[:, :, np.newaxis]).sum(axis=1))
+            yield distances < threshold, row
+
+
+def _banded_recurrence(
+    embed_x: np.ndarray, embed_y: np.ndarray, threshold: float, width: int
+) -> BandedRecurrenceMatrix:
+    """Compute the recurrence band of the given half-width from embedded series."""
+    band = np.empty((embed_x.shape[0], 2 * width - 1), dtype=bool)
+    for tile, row in _band_tiles(embed_x, embed_y, threshold, 1 - width, width - 1):
+        band[row : row + tile.shape[0]] = tile
+    return BandedRecurrenceMatrix(band, (embed_x.shape[0], embed_y.shape[0]), width)
+
+
+def banded_recurrence_matrix(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    width: int = 100,
+) -> BandedRecurrenceMatrix:
+    """Calculate the recurrence matrix within width - 1 cells of the main diagonal.
 
-    rr_sum = recurrence_matrix.sum()
-    rr = rr_sum / msize**2
-    det = (d_line_dist[lmin:] * np.arange(msize + 1)[lmin:]).sum() / rr_sum if rr_sum > 0 else 0
-    lam = (v_line_dist[lmin:] * np.arange(msize + 1)[lmin:]).sum() / rr_sum if rr_sum > 0 else 0
+    Only the 2 * width - 1 diagonals of the band are computed, in O(N * width) time
+    and memory, so the square blocks along the main diagonal (e.g. the recurrence
+    matrices of moving windows of up to width points) are all available from one pass.
 
-    d_sum = d_line_dist[lmin:].sum()
-    avg_diag_length = (d_line_dist[lmin:] * np.arange(msize + 1)[lmin:]).sum() / d_sum if d_sum > 0 else 0
-    v_sum = d_line_dist[lmin:].sum()
-    avg_vert_length = (v_line_dist[lmin:] * np.arange(msize + 1)[lmin:]).sum() / v_sum if v_sum > 0 else 0
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        width (int, optional): The half-width of the band, including the main diagonal. Defaults to 100.
+
+    Returns:
+        BandedRecurrenceMatrix: The banded recurrence matrix.
+    """
+    if width < 1:
+        msg = f"width must be a positive integer, got {width}."
+        raise ValueError(msg)
+    return _banded_recurrence(delay_embed(x, dim, tau), delay_embed(y, dim, tau), threshold, width)
+
+
+def cross_recurrence_profile(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    max_lag: int = 100,
+) -> np.ndarray:
+    """Calculate the recurrence rate of every diagonal of the cross-recurrence matrix within a lag band.
+
+    Lag k compares x at time t with y at time t + k (diagonal k of the recurrence matrix,
+    following the np.diagonal offset convention), so a peak at a positive lag means that
+    y follows x. Only the 2 * max_lag + 1 diagonals in the band are computed, never the
+    full matrix.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        max_lag (int, optional): The largest lag, in either direction. Defaults to 100.
+
+    Returns:
+        np.ndarray: The recurrence rate of lags -max_lag to max_lag, NaN for lags beyond the
+            end of the series.
+    """
+    if max_lag < 0:
+        msg = f"max_lag must be non-negative, got {max_lag}."
+        raise ValueError(msg)
+    embed_x, embed_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    counts = np.zeros(2 * max_lag + 1, dtype=np.int64)
+    for tile, _ in _band_tiles(embed_x, embed_y, threshold, -max_lag, max_lag):
+        counts += tile.sum(axis=0)
+    lags = np.arange(-max_lag, max_lag + 1)
+    lengths = np.minimum(embed_x.shape[0], embed_y.shape[0] - lags) - np.maximum(0, -lags)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(lengths > 0, counts / np.maximum(lengths, 1), np.nan)
+
+
+def _surrogate_rqa_chunk(
+    embed_x: np.ndarray,
+    y: np.ndarray,
+    shifts: t.Optional[np.ndarray],
+    dim: int,
+    tau: int,
+    threshold: float,
+    lmin: int,
+    block_size: t.Optional[int],
+    backend: str,
+    measures: tuple[str, ...],
+) -> np.ndarray:
+    """Calculate the RQA statistics against a chunk of surrogates. Top-level function for joblib workers.
+
+    y holds one surrogate series per row, or, for time-shift surrogates, the embedding of the
+    series wrapped around its end, from which every shifted embedding is gathered by row.
+    """
+    n_surrogates = y.shape[0] if shifts is None else shifts.shape[0]
+    stats = np.empty((n_surrogates, len(measures)))
+    for k in range(n_surrogates):
+        if shifts is None:
+            embed_y = delay_embed(y[k], dim, tau)
+        else:
+            embed_y = y[(np.arange(embed_x.shape[0]) + shifts[k]) % y.shape[0]]
+        stats[k] = calc_rqa(
+            embed_x, embed_y, threshold=threshold, lmin=lmin, block_size=block_size, backend=backend, measures=measures
+        )
+    return stats
+
+
+def rqa_surrogate_test(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    lmin: int = 2,
+    *,
+    method: str = "shuffle",
+    n_surrogates: int = 99,
+    seed: t.Optional[int] = None,
+    min_shift: t.Optional[int] = None,
+    block_size: t.Optional[int] = None,
+    backend: str = "dense",
+    n_jobs: t.Optional[int] = None,
+    measures: t.Optional[t.Sequence[str]] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Calculate cross-RQA statistics against surrogates of y, as a null distribution.
+
+    All surrogates are generated up front from a single seeded generator, so the null
+    distribution does not depend on n_jobs. The embedding of x is computed once and
+    shared by every surrogate, and time-shift surrogates of y are gathered from a single
+    wrapped-around embedding of y rather than embedded one by one.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The first input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The second input series, which is replaced by its surrogates.
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        lmin (int, optional): The minimum line length. Defaults to 2.
+        method (str, optional): The surrogates, "shuffle", "iaaft" or "time_shift" (see
+            mopipe.core.analysis.surrogates). Defaults to "shuffle".
+        n_surrogates (int, optional): The number of surrogates. Defaults to 99.
+        seed (int | None, optional): The seed of the random number generator. Defaults to None.
+        min_shift (int | None, optional): The smallest shift of time-shift surrogates. Defaults
+            to None (a tenth of the series).
+        block_size (int | None, optional): The tile size for the dense backend. Defaults to None.
+        backend (str, optional): "dense" or "sparse". Defaults to "dense".
+        n_jobs (int | None, optional): The number of joblib workers, following the joblib
+            convention (-1 uses all CPUs). Defaults to None (serial).
+        measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES
+            and RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The statistics of the original series, one per measure, and
+            the null distribution, one row per surrogate.
+    """
+    if backend not in RQA_BACKENDS:
+        msg = f"Invalid backend {backend}, must be one of {RQA_BACKENDS}."
+        raise ValueError(msg)
+    if method not in SURROGATE_METHODS:
+        msg = f"Invalid surrogate method {method}, must be one of {SURROGATE_METHODS}."
+        raise ValueError(msg)
+    measures = _measure_names(measures)
+    y = np.asarray(y, dtype=float)
+    embed_x, embed_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    observed = np.asarray(
+        calc_rqa(
+            embed_x, embed_y, threshold=threshold, lmin=lmin, block_size=block_size, backend=backend, measures=measures
+        )
+    )
+
+    rng = np.random.default_rng(seed)
+    shifts: t.Optional[np.ndarray] = None
+    if method == "time_shift":
+        shifts = time_shift_shifts(y.shape[0], n_surrogates, rng, min_shift)
+        # row r of this embedding starts at sample r and wraps around the end of y
+        source = delay_embed(np.concatenate((y, y[: (dim - 1) * tau])), dim, tau)
+    elif method == "iaaft":
+        source = iaaft_surrogates(y, n_surrogates, rng)
+    else:
+        source = shuffle_surrogates(y, n_surrogates, rng)
+
+    null = np.empty((n_surrogates, len(measures)))
+    n_chunks = min(effective_n_jobs(n_jobs), n_surrogates)
+    if n_chunks <= 1:
+        null[:] = _surrogate_rqa_chunk(
+            embed_x, source, shifts, dim, tau, threshold, lmin, block_size, backend, measures
+        )
+    else:
+        chunks = [c for c in np.array_split(np.arange(n_surrogates), n_chunks) if c.shape[0] > 0]
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_surrogate_rqa_chunk)(
+                embed_x,
+                source if shifts is not None else source[c],
+                shifts[c] if shifts is not None else None,
+                dim,
+                tau,
+                threshold,
+                lmin,
+                block_size,
+                backend,
+                measures,
+            )
+            for c in chunks
+        )
+        for c, chunk_stats in zip(chunks, results):
+            null[c] = chunk_stats
+    return observed, null
+
+
+def surrogate_p_values(observed: np.ndarray, null: np.ndarray, alternative: str = "two-sided") -> np.ndarray:
+    """Calculate rank-based p-values of statistics against their surrogate null distributions.
+
+    The p-value of a one-sided test is (1 + number of surrogates at least as extreme) /
+    (1 + number of surrogates), so it is never 0. NaN surrogate values are ignored.
+
+    Args:
+        observed (np.ndarray): The statistics of the original series, one per measure.
+        null (np.ndarray): The null distribution, one row per surrogate.
+        alternative (str, optional): "greater", "less" or "two-sided" (twice the smaller
+            one-sided p-value). Defaults to "two-sided".
+
+    Returns:
+        np.ndarray: The p-value of every measure.
+    """
+    valid = ~np.isnan(null)
+    n = valid.sum(axis=0)
+    greater = (1 + ((null >= observed) & valid).sum(axis=0)) / (1 + n)
+    less = (1 + ((null <= observed) & valid).sum(axis=0)) / (1 + n)
+    if alternative == "greater":
+        return greater
+    if alternative == "less":
+        return less
+    if alternative == "two-sided":
+        return np.minimum(1.0, 2 * np.minimum(greater, less))
+    msg = f"Invalid alternative {alternative}, must be one of ('greater', 'less', 'two-sided')."
+    raise ValueError(msg)
 
-    d_probs = d_line_dist[lmin:][d_line_dist[lmin:] > 0]
-    d_probs /= d_probs.sum()
-    d_entropy = -(d_probs * np.log(d_probs)).sum()
 
-    v_probs = v_line_dist[lmin:][v_line_dist[lmin:] > 0]
-    v_probs /= v_probs.sum()
-    v_entropy = -(v_probs * np.log(v_probs)).sum()
+def _wilson_interval(successes: int, trials: int, z: float) -> tuple[float, float, float]:
+    """Estimate a proportion and its Wilson score interval."""
+    if trials == 0:
+        return np.nan, np.nan, np.nan
+    p = successes / trials
+    scale = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / scale
+    half = z / scale * np.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+    return p, max(0.0, centre - half), min(1.0, centre + half)
 
-    return [rr, det, lam, avg_diag_length, avg_vert_length, d_entropy, v_entropy]
+
+def approximate_rqa(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    threshold: float = 0.1,
+    lmin: int = 2,
+    *,
+    n_samples: int = 10000,
+    confidence: float = 0.95,
+    theiler: int = 0,
+    seed: t.Optional[int] = None,
+) -> np.ndarray:
+    """Estimate the recurrence rate, determinism and laminarity from randomly sampled cells.
+
+    A cell is part of a diagonal (vertical) line of at least lmin points if and only if
+    lmin consecutive cells of its diagonal (column) around it are recurrent, so every
+    sampled cell only needs the 2 * lmin - 1 cells around it along the diagonal and the
+    column. The cost depends on n_samples, not on the length of the series. The
+    recurrence rate is the fraction of recurrent samples, and determinism and laminarity
+    are the fractions of recurrent samples lying on lines, each with a Wilson score
+    confidence interval.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+        lmin (int, optional): The minimum line length. Defaults to 2.
+        n_samples (int, optional): The number of sampled cells. Defaults to 10000.
+        confidence (float, optional): The confidence level of the intervals. Defaults to 0.95.
+        theiler (int, optional): Treat cells less than theiler cells from the main diagonal as
+            not recurrent and never sample them, as in auto_rqa. Defaults to 0.
+        seed (int | None, optional): The seed of the random number generator. Defaults to None.
+
+    Returns:
+        np.ndarray: One row per measure in APPROXIMATE_RQA_MEASURES, with the estimate and the
+            lower and upper bounds of its confidence interval.
+    """
+    if not 0 < confidence < 1:
+        msg = f"confidence must be between 0 and 1, got {confidence}."
+        raise ValueError(msg)
+    if n_samples < 1 or theiler < 0:
+        msg = f"n_samples must be positive and theiler non-negative, got {n_samples} and {theiler}."
+        raise ValueError(msg)
+    embed_x, embed_y = delay_embed(x, dim, tau), delay_embed(y, dim, tau)
+    n, m = embed_x.shape[0], embed_y.shape[0]
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, max(n, 1), size=n_samples)
+    cols = rng.integers(0, max(m, 1), size=n_samples)
+    if theiler > 0:
+        # resample the cells that fall in the Theiler window
+        inside = np.abs(rows - cols) < theiler
+        allowed = n * m - _theiler_cells(n, m, theiler)
+        while np.any(inside) and allowed > 0:
+            rows[inside] = rng.integers(0, n, size=inside.sum())
+            cols[inside] = rng.integers(0, m, size=inside.sum())
+            inside = np.abs(rows - cols) < theiler
+        if allowed <= 0:
+            n_samples = 0
+    if n == 0 or m == 0:
+        n_samples = 0
+    rows, cols = rows[:n_samples], cols[:n_samples]
+
+    offsets = np.arange(1 - lmin, lmin)
+
+    def recurrent(i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        valid = (i >= 0) & (i < n) & (j >= 0) & (j < m) & (np.abs(i - j) >= theiler)
+        i, j = np.clip(i, 0, n - 1), np.clip(j, 0, m - 1)
+        distances = np.sqrt(np.square(embed_x[i] - embed_y[j]).sum(axis=-1))
+        return valid & (distances < threshold)
+
+    def on_line(cells: np.ndarray) -> np.ndarray:
+        return sliding_window_view(cells, lmin, axis=1).all(axis=2).any(axis=1)
+
+    centre = recurrent(rows, cols)
+    diagonal = recurrent(rows[centre, np.newaxis] + offsets, cols[centre, np.newaxis] + offsets)
+    vertical = recurrent(rows[centre, np.newaxis] + offsets, cols[centre, np.newaxis] + 0 * offsets)
+    n_recurrent = int(centre.sum())
+    z = float(scipy.stats.norm.ppf(0.5 + confidence / 2))
+    return np.array(
+        [
+            _wilson_interval(n_recurrent, n_samples, z),
+            _wilson_interval(int(on_line(diagonal).sum()), n_recurrent, z),
+            _wilson_interval(int(on_line(vertical).sum()), n_recurrent, z),
+        ]
+    )
+
+
+def _fan_recurrence(embed_x: np.ndarray, embed_y: np.ndarray, neighbours: int, theiler: int, workers: int) -> t.Any:
+    """Find the neighbours nearest neighbours of every x point among the y points, outside the Theiler window."""
+    n, m = embed_x.shape[0], embed_y.shape[0]
+    if neighbours < 1:
+        msg = f"neighbours must be a positive integer, got {neighbours}."
+        raise ValueError(msg)
+    if n == 0 or m == 0:
+        return scipy.sparse.coo_matrix((n, m), dtype=bool)
+    # at most 2 * theiler - 1 of the nearest points can fall in the Theiler window
+    k = min(m, neighbours + max(0, 2 * theiler - 1))
+    _, idx = scipy.spatial.cKDTree(embed_y).query(embed_x, k=k, workers=workers)
+    idx = idx.reshape(n, k)
+    rows = np.broadcast_to(np.arange(n)[:, np.newaxis], idx.shape)
+    keep = np.abs(idx - rows) >= theiler
+    keep &= np.cumsum(keep, axis=1) <= neighbours
+    return scipy.sparse.coo_matrix((np.ones(int(keep.sum()), dtype=bool), (rows[keep], idx[keep])), shape=(n, m))
+
+
+def fan_recurrence_matrix(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    neighbours: int = 10,
+    *,
+    theiler: int = 0,
+    workers: int = 1,
+) -> t.Any:
+    """Calculate a fixed amount of neighbours (FAN) recurrence matrix.
+
+    Instead of a fixed distance threshold, the neighbours nearest y points of every x
+    point are recurrent, so every row holds the same number of recurrent points whatever
+    the local density or amplitude of the series. The matrix is not symmetric, even for
+    auto-recurrence, and the line statistics treat it as a general (cross-)recurrence
+    matrix. Nearest neighbours are found with a single batched KD-tree query.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        neighbours (int, optional): The number of recurrent points per row. Defaults to 10.
+        theiler (int, optional): Only count neighbours at least theiler samples apart, e.g.
+            theiler=1 excludes every point being its own nearest neighbour in auto-recurrence.
+            Defaults to 0.
+        workers (int, optional): The number of threads for the KD-tree query, -1 uses all CPUs.
+            Defaults to 1.
+
+    Returns:
+        scipy.sparse.coo_matrix: The boolean recurrence matrix.
+    """
+    return _fan_recurrence(delay_embed(x, dim, tau), delay_embed(y, dim, tau), neighbours, theiler, workers)
+
+
+def fan_rqa(
+    x: ExtensionArray | np.ndarray,
+    y: ExtensionArray | np.ndarray,
+    dim: int = 1,
+    tau: int = 1,
+    neighbours: int = 10,
+    lmin: int = 2,
+    *,
+    theiler: int = 0,
+    workers: int = 1,
+    measures: t.Optional[t.Sequence[str]] = None,
+) -> list[float]:
+    """Calculate RQA statistics from a fixed amount of neighbours (FAN) recurrence matrix.
+
+    See fan_recurrence_matrix. The recurrence rate is fixed by neighbours, and is relative
+    to the cells outside the Theiler window.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        y (ExtensionArray | np.ndarray): The input series, or a 2D array of points (see delay_embed).
+        dim (int, optional): The embedding dimension. Defaults to 1.
+        tau (int, optional): The time delay. Defaults to 1.
+        neighbours (int, optional): The number of recurrent points per row. Defaults to 10.
+        lmin (int, optional): The minimum line length. Defaults to 2.
+        theiler (int, optional): Only count neighbours at least theiler samples apart. Defaults to 0.
+        workers (int, optional): The number of threads for the KD-tree query. Defaults to 1.
+        measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES
+            and RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+
+    Returns:
+        list[float]: The RQA statistics.
+    """
+    measures = _measure_names(measures)
+    if theiler < 0:
+        msg = f"theiler must be a non-negative integer, got {theiler}."
+        raise ValueError(msg)
+    rm = fan_recurrence_matrix(x, y, dim, tau, neighbours, theiler=theiler, workers=workers)
+    return rqa_from_matrix(rm, lmin, theiler=theiler, measures=measures)
@@ -0,0 +1,145 @@
+"""surrogates.py
+
+This module contains surrogate series generators, which preserve some properties of
+a series while destroying others, for testing the significance of nonlinear analyses.
+All generators produce every surrogate at once, one surrogate per row.
+"""
+
+import typing as t
+
+import numpy as np
+from pandas.api.extensions import ExtensionArray
+
+SURROGATE_METHODS = ("shuffle", "iaaft", "time_shift")
+
+
+def _as_series(x: ExtensionArray | np.ndarray) -> np.ndarray:
+    """Validate a 1D input series."""
+    data = np.asarray(x, dtype=float)
+    if data.ndim != 1 or data.shape[0] < 2:  # noqa: PLR2004
+        msg = f"Surrogates need a 1D series of at least 2 samples, got shape {data.shape}."
+        raise ValueError(msg)
+    return data
+
+
+def shuffle_surrogates(x: ExtensionArray | np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Generate surrogates by randomly permuting the samples of a series.
+
+    This keeps the amplitude distribution and destroys all temporal structure.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series.
+        n (int): The number of surrogates.
+        rng (np.random.Generator): The random number generator.
+
+    Returns:
+        np.ndarray: The surrogates, of shape (n, len(x)).
+    """
+    data = _as_series(x)
+    return rng.permuted(np.broadcast_to(data, (n, data.shape[0])), axis=1)
+
+
+def time_shift_shifts(length: int, n: int, rng: np.random.Generator, min_shift: t.Optional[int] = None) -> np.ndarray:
+    """Draw the circular shifts of time-shift surrogates.
+
+    Args:
+        length (int): The length of the series.
+        n (int): The number of surrogates.
+        rng (np.random.Generator): The random number generator.
+        min_shift (int | None, optional): The smallest shift in either direction. Defaults to None
+            (a tenth of the series).
+
+    Returns:
+        np.ndarray: The shifts, between min_shift and length - min_shift.
+    """
+    if min_shift is None:
+        min_shift = max(1, length // 10)
+    if min_shift < 1 or 2 * min_shift > length:
+        msg = f"min_shift must be between 1 and half the series length ({length}), got {min_shift}."
+        raise ValueError(msg)
+    return rng.integers(min_shift, length - min_shift, size=n, endpoint=True)
+
+
+def time_shift_surrogates(
+    x: ExtensionArray | np.ndarray, n: int, rng: np.random.Generator, min_shift: t.Optional[int] = None
+) -> np.ndarray:
+    """Generate surrogates by circularly shifting a series in time.
+
+    This keeps the whole series intact and only destroys its alignment with other
+    series, which makes it the usual null model for cross-recurrence.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series.
+        n (int): The number of surrogates.
+        rng (np.random.Generator): The random number generator.
+        min_shift (int | None, optional): The smallest shift in either direction. Defaults to None
+            (a tenth of the series).
+
+    Returns:
+        np.ndarray: The surrogates, of shape (n, len(x)). Row k is np.roll(x, -shift_k).
+    """
+    data = _as_series(x)
+    shifts = time_shift_shifts(data.shape[0], n, rng, min_shift)
+    return data[(np.arange(data.shape[0]) + shifts[:, np.newaxis]) % data.shape[0]]
+
+
+def iaaft_surrogates(
+    x: ExtensionArray | np.ndarray, n: int, rng: np.random.Generator, max_iter: int = 100
+) -> np.ndarray:
+    """Generate iterative amplitude adjusted Fourier transform (IAAFT) surrogates.
+
+    Starting from shuffled copies, the surrogates alternately get the power spectrum and
+    the amplitude distribution of the series (Schreiber & Schmitz, 1996). This keeps the
+    linear autocorrelation and the amplitude distribution and destroys nonlinear structure.
+    All surrogates are iterated together, until none of their ranks change.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series.
+        n (int): The number of surrogates.
+        rng (np.random.Generator): The random number generator.
+        max_iter (int, optional): The maximum number of iterations. Defaults to 100.
+
+    Returns:
+        np.ndarray: The surrogates, of shape (n, len(x)), each a permutation of x.
+    """
+    data = _as_series(x)
+    length = data.shape[0]
+    amplitudes = np.abs(np.fft.rfft(data))
+    sorted_data = np.sort(data)
+    out = shuffle_surrogates(data, n, rng)
+    ranks = np.argsort(out, axis=1)
+    for _ in range(max_iter):
+        spectrum = np.fft.rfft(out, axis=1)
+        phases = spectrum / np.maximum(np.abs(spectrum), np.finfo(float).tiny)
+        adjusted = np.fft.irfft(amplitudes * phases, n=length, axis=1)
+        new_ranks = np.argsort(adjusted, axis=1)
+        np.put_along_axis(out, new_ranks, sorted_data, axis=1)
+        if np.array_equal(new_ranks, ranks):
+            break
+        ranks = new_ranks
+    return out
+
+
+def surrogates(
+    x: ExtensionArray | np.ndarray, n: int, method: str = "shuffle", seed: t.Optional[int] = None
+) -> np.ndarray:
+    """Generate surrogates of a series.
+
+    Args:
+        x (ExtensionArray | np.ndarray): The input series.
+        n (int): The number of surrogates.
+        method (str, optional): "shuffle", "iaaft" or "time_shift". Defaults to "shuffle".
+        seed (int | None, optional): The seed of the random number generator. Defaults to None.
+
+    Returns:
+        np.ndarray: The surrogates, of shape (n, len(x)).
+    """
+    rng = np.random.default_rng(seed)
+    if method == "shuffle":
+        return shuffle_surrogates(x, n, rng)
+    if method == "iaaft":
+        return iaaft_surrogates(x, n, rng)
+    if method == "time_shift":
+        return time_shift_surrogates(x, n, rng)
+    msg = f"Invalid surrogate method {method}, must be one of {SURROGATE_METHODS}."
+    raise ValueError(msg)
@@ -1,3 +1,4 @@
 from .datastructs import DataLevel  # noqa: F401, TID252, I001
 from .datastructs import MocapMetadataEntries  # noqa: F401, TID252
+from .datastructs import SharedAttr  # noqa: F401, TID252
 from .util import maybe_generate_id  # noqa: F401, TID252
@@ -4,6 +4,7 @@ This module contains the data structures used by the mopipe package.
 """
 
 import sys
+import typing as t
 
 # Python 3.11 has built-in StrEnum
 if sys.version_info >= (3, 11):
@@ -72,3 +73,27 @@ class MocapMetadataEntries(StrEnum, metaclass=EnumContainsMeta):
     marker_count = "n_markers"
     sample_rate = "sample_rate"
     time_stamp = "time_stamp"
+
+
+class SharedAttr:
+    """SharedAttr
+
+    A reference to a large result, such as a recurrence matrix, kept in
+    the attrs of a DataFrame. pandas deep-copies attrs into every frame
+    derived from it; a SharedAttr returns itself when copied, so the result
+    is shared instead of duplicated. The result is in the value attribute.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: t.Any) -> None:
+        self.value = value
+
+    def __copy__(self) -> "SharedAttr":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "SharedAttr":
+        return self
+
+    def __repr__(self) -> str:
+        return f"SharedAttr({type(self.value).__name__})"
@@ -9,6 +9,7 @@ import typing as t
 from abc import ABC, abstractmethod
 from pathlib import Path
 
+import joblib
 import pandas as pd
 
 from mopipe.core.common import MocapMetadataEntries, maybe_generate_id
@@ -91,6 +92,23 @@ class AbstractReader(ABC):
         """The id of the data/experiment to be read."""
         return self._data_id
 
+    @property
+    def content_key(self) -> str:
+        """A hash identifying the data the reader produces.
+
+        For a file source this is derived from the file's identity (resolved
+        path, size and modification time), so it costs nothing regardless of
+        the size of the file. For a DataFrame source it is a hash of the
+        content. Pass it to Pipeline.run(input_key=...) so that cached results
+        are looked up without hashing the data.
+        """
+        cls = type(self)
+        source: t.Any = self.source
+        if isinstance(source, Path):
+            stat = source.stat()
+            source = (str(source.resolve()), stat.st_size, stat.st_mtime_ns)
+        return joblib.hash((f"{cls.__module__}.{cls.__qualname__}", source))
+
     @abstractmethod
     def read(self) -> t.Optional[EmpiricalData]:
         """Read the data from the source and return it as a dataframe."""
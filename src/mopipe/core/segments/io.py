@@ -101,10 +101,9 @@ class IOTypeBaseMixin:
         if col_max is None:
             col_max = math.inf
         if row_min <= x.shape[0] <= row_max:
-            if col_max == 1 and x.ndim == 1:
-                return True
             if x.ndim == 1:
-                return False
+                # a series is a single column
+                return col_min <= 1
             if col_min <= x.shape[1] <= col_max:
                 return True
         return False
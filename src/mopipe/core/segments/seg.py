@@ -6,6 +6,9 @@ Base segment class for all pipeline steps.
 import typing as t
 from abc import ABCMeta, abstractmethod
 
+import joblib
+
+from mopipe.__about__ import __version__
 from mopipe.core.common.util import maybe_generate_id
 from mopipe.core.segments.io import IOType
 from mopipe.core.segments.segmenttypes import SegmentType
@@ -25,6 +28,9 @@ class SegmentMeta(ABCMeta):
 class Segment(metaclass=SegmentMeta):
     """Base class for all pipeline steps."""
 
+    # bump when a change to a segment alters its output, so that cached results are recomputed
+    version: t.ClassVar[str] = "1"
+
     _name: str
     _segment_id: str
 
@@ -43,6 +49,24 @@ class Segment(metaclass=SegmentMeta):
         """The id of the segment."""
         return self._segment_id
 
+    def _fingerprint_config(self) -> dict[str, t.Any]:
+        """The configuration that determines the output of the segment: its attributes except name and id."""
+        return {k: v for k, v in vars(self).items() if k not in ("_name", "_segment_id")}
+
+    @property
+    def fingerprint(self) -> str:
+        """A deterministic hash of the segment's class, version and configuration.
+
+        Unlike segment_id, which is random unless given, the fingerprint is the same for
+        every segment of the same class and configuration, in every process, so it can be
+        used to key cached results across runs. The mopipe version is included, so
+        upgrading invalidates cached results.
+        """
+        cls = type(self)
+        return joblib.hash(
+            (f"{cls.__module__}.{cls.__qualname__}", cls.version, __version__, self._fingerprint_config())
+        )
+
     def _preprocess_input(self, **kwargs) -> t.Any:
         """Preprocess the input."""
         return kwargs
@@ -3,7 +3,33 @@ import typing as t
 import numpy as np
 import pandas as pd
 
-from mopipe.core.analysis import calc_rqa
+from mopipe.core.analysis import (
+    APPROXIMATE_RQA_MEASURES,
+    NETWORK_MEASURES,
+    RQA_MEASURES,
+    approximate_rqa,
+    auto_rqa,
+    average_mutual_information,
+    calc_rqa,
+    cross_recurrence_profile,
+    degree_distribution,
+    delay_embed,
+    false_nearest_neighbours,
+    fan_recurrence_matrix,
+    network_measures,
+    pairwise_rqa,
+    recurrence_matrix,
+    recurrence_network,
+    rqa_from_matrix,
+    rqa_surrogate_test,
+    rqa_threshold_sweep,
+    rr_threshold,
+    suggest_dim,
+    suggest_tau,
+    surrogate_p_values,
+    windowed_rqa,
+)
+from mopipe.core.common.datastructs import SharedAttr
 from mopipe.core.common.util import int_or_str_slice
 from mopipe.core.segments.inputs import AnySeriesInput, MultivariateSeriesInput, UnivariateSeriesInput
 from mopipe.core.segments.outputs import (
@@ -16,6 +42,176 @@ from mopipe.core.segments.seg import Segment
 from mopipe.core.segments.segmenttypes import AnalysisType, SummaryType, TransformType
 
 
+def _column_values(x: pd.DataFrame, col: t.Union[str, int, list[str], list[int]]) -> np.ndarray:
+    """Get the values of a column by position (int) or label (str), or of a list of columns."""
+    if isinstance(col, int) or (isinstance(col, list) and all(isinstance(c, int) for c in col)):
+        return x.iloc[:, col].values
+    return x.loc[:, col].values
+
+
+def _auto_rqa_frame(
+    xv: np.ndarray,
+    *,
+    dim: int,
+    tau: int,
+    threshold: float,
+    lmin: int,
+    block_size: t.Optional[int],
+    backend: str,
+    return_matrix: bool,
+    target_rr: t.Optional[float],
+    theiler: int,
+    measures: t.Optional[t.Sequence[str]],
+    n_samples: t.Optional[int],
+    confidence: float,
+    seed: t.Optional[int],
+    neighbours: t.Optional[int],
+    workers: int,
+) -> tuple[pd.DataFrame, t.Any]:
+    """Calculate auto-RQA statistics of a series or an array of points, as a one row dataframe.
+
+    The recurrence matrix is returned next to it, or None if return_matrix is not set.
+    """
+    if neighbours is not None:
+        return _fan_rqa_frame(
+            xv,
+            xv,
+            dim=dim,
+            tau=tau,
+            lmin=lmin,
+            neighbours=neighbours,
+            workers=workers,
+            return_matrix=return_matrix,
+            target_rr=target_rr,
+            theiler=theiler,
+            measures=measures,
+            n_samples=n_samples,
+        )
+    if n_samples is not None:
+        return _approximate_rqa_frame(
+            xv,
+            xv,
+            dim=dim,
+            tau=tau,
+            threshold=threshold,
+            lmin=lmin,
+            return_matrix=return_matrix,
+            target_rr=target_rr,
+            theiler=theiler,
+            measures=measures,
+            n_samples=n_samples,
+            confidence=confidence,
+            seed=seed,
+        )
+    out = pd.DataFrame(columns=_measure_columns(measures))
+    if target_rr is not None:
+        threshold = rr_threshold(xv, xv, target_rr, dim, tau, seed=seed, theiler=theiler)
+        out.attrs["threshold"] = threshold
+    if return_matrix:
+        # the statistics leave out the Theiler window, the returned matrix keeps it
+        rm = recurrence_matrix(xv, xv, dim, tau, threshold, block_size=block_size, backend=backend)
+        out.loc[len(out)] = rqa_from_matrix(rm, lmin, theiler=theiler, measures=measures)
+        return out, rm
+    out.loc[len(out)] = auto_rqa(
+        xv, dim, tau, threshold, lmin, theiler=theiler, block_size=block_size, backend=backend, measures=measures
+    )
+    return out, None
+
+
+def _with_matrix(out: pd.DataFrame, rm: t.Any) -> pd.DataFrame:
+    """Keep a returned recurrence matrix in out.attrs["recurrence_matrix"], shared by the frames derived from out."""
+    if rm is not None:
+        out.attrs["recurrence_matrix"] = SharedAttr(rm)
+    return out
+
+
+def _measure_columns(measures: t.Optional[t.Sequence[str]]) -> list[str]:
+    """Get the output columns for a selection of RQA measures."""
+    return list(RQA_MEASURES if measures is None else measures)
+
+
+def _approximate_columns(measures: t.Optional[t.Sequence[str]]) -> list[str]:
+    """Get the output columns of approximate RQA, each estimate followed by its confidence interval."""
+    names = APPROXIMATE_RQA_MEASURES if measures is None else measures
+    invalid = [m for m in names if m not in APPROXIMATE_RQA_MEASURES]
+    if invalid:
+        msg = f"Cannot approximate {invalid}, must be among {APPROXIMATE_RQA_MEASURES}."
+        raise ValueError(msg)
+    return [c for m in names for c in (m, f"{m}_lower", f"{m}_upper")]
+
+
+def _output_columns(measures: t.Optional[t.Sequence[str]], n_samples: t.Optional[int]) -> list[str]:
+    """Get the output columns of exact or (if n_samples is set) approximate RQA."""
+    return _measure_columns(measures) if n_samples is None else _approximate_columns(measures)
+
+
+def _fan_rqa_frame(
+    xa: np.ndarray,
+    xb: np.ndarray,
+    *,
+    dim: int,
+    tau: int,
+    lmin: int,
+    neighbours: int,
+    workers: int,
+    return_matrix: bool,
+    target_rr: t.Optional[float],
+    theiler: int,
+    measures: t.Optional[t.Sequence[str]],
+    n_samples: t.Optional[int],
+) -> tuple[pd.DataFrame, t.Any]:
+    """Calculate RQA statistics from a fixed amount of neighbours recurrence matrix, as a one row dataframe.
+
+    The recurrence matrix is returned next to it, or None if return_matrix is not set.
+    """
+    if target_rr is not None or n_samples is not None:
+        msg = "neighbours (FAN recurrence) cannot be combined with target_rr or n_samples."
+        raise ValueError(msg)
+    if theiler < 0:
+        msg = f"theiler must be a non-negative integer, got {theiler}."
+        raise ValueError(msg)
+    out = pd.DataFrame(columns=_measure_columns(measures))
+    # the nearest neighbour queries dominate, so build the matrix once and reuse it
+    rm = fan_recurrence_matrix(xa, xb, dim, tau, neighbours, theiler=theiler, workers=workers)
+    out.loc[len(out)] = rqa_from_matrix(rm, lmin, theiler=theiler, measures=measures)
+    return out, rm if return_matrix else None
+
+
+def _approximate_rqa_frame(
+    xa: np.ndarray,
+    xb: np.ndarray,
+    *,
+    dim: int,
+    tau: int,
+    threshold: float,
+    lmin: int,
+    return_matrix: bool,
+    target_rr: t.Optional[float],
+    theiler: int,
+    measures: t.Optional[t.Sequence[str]],
+    n_samples: int,
+    confidence: float,
+    seed: t.Optional[int],
+) -> tuple[pd.DataFrame, t.Any]:
+    """Estimate RQA statistics from sampled cells, as a one row dataframe with confidence intervals.
+
+    No recurrence matrix is computed, so None is returned next to it.
+    """
+    if return_matrix:
+        msg = "The recurrence matrix is not computed when approximating RQA (n_samples is set)."
+        raise ValueError(msg)
+    out = pd.DataFrame(columns=_approximate_columns(measures))
+    if target_rr is not None:
+        threshold = rr_threshold(xa, xb, target_rr, dim, tau, seed=seed, theiler=theiler)
+        out.attrs["threshold"] = threshold
+    estimates = approximate_rqa(
+        xa, xb, dim, tau, threshold, lmin, n_samples=n_samples, confidence=confidence, theiler=theiler, seed=seed
+    )
+    rows = [APPROXIMATE_RQA_MEASURES.index(m) for m in out.columns[::3]]
+    out.loc[len(out)] = estimates[rows].ravel()
+    return out, None
+
+
 class Mean(SummaryType, AnySeriesInput, SingleNumericValueOutput, Segment):
     """Calculate the mean of the input series."""
 
@@ -128,100 +324,690 @@ class SimpleGapFilling(TransformType, MultivariateSeriesInput, MultivariateSerie
         return x.interpolate(method="linear")
 
 
-class RQAStats(AnalysisType, UnivariateSeriesInput, AnySeriesOutput, Segment):
+class DelayEmbedding(TransformType, UnivariateSeriesInput, MultivariateSeriesOutput, Segment):
+    """Time-delay embed the input series."""
+
+    def process(
+        self,
+        x: t.Union[pd.Series, pd.DataFrame],
+        dim: int = 2,
+        tau: int = 1,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.DataFrame:
+        """Process the input series and return its time-delay embedding.
+
+        The output shares memory with the input (see delay_embed), so it is cheap to create
+        and can be passed to the RQA segments, with dim=1, to avoid embedding again.
+
+        Args:
+            x (pd.Series | pd.DataFrame): The input series.
+            dim (int, optional): The embedding dimension. Defaults to 2.
+            tau (int, optional): The time delay. Defaults to 1.
+
+        Returns:
+            pd.DataFrame: The embedded series, one point per row, with columns "<name>_0" to
+                "<name>_<dim - 1>" and the index of the first frame of each point.
+        """
+        if isinstance(x, pd.DataFrame):
+            x = x.iloc[:, 0]
+        name = x.name if x.name is not None else "x"
+        embedded = delay_embed(x.values, dim, tau)
+        return pd.DataFrame(
+            embedded, index=x.index[: embedded.shape[0]], columns=[f"{name}_{i}" for i in range(dim)], copy=False
+        )
+
+
+class AverageMutualInformation(AnalysisType, UnivariateSeriesInput, AnySeriesOutput, Segment):
+    """Calculate the average mutual information of the input series with itself over a range of lags."""
+
+    def process(
+        self,
+        x: t.Union[pd.Series, pd.DataFrame],
+        max_lag: int = 50,
+        bins: t.Optional[int] = None,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.DataFrame:
+        """Process the input series and return its average mutual information for each lag.
+
+        The first minimum of the curve is the usual choice of time delay for embedding, and is
+        stored in the output's attrs["tau"], ready to be passed to the RQA segments.
+
+        Args:
+            x (pd.Series | pd.DataFrame): The input series.
+            max_lag (int, optional): The largest lag. Defaults to 50.
+            bins (int | None, optional): The number of histogram bins. Defaults to None (Sturges' rule).
+
+        Returns:
+            pd.DataFrame: The mutual information, one row per lag.
+        """
+        out = pd.DataFrame(columns=["lag", "mutual_information"])
+        if x.empty:
+            return out
+        if isinstance(x, pd.DataFrame):
+            x = x.iloc[:, 0]
+        ami = average_mutual_information(x.values, max_lag, bins)
+        out = pd.DataFrame({"lag": np.arange(ami.shape[0]), "mutual_information": ami})
+        out.attrs["tau"] = suggest_tau(ami)
+        return out
+
+
+class FalseNearestNeighbours(AnalysisType, UnivariateSeriesInput, AnySeriesOutput, Segment):
+    """Calculate the fraction of false nearest neighbours of the input series over a range of embedding dimensions."""
+
+    def process(
+        self,
+        x: t.Union[pd.Series, pd.DataFrame],
+        tau: t.Optional[int] = None,
+        max_dim: int = 10,
+        threshold: float = 0.01,
+        rtol: float = 15.0,
+        atol: float = 2.0,
+        max_lag: int = 50,
+        workers: int = 1,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.DataFrame:
+        """Process the input series and return the fraction of false nearest neighbours for each dimension.
+
+        The smallest dimension with a negligible fraction is stored in the output's attrs["dim"], and
+        the time delay used in attrs["tau"], ready to be passed to the RQA segments.
+
+        Args:
+            x (pd.Series | pd.DataFrame): The input series.
+            tau (int | None, optional): The time delay. Defaults to None (the first minimum of the
+                average mutual information, see AverageMutualInformation).
+            max_dim (int, optional): The largest embedding dimension. Defaults to 10.
+            threshold (float, optional): The fraction of false nearest neighbours considered negligible.
+                Defaults to 0.01.
+            rtol (float, optional): The distance ratio threshold. Defaults to 15.0.
+            atol (float, optional): The attractor size threshold. Defaults to 2.0.
+            max_lag (int, optional): The largest lag searched when estimating tau. Defaults to 50.
+            workers (int, optional): The number of threads for the KD-tree queries. Defaults to 1.
+
+        Returns:
+            pd.DataFrame: The fraction of false nearest neighbours, one row per dimension.
+        """
+        out = pd.DataFrame(columns=["dim", "fnn_fraction"])
+        if x.empty:
+            return out
+        if isinstance(x, pd.DataFrame):
+            x = x.iloc[:, 0]
+        xv = x.values
+        if tau is None:
+            tau = suggest_tau(average_mutual_information(xv, max_lag))
+        fractions = false_nearest_neighbours(xv, tau, max_dim, rtol, atol, workers=workers)
+        out = pd.DataFrame({"dim": np.arange(1, fractions.shape[0] + 1), "fnn_fraction": fractions})
+        out.attrs["dim"] = suggest_dim(fractions, threshold)
+        out.attrs["tau"] = tau
+        return out
+
+
+class RQAStats(AnalysisType, AnySeriesInput, AnySeriesOutput, Segment):
     """Calculate Recurrence Quantification Analysis (RQA) statistics for the input series."""
 
     def process(
         self,
-        x: pd.Series,
+        x: t.Union[pd.Series, pd.DataFrame],
         dim: int = 1,
         tau: int = 1,
         threshold: float = 0.1,
         lmin: int = 2,
+        block_size: t.Optional[int] = None,
+        backend: str = "dense",
+        return_matrix: bool = False,  # noqa: FBT001, FBT002
+        target_rr: t.Optional[float] = None,
+        theiler: int = 0,
+        measures: t.Optional[t.Sequence[str]] = None,
+        n_samples: t.Optional[int] = None,
+        confidence: float = 0.95,
+        seed: t.Optional[int] = 0,
+        neighbours: t.Optional[int] = None,
+        workers: int = 1,
         **kwargs,  # noqa: ARG002
     ) -> pd.DataFrame:
         """Process the input series and return the RQA statistics.
 
+        The recurrence matrix of a series with itself is symmetric, so only its upper
+        triangle is computed (see auto_rqa).
+
         Args:
-            x (pd.Series): The input series.
+            x (pd.Series | pd.DataFrame): The input series, or a dataframe holding an already-embedded
+                series with one point per row (e.g. from DelayEmbedding, with dim=1).
             dim (int, optional): The embedding dimension. Defaults to 1.
             tau (int, optional): The time delay. Defaults to 1.
             threshold (float, optional): The recurrence threshold. Defaults to 0.1.
             lmin (int, optional): The minimum line length. Defaults to 2.
+            block_size (int | None, optional): Compute the recurrence matrix in tiles of at most
+                block_size x block_size to bound memory use. Defaults to None (no tiling).
+            backend (str, optional): The recurrence backend, "dense" or "sparse" (KD-tree radius
+                queries, best for low recurrence rates). Defaults to "dense".
+            return_matrix (bool, optional): Also return the recurrence matrix, in the output's
+                attrs["recurrence_matrix"] as a SharedAttr (whose value is the matrix), bit-packed for
+                the dense backend and sparse for the sparse backend. Defaults to False.
+            target_rr (float | None, optional): If set, ignore threshold and instead pick the threshold
+                that gives this recurrence rate (see rr_threshold). The threshold used is stored in the
+                output's attrs["threshold"]. Defaults to None.
+            theiler (int, optional): Exclude pairs of points less than theiler samples apart,
+                e.g. theiler=1 removes the main diagonal. The returned recurrence matrix is not
+                masked. Defaults to 0.
+            measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES and
+                RQA_EXTENDED_MEASURES (e.g. "max_diag_length", "trapping_time"). Defaults to None
+                (RQA_MEASURES).
+            n_samples (int | None, optional): If set, estimate the measures from this many randomly
+                sampled cells instead of computing them exactly (see approximate_rqa). Only the
+                APPROXIMATE_RQA_MEASURES are available (all of them if measures is None), and each
+                estimate is followed by the bounds of its confidence interval, e.g.
+                "determinism_lower" and "determinism_upper". Defaults to None (exact).
+            confidence (float, optional): The confidence level of the estimates' intervals. Defaults to 0.95.
+            seed (int | None, optional): The seed for sampling cells, and for sampling pairs when picking
+                the threshold for target_rr (see rr_threshold). Defaults to 0, so that repeated calls
+                give the same results.
+            neighbours (int | None, optional): If set, ignore threshold and instead make the neighbours
+                nearest points of every point recurrent, a fixed amount of neighbours (FAN) recurrence
+                matrix (see fan_recurrence_matrix). This adapts to differences in amplitude and density
+                without tuning a threshold; block_size and backend are ignored. Defaults to None.
+            workers (int, optional): The number of threads for the FAN KD-tree queries, -1 uses all
+                CPUs. Defaults to 1.
 
         Returns:
             pd.DataFrame: The RQA statistics.
         """
-        out = pd.DataFrame(
-            columns=[
-                "recurrence_rate",
-                "determinism",
-                "laminarity",
-                "avg_diag_length",
-                "avg_vert_length",
-                "d_entropy",
-                "v_entropy",
-            ]
+        if x.empty:
+            return pd.DataFrame(columns=_output_columns(measures, n_samples))
+        out, rm = _auto_rqa_frame(
+            x.values,
+            dim=dim,
+            tau=tau,
+            threshold=threshold,
+            lmin=lmin,
+            block_size=block_size,
+            backend=backend,
+            return_matrix=return_matrix,
+            target_rr=target_rr,
+            theiler=theiler,
+            measures=measures,
+            n_samples=n_samples,
+            confidence=confidence,
+            seed=seed,
+            neighbours=neighbours,
+            workers=workers,
         )
+        return _with_matrix(out, rm)
+
+
+class RecurrenceNetworkStats(AnalysisType, AnySeriesInput, AnySeriesOutput, Segment):
+    """Calculate recurrence network measures for the input series."""
+
+    def process(
+        self,
+        x: t.Union[pd.Series, pd.DataFrame],
+        dim: int = 1,
+        tau: int = 1,
+        threshold: float = 0.1,
+        target_rr: t.Optional[float] = None,
+        theiler: int = 1,
+        block_size: int = 1024,
+        return_matrix: bool = False,  # noqa: FBT001, FBT002
+        seed: t.Optional[int] = 0,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.DataFrame:
+        """Process the input series and return the measures of its recurrence network.
+
+        The recurrence matrix is read as the adjacency matrix of an undirected graph, built
+        from KD-tree radius queries as a sparse matrix (see recurrence_network).
+
+        Args:
+            x (pd.Series | pd.DataFrame): The input series, or a dataframe holding an already-embedded
+                series with one point per row (e.g. from DelayEmbedding, with dim=1).
+            dim (int, optional): The embedding dimension. Defaults to 1.
+            tau (int, optional): The time delay. Defaults to 1.
+            threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+            target_rr (float | None, optional): If set, ignore threshold and instead pick the threshold
+                that gives this recurrence rate (see rr_threshold). The threshold used is stored in the
+                output's attrs["threshold"]. Defaults to None.
+            theiler (int, optional): Leave out edges between points less than theiler samples apart.
+                Defaults to 1 (no self-loops).
+            block_size (int, optional): The number of nodes whose triangles and shortest paths are
+                computed at once. Defaults to 1024.
+            return_matrix (bool, optional): Also return the sparse adjacency matrix, in the output's
+                attrs["adjacency"] as a SharedAttr (whose value is the matrix). Defaults to False.
+            seed (int | None, optional): The seed for sampling pairs when picking the threshold for
+                target_rr (see rr_threshold). Defaults to 0, so that repeated calls give the same threshold.
+
+        Returns:
+            pd.DataFrame: The network measures (see network_measures), with the number of nodes of
+                each degree in the output's attrs["degree_distribution"].
+        """
+        out = pd.DataFrame(columns=list(NETWORK_MEASURES))
         if x.empty:
             return out
-
         xv = x.values
-        out.loc[len(out)] = calc_rqa(xv, xv, dim, tau, threshold, lmin)
+        if target_rr is not None:
+            threshold = rr_threshold(xv, xv, target_rr, dim, tau, seed=seed, theiler=theiler)
+            out.attrs["threshold"] = threshold
+        adjacency = recurrence_network(xv, dim, tau, threshold, theiler=theiler)
+        out.loc[len(out)] = network_measures(adjacency, block_size)
+        out.attrs["degree_distribution"] = degree_distribution(adjacency)
+        if return_matrix:
+            out.attrs["adjacency"] = SharedAttr(adjacency)
         return out
 
 
+class MdRQAStats(AnalysisType, MultivariateSeriesInput, AnySeriesOutput, Segment):
+    """Calculate multidimensional Recurrence Quantification Analysis (MdRQA) statistics for several input series."""
+
+    def process(
+        self,
+        x: pd.DataFrame,
+        cols: t.Optional[t.Union[list[str], list[int]]] = None,
+        normalize: bool = False,  # noqa: FBT001, FBT002
+        dim: int = 1,
+        tau: int = 1,
+        threshold: float = 0.1,
+        lmin: int = 2,
+        block_size: t.Optional[int] = None,
+        backend: str = "dense",
+        return_matrix: bool = False,  # noqa: FBT001, FBT002
+        target_rr: t.Optional[float] = None,
+        theiler: int = 0,
+        measures: t.Optional[t.Sequence[str]] = None,
+        n_samples: t.Optional[int] = None,
+        confidence: float = 0.95,
+        seed: t.Optional[int] = 0,
+        neighbours: t.Optional[int] = None,
+        workers: int = 1,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.DataFrame:
+        """Process the input dataframe and return the MdRQA statistics of the selected columns.
+
+        Every frame is one point in a space with one axis per column (times dim, when
+        embedding), e.g. all hip markers of a group of dancers, and the recurrence
+        matrix is calculated from the distances between these points.
+
+        Args:
+            x (pd.DataFrame): The input dataframe.
+            cols (list[str] | list[int] | None, optional): The columns to analyse, by label or position.
+                Defaults to None (all columns).
+            normalize (bool, optional): Z-normalize every column first, so that columns with larger
+                ranges do not dominate the distances. Defaults to False.
+            dim (int, optional): The embedding dimension, applied to all columns jointly. Defaults to 1.
+            tau (int, optional): The time delay. Defaults to 1.
+            threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+            lmin (int, optional): The minimum line length. Defaults to 2.
+            block_size (int | None, optional): Compute the recurrence matrix in tiles of at most
+                block_size x block_size to bound memory use. Defaults to None (no tiling).
+            backend (str, optional): The recurrence backend, "dense" or "sparse" (KD-tree radius
+                queries, best for low recurrence rates). Defaults to "dense".
+            return_matrix (bool, optional): Also return the recurrence matrix, in the output's
+                attrs["recurrence_matrix"] as a SharedAttr (whose value is the matrix). Defaults to False.
+            target_rr (float | None, optional): If set, ignore threshold and instead pick the threshold
+                that gives this recurrence rate (see rr_threshold). The threshold used is stored in the
+                output's attrs["threshold"]. Defaults to None.
+            theiler (int, optional): Exclude pairs of points less than theiler samples apart.
+                Defaults to 0.
+            measures (Sequence[str] | None, optional): The measures to calculate. Defaults to None
+                (RQA_MEASURES).
+            n_samples (int | None, optional): If set, estimate the measures from this many randomly
+                sampled cells instead (see RQAStats). Defaults to None (exact).
+            confidence (float, optional): The confidence level of the estimates' intervals. Defaults to 0.95.
+            seed (int | None, optional): The seed for sampling cells, and for sampling pairs when picking
+                the threshold for target_rr (see rr_threshold). Defaults to 0, so that repeated calls
+                give the same results.
+            neighbours (int | None, optional): If set, ignore threshold and instead make the neighbours
+                nearest points of every point recurrent, a fixed amount of neighbours (FAN) recurrence
+                matrix (see fan_recurrence_matrix). This adapts to differences in amplitude and density
+                without tuning a threshold; block_size and backend are ignored. Defaults to None.
+            workers (int, optional): The number of threads for the FAN KD-tree queries, -1 uses all
+                CPUs. Defaults to 1.
+
+        Returns:
+            pd.DataFrame: The MdRQA statistics.
+        """
+        if x.empty:
+            return pd.DataFrame(columns=_output_columns(measures, n_samples))
+        values = x.values if cols is None else _column_values(x, list(cols))
+        # one contiguous (frames x features) block, so embedding and distances stay vectorized
+        points = np.ascontiguousarray(values, dtype=float)
+        if normalize:
+            std = points.std(axis=0)
+            points = (points - points.mean(axis=0)) / np.where(std > 0, std, 1.0)
+        out, rm = _auto_rqa_frame(
+            points,
+            dim=dim,
+            tau=tau,
+            threshold=threshold,
+            lmin=lmin,
+            block_size=block_size,
+            backend=backend,
+            return_matrix=return_matrix,
+            target_rr=target_rr,
+            theiler=theiler,
+            measures=measures,
+            n_samples=n_samples,
+            confidence=confidence,
+            seed=seed,
+            neighbours=neighbours,
+            workers=workers,
+        )
+        return _with_matrix(out, rm)
+
+
 class CrossRQAStats(AnalysisType, MultivariateSeriesInput, AnySeriesOutput, Segment):
     """Calculate Recurrence Quantification Analysis (RQA) statistics between two input series."""
 
     def process(
         self,
         x: pd.DataFrame,
-        col_a: t.Union[str, int] = 0,
-        col_b: t.Union[str, int] = 0,
+        col_a: t.Union[str, int, list[str], list[int]] = 0,
+        col_b: t.Union[str, int, list[str], list[int]] = 0,
         dim: int = 1,
         tau: int = 1,
         threshold: float = 0.1,
         lmin: int = 2,
+        block_size: t.Optional[int] = None,
+        backend: str = "dense",
+        return_matrix: bool = False,  # noqa: FBT001, FBT002
+        target_rr: t.Optional[float] = None,
+        measures: t.Optional[t.Sequence[str]] = None,
+        n_samples: t.Optional[int] = None,
+        confidence: float = 0.95,
+        seed: t.Optional[int] = 0,
+        neighbours: t.Optional[int] = None,
+        workers: int = 1,
         **kwargs,  # noqa: ARG002
     ) -> pd.DataFrame:
         """Process the input dataframe and return the RQA statistics between two input series.
 
         Args:
             x (pd.DataFrame): The input dataframe.
-            col_a (str | int): The first column to calculate the RQA statistics for.
-            col_b (str | int): The second column to calculate the RQA statistics for.
+            col_a (str | int | list): The first column to calculate the RQA statistics for, or a list
+                of columns holding an already-embedded series (e.g. from DelayEmbedding, with dim=1).
+            col_b (str | int | list): The second column to calculate the RQA statistics for, or a list
+                of columns holding an already-embedded series.
             dim (int, optional): The embedding dimension. Defaults to 1.
             tau (int, optional): The time delay. Defaults to 1.
             threshold (float, optional): The recurrence threshold. Defaults to 0.1.
             lmin (int, optional): The minimum line length. Defaults to 2.
+            block_size (int | None, optional): Compute the recurrence matrix in tiles of at most
+                block_size x block_size to bound memory use. Defaults to None (no tiling).
+            backend (str, optional): The recurrence backend, "dense" or "sparse" (KD-tree radius
+                queries, best for low recurrence rates). Defaults to "dense".
+            return_matrix (bool, optional): Also return the recurrence matrix, in the output's
+                attrs["recurrence_matrix"] as a SharedAttr (whose value is the matrix), bit-packed for
+                the dense backend and sparse for the sparse backend. Defaults to False.
+            target_rr (float | None, optional): If set, ignore threshold and instead pick the threshold
+                that gives this recurrence rate (see rr_threshold). The threshold used is stored in the
+                output's attrs["threshold"]. Defaults to None.
+            measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES and
+                RQA_EXTENDED_MEASURES (e.g. "max_diag_length", "trapping_time"). Defaults to None
+                (RQA_MEASURES).
+            n_samples (int | None, optional): If set, estimate the measures from this many randomly
+                sampled cells instead of computing them exactly (see approximate_rqa). Only the
+                APPROXIMATE_RQA_MEASURES are available (all of them if measures is None), and each
+                estimate is followed by the bounds of its confidence interval, e.g.
+                "determinism_lower" and "determinism_upper". Defaults to None (exact).
+            confidence (float, optional): The confidence level of the estimates' intervals. Defaults to 0.95.
+            seed (int | None, optional): The seed for sampling cells, and for sampling pairs when picking
+                the threshold for target_rr (see rr_threshold). Defaults to 0, so that repeated calls
+                give the same results.
+            neighbours (int | None, optional): If set, ignore threshold and instead make the neighbours
+                nearest points of every point recurrent, a fixed amount of neighbours (FAN) recurrence
+                matrix (see fan_recurrence_matrix). This adapts to differences in amplitude and density
+                without tuning a threshold; block_size and backend are ignored. Defaults to None.
+            workers (int, optional): The number of threads for the FAN KD-tree queries, -1 uses all
+                CPUs. Defaults to 1.
 
         Returns:
             pd.DataFrame: The RQA statistics.
         """
+        if x.empty:
+            return pd.DataFrame(columns=_output_columns(measures, n_samples))
+        xa = _column_values(x, col_a)
+        xb = _column_values(x, col_b)
+        if neighbours is not None:
+            out, rm = _fan_rqa_frame(
+                xa,
+                xb,
+                dim=dim,
+                tau=tau,
+                lmin=lmin,
+                neighbours=neighbours,
+                workers=workers,
+                return_matrix=return_matrix,
+                target_rr=target_rr,
+                theiler=0,
+                measures=measures,
+                n_samples=n_samples,
+            )
+            return _with_matrix(out, rm)
+        if n_samples is not None:
+            out, _ = _approximate_rqa_frame(
+                xa,
+                xb,
+                dim=dim,
+                tau=tau,
+                threshold=threshold,
+                lmin=lmin,
+                return_matrix=return_matrix,
+                target_rr=target_rr,
+                theiler=0,
+                measures=measures,
+                n_samples=n_samples,
+                confidence=confidence,
+                seed=seed,
+            )
+            return out
+        out = pd.DataFrame(columns=_measure_columns(measures))
+        if target_rr is not None:
+            threshold = rr_threshold(xa, xb, target_rr, dim, tau, seed=seed)
+            out.attrs["threshold"] = threshold
+
+        if return_matrix:
+            rm = recurrence_matrix(xa, xb, dim, tau, threshold, block_size=block_size, backend=backend)
+            out.loc[len(out)] = rqa_from_matrix(rm, lmin, measures=measures)
+            return _with_matrix(out, rm)
+        out.loc[len(out)] = calc_rqa(
+            xa, xb, dim, tau, threshold, lmin, block_size=block_size, backend=backend, measures=measures
+        )
+        return out
+
+
+class CrossRecurrenceProfile(AnalysisType, MultivariateSeriesInput, AnySeriesOutput, Segment):
+    """Calculate the recurrence rate between two input series as a function of the lag between them."""
+
+    def process(
+        self,
+        x: pd.DataFrame,
+        col_a: t.Union[str, int, list[str], list[int]] = 0,
+        col_b: t.Union[str, int, list[str], list[int]] = 0,
+        dim: int = 1,
+        tau: int = 1,
+        threshold: float = 0.1,
+        max_lag: int = 100,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.Series:
+        """Process the input dataframe and return the diagonal-wise cross-recurrence profile.
+
+        Args:
+            x (pd.DataFrame): The input dataframe.
+            col_a (str | int | list): The first column, or a list of columns holding an
+                already-embedded series (e.g. from DelayEmbedding, with dim=1).
+            col_b (str | int | list): The second column, or a list of columns holding an
+                already-embedded series.
+            dim (int, optional): The embedding dimension. Defaults to 1.
+            tau (int, optional): The time delay. Defaults to 1.
+            threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+            max_lag (int, optional): The largest lag in frames, in either direction. Defaults to 100.
+
+        Returns:
+            pd.Series: The recurrence rate for every lag from -max_lag to max_lag. A positive lag
+                compares col_a at frame t with col_b at frame t + lag, so a peak at a positive lag
+                means that col_b follows col_a.
+        """
+        lags = pd.RangeIndex(-max_lag, max_lag + 1, name="lag")
+        if x.empty:
+            return pd.Series(np.nan, index=lags, name="recurrence_rate")
+        profile = cross_recurrence_profile(
+            _column_values(x, col_a), _column_values(x, col_b), dim, tau, threshold, max_lag
+        )
+        return pd.Series(profile, index=lags, name="recurrence_rate")
+
+
+class RQASurrogateTest(AnalysisType, MultivariateSeriesInput, AnySeriesOutput, Segment):
+    """Test Recurrence Quantification Analysis (RQA) statistics between two input series against surrogates."""
+
+    def process(
+        self,
+        x: pd.DataFrame,
+        col_a: t.Union[str, int, list[str], list[int]] = 0,
+        col_b: t.Union[str, int] = 0,
+        dim: int = 1,
+        tau: int = 1,
+        threshold: float = 0.1,
+        lmin: int = 2,
+        method: str = "shuffle",
+        n_surrogates: int = 99,
+        seed: t.Optional[int] = 0,
+        min_shift: t.Optional[int] = None,
+        alternative: str = "two-sided",
+        block_size: t.Optional[int] = None,
+        backend: str = "dense",
+        n_jobs: t.Optional[int] = None,
+        measures: t.Optional[t.Sequence[str]] = None,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.DataFrame:
+        """Process the input dataframe and compare the RQA statistics with those of surrogates of col_b.
+
+        Args:
+            x (pd.DataFrame): The input dataframe.
+            col_a (str | int | list): The first column, or a list of columns holding an
+                already-embedded series (e.g. from DelayEmbedding, with dim=1).
+            col_b (str | int): The second column, which is replaced by its surrogates.
+            dim (int, optional): The embedding dimension. Defaults to 1.
+            tau (int, optional): The time delay. Defaults to 1.
+            threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+            lmin (int, optional): The minimum line length. Defaults to 2.
+            method (str, optional): The surrogates, "shuffle" (no temporal structure), "iaaft" (same
+                power spectrum and amplitude distribution) or "time_shift" (circularly shifted; this
+                moves the recurrence structure shared with col_a away from the main diagonal but
+                keeps it in the matrix, so most whole-matrix measures barely change). Defaults to
+                "shuffle".
+            n_surrogates (int, optional): The number of surrogates. Defaults to 99.
+            seed (int | None, optional): The seed of the random number generator; the results do not
+                depend on n_jobs. Defaults to 0, so that repeated calls give the same p-values, as
+                cached results assume. None draws fresh surrogates on every call.
+            min_shift (int | None, optional): The smallest shift of time-shift surrogates. Defaults
+                to None (a tenth of the series).
+            alternative (str, optional): The alternative hypothesis of the p-values, "greater", "less"
+                or "two-sided". Defaults to "two-sided".
+            block_size (int | None, optional): Compute the recurrence matrices in tiles of at most
+                block_size x block_size to bound memory use. Defaults to None (no tiling).
+            backend (str, optional): The recurrence backend, "dense" or "sparse". Defaults to "dense".
+            n_jobs (int | None, optional): The number of joblib workers to spread the surrogates over
+                (-1 uses all CPUs). Defaults to None (serial).
+            measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES and
+                RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+
+        Returns:
+            pd.DataFrame: One row per measure, with the observed value, the mean and standard deviation
+                of the null distribution and the p-value. The null distribution itself, one row per
+                surrogate, is in the output's attrs["null_distribution"].
+        """
+        names = _measure_columns(measures)
         out = pd.DataFrame(
-            columns=[
-                "recurrence_rate",
-                "determinism",
-                "laminarity",
-                "avg_diag_length",
-                "avg_vert_length",
-                "d_entropy",
-                "v_entropy",
-            ]
+            columns=["observed", "null_mean", "null_std", "p_value"], index=pd.Index(names, name="measure")
         )
         if x.empty:
             return out
-        if isinstance(col_a, int):
-            xa = x.iloc[:, col_a].values
-        if isinstance(col_a, str):
-            xa = x.loc[:, col_a].values
-        if isinstance(col_b, int):
-            xb = x.iloc[:, col_b].values
-        if isinstance(col_b, str):
-            xb = x.loc[:, col_b].values
-
-        out.loc[len(out)] = calc_rqa(xa, xb, dim, tau, threshold, lmin)
+        observed, null = rqa_surrogate_test(
+            _column_values(x, col_a),
+            _column_values(x, col_b),
+            dim,
+            tau,
+            threshold,
+            lmin,
+            method=method,
+            n_surrogates=n_surrogates,
+            seed=seed,
+            min_shift=min_shift,
+            block_size=block_size,
+            backend=backend,
+            n_jobs=n_jobs,
+            measures=measures,
+        )
+        out["observed"] = observed
+        out["null_mean"] = np.nanmean(null, axis=0)
+        out["null_std"] = np.nanstd(null, axis=0)
+        out["p_value"] = surrogate_p_values(observed, null, alternative)
+        out.attrs["null_distribution"] = pd.DataFrame(null, columns=names)
+        return out
+
+
+class PairwiseCrossRQAStats(AnalysisType, MultivariateSeriesInput, AnySeriesOutput, Segment):
+    """Calculate Recurrence Quantification Analysis (RQA) statistics between all pairs of columns."""
+
+    def process(
+        self,
+        x: pd.DataFrame,
+        cols_a: t.Optional[t.Union[list[str], list[int]]] = None,
+        cols_b: t.Optional[t.Union[list[str], list[int]]] = None,
+        dim: int = 1,
+        tau: int = 1,
+        threshold: float = 0.1,
+        lmin: int = 2,
+        block_size: t.Optional[int] = None,
+        backend: str = "dense",
+        n_jobs: t.Optional[int] = None,
+        measures: t.Optional[t.Sequence[str]] = None,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.DataFrame:
+        """Process the input dataframe and return the RQA statistics between every pair of columns.
+
+        Every column is embedded once, and the pairs are spread over n_jobs worker processes.
+
+        Args:
+            x (pd.DataFrame): The input dataframe.
+            cols_a (list | None, optional): The first columns of the pairs, by label or position.
+                Defaults to None (all columns).
+            cols_b (list | None, optional): The second columns of the pairs, by label or position.
+                Defaults to None (the same as cols_a).
+            dim (int, optional): The embedding dimension. Defaults to 1.
+            tau (int, optional): The time delay. Defaults to 1.
+            threshold (float, optional): The recurrence threshold. Defaults to 0.1.
+            lmin (int, optional): The minimum line length. Defaults to 2.
+            block_size (int | None, optional): Compute the recurrence matrices in tiles of at most
+                block_size x block_size to bound memory use. Defaults to None (no tiling).
+            backend (str, optional): The recurrence backend, "dense" or "sparse". Defaults to "dense".
+            n_jobs (int | None, optional): The number of joblib workers, -1 uses all CPUs.
+                Defaults to None (serial).
+            measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES and
+                RQA_EXTENDED_MEASURES. Defaults to None (RQA_MEASURES).
+
+        Returns:
+            pd.DataFrame: The RQA statistics in long format, with columns col_a, col_b, measure and
+                value. The same statistics as an array of shape (len(cols_a), len(cols_b), measures)
+                are in the output's attrs["stats"].
+        """
+        names = _measure_columns(measures)
+        out = pd.DataFrame(columns=["col_a", "col_b", "measure", "value"])
+        if x.empty:
+            return out
+        labels_a = list(x.columns) if cols_a is None else [x.columns[c] if isinstance(c, int) else c for c in cols_a]
+        labels_b = labels_a if cols_b is None else [x.columns[c] if isinstance(c, int) else c for c in cols_b]
+        stats = pairwise_rqa(
+            x[labels_a].to_numpy(dtype=float),
+            x[labels_b].to_numpy(dtype=float),
+            dim,
+            tau,
+            threshold,
+            lmin,
+            block_size=block_size,
+            backend=backend,
+            n_jobs=n_jobs,
+            measures=measures,
+        )
+        index = pd.MultiIndex.from_product([labels_a, labels_b, names], names=["col_a", "col_b", "measure"])
+        out = pd.Series(stats.ravel(), index=index, name="value").reset_index()
+        out.attrs["stats"] = stats
         return out
 
 
@@ -231,54 +1017,167 @@ class WindowedCrossRQAStats(AnalysisType, MultivariateSeriesInput, AnySeriesOutp
     def process(
         self,
         x: pd.DataFrame,
-        col_a: t.Union[str, int] = 0,
-        col_b: t.Union[str, int] = 0,
+        col_a: t.Union[str, int, list[str], list[int]] = 0,
+        col_b: t.Union[str, int, list[str], list[int]] = 0,
         dim: int = 1,
         tau: int = 1,
         threshold: float = 0.1,
         lmin: int = 2,
         window: int = 100,
         step: int = 10,
+        block_size: t.Optional[int] = None,
+        backend: str = "dense",
+        return_matrix: bool = False,  # noqa: FBT001, FBT002
+        n_jobs: t.Optional[int] = None,
+        time_col: t.Optional[str] = None,
+        target_rr: t.Optional[float] = None,
+        measures: t.Optional[t.Sequence[str]] = None,
+        neighbours: t.Optional[int] = None,
+        workers: int = 1,
+        seed: t.Optional[int] = 0,
         **kwargs,  # noqa: ARG002
     ) -> pd.DataFrame:
         """Process the input dataframe and return the RQA statistics between two input series in a moving window.
 
         Args:
             x (pd.DataFrame): The input dataframe.
-            col_a (str | int): The first column to calculate the RQA statistics for.
-            col_b (str | int): The second column to calculate the RQA statistics for.
+            col_a (str | int | list): The first column to calculate the RQA statistics for, or a list
+                of columns holding an already-embedded series (e.g. from DelayEmbedding, with dim=1).
+            col_b (str | int | list): The second column to calculate the RQA statistics for, or a list
+                of columns holding an already-embedded series.
             dim (int, optional): The embedding dimension. Defaults to 1.
             tau (int, optional): The time delay. Defaults to 1.
             threshold (float, optional): The recurrence threshold. Defaults to 0.1.
             lmin (int, optional): The minimum line length. Defaults to 2.
             window (int, optional): The window size. Defaults to 100.
             step (int, optional): The step size. Defaults to 10.
+            block_size (int | None, optional): Compute the recurrence matrix in tiles of at most
+                block_size x block_size to bound memory use. Defaults to None (no tiling).
+            backend (str, optional): The recurrence backend, "dense", "sparse" (KD-tree radius
+                queries, best for low recurrence rates) or "banded" (the band of width window around
+                the main diagonal is computed once for the whole series and each window's matrix is
+                read from it). Defaults to "dense".
+            return_matrix (bool, optional): Also return the recurrence matrix of every window, as a
+                list in the output's attrs["recurrence_matrix"] as a SharedAttr (whose value is the
+                list), bit-packed for the dense backend and sparse for the sparse backend. Defaults to False.
+            n_jobs (int | None, optional): The number of joblib workers to spread the windows over
+                (-1 uses all CPUs). Defaults to None (serial).
+            time_col (str | None, optional): A column holding the time of each frame, e.g. "elapsed"; if
+                given, the time at the start of each window is added as "window_start_time".
+                Defaults to None.
+            target_rr (float | None, optional): If set, ignore threshold and instead pick the threshold
+                that gives this recurrence rate over the whole series (see rr_threshold), so that all
+                windows share one threshold. The threshold used is stored in the output's
+                attrs["threshold"]. Defaults to None.
+            measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES and
+                RQA_EXTENDED_MEASURES (e.g. "max_diag_length", "trapping_time"). Defaults to None
+                (RQA_MEASURES).
+            neighbours (int | None, optional): If set, ignore threshold and instead make the neighbours
+                nearest col_b points of every col_a point recurrent within each window, a fixed amount
+                of neighbours (FAN) recurrence matrix (see fan_recurrence_matrix); block_size and
+                backend are ignored. Defaults to None.
+            workers (int, optional): The number of threads for the FAN KD-tree queries, -1 uses all
+                CPUs. Defaults to 1.
+            seed (int | None, optional): The seed for sampling pairs when picking the threshold for
+                target_rr (see rr_threshold). Defaults to 0, so that repeated calls give the same threshold.
 
         Returns:
-            pd.DataFrame: The RQA statistics.
+            pd.DataFrame: The RQA statistics, one row per window, with the index label of the first
+                frame of each window in "window_start".
         """
-        out = pd.DataFrame(
-            columns=[
-                "recurrence_rate",
-                "determinism",
-                "laminarity",
-                "avg_diag_length",
-                "avg_vert_length",
-                "d_entropy",
-                "v_entropy",
-            ]
+        columns = ["window_start", *_measure_columns(measures)]
+        if time_col is not None:
+            columns.insert(1, "window_start_time")
+        out = pd.DataFrame(columns=columns)
+        if x.empty:
+            return out
+        xa = _column_values(x, col_a)
+        xb = _column_values(x, col_b)
+        if target_rr is not None and neighbours is not None:
+            msg = "neighbours (FAN recurrence) cannot be combined with target_rr."
+            raise ValueError(msg)
+        if target_rr is not None:
+            threshold = rr_threshold(xa, xb, target_rr, dim, tau, seed=seed)
+
+        result = windowed_rqa(
+            xa,
+            xb,
+            dim,
+            tau,
+            threshold,
+            lmin,
+            window,
+            step,
+            block_size=block_size,
+            backend=backend,
+            n_jobs=n_jobs,
+            return_matrix=return_matrix,
+            measures=measures,
+            neighbours=neighbours,
+            workers=workers,
         )
+        stats, matrices = result if return_matrix else (result, None)
+        starts = np.arange(0, xa.shape[0] - window + 1, step)
+        out = pd.DataFrame(stats, columns=_measure_columns(measures))
+        out.insert(0, "window_start", x.index[starts])
+        if time_col is not None:
+            out.insert(1, "window_start_time", x[time_col].to_numpy()[starts])
+        if target_rr is not None:
+            out.attrs["threshold"] = threshold
+        return _with_matrix(out, matrices)
+
+
+class RQAThresholdSweep(AnalysisType, MultivariateSeriesInput, AnySeriesOutput, Segment):
+    """Calculate Recurrence Quantification Analysis (RQA) statistics between two input series for several thresholds."""
+
+    def process(
+        self,
+        x: pd.DataFrame,
+        col_a: t.Union[str, int, list[str], list[int]] = 0,
+        col_b: t.Union[str, int, list[str], list[int]] = 0,
+        thresholds: t.Optional[t.Sequence[float]] = None,
+        dim: int = 1,
+        tau: int = 1,
+        lmin: int = 2,
+        block_size: t.Optional[int] = None,
+        measures: t.Optional[t.Sequence[str]] = None,
+        **kwargs,  # noqa: ARG002
+    ) -> pd.DataFrame:
+        """Process the input dataframe and return the RQA statistics for each threshold.
+
+        The distance matrix is only computed once for all thresholds.
+
+        Args:
+            x (pd.DataFrame): The input dataframe.
+            col_a (str | int | list): The first column to calculate the RQA statistics for, or a list
+                of columns holding an already-embedded series (e.g. from DelayEmbedding, with dim=1).
+            col_b (str | int | list): The second column to calculate the RQA statistics for, or a list
+                of columns holding an already-embedded series.
+            thresholds (Sequence[float]): The recurrence thresholds.
+            dim (int, optional): The embedding dimension. Defaults to 1.
+            tau (int, optional): The time delay. Defaults to 1.
+            lmin (int, optional): The minimum line length. Defaults to 2.
+            block_size (int | None, optional): Compute the distance matrix in tiles of at most
+                block_size x block_size to bound memory use. Defaults to None (no tiling).
+            measures (Sequence[str] | None, optional): The measures to calculate, from RQA_MEASURES and
+                RQA_EXTENDED_MEASURES (e.g. "max_diag_length", "trapping_time"). Defaults to None
+                (RQA_MEASURES).
+
+        Returns:
+            pd.DataFrame: The RQA statistics, one row per threshold.
+        """
+        if thresholds is None or len(thresholds) == 0:
+            msg = "No thresholds provided."
+            raise ValueError(msg)
+        out = pd.DataFrame(columns=["threshold", *_measure_columns(measures)])
         if x.empty:
             return out
-        if isinstance(col_a, int):
-            xa = x.iloc[:, col_a].values
-        if isinstance(col_a, str):
-            xa = x.loc[:, col_a].values
-        if isinstance(col_b, int):
-            xb = x.iloc[:, col_b].values
-        if isinstance(col_b, str):
-            xb = x.loc[:, col_b].values
-
-        for w in range(0, xa.shape[0] - window + 1, step):
-            out.loc[len(out)] = calc_rqa(xa[w : w + window], xb[w : w + window], dim, tau, threshold, lmin)
+        xa = _column_values(x, col_a)
+        xb = _column_values(x, col_b)
+
+        out = pd.DataFrame(
+            rqa_threshold_sweep(xa, xb, thresholds, dim, tau, lmin, block_size=block_size, measures=measures),
+            columns=_measure_columns(measures),
+        )
+        out.insert(0, "threshold", np.asarray(thresholds, dtype=float))
         return out
@@ -0,0 +1,283 @@
+import inspect
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest  # type: ignore
+from joblib import StoreBackendBase
+from joblib._store_backends import FileSystemStoreBackend
+
+from mopipe.core.analysis import CacheManager, MemoryCache, Pipeline
+from mopipe.core.analysis.cache import main
+from mopipe.core.segments import AnyInput, AnyOutput, OtherType, Segment
+
+
+class AddSegment(AnyInput, AnyOutput, OtherType, Segment):
+    def __init__(self, name, amount=1):
+        super().__init__(name)
+        self.amount = amount
+
+    def process(self, x, **kwargs):  # noqa: ARG002
+        return x + self.amount
+
+
+class ScaleSegment(AnyInput, AnyOutput, OtherType, Segment):
+    def process(self, x, **kwargs):  # noqa: ARG002
+        return x * 2
+
+
+class TestMemoryCache:
+    def test_get_and_put(self):
+        cache = MemoryCache(1000)
+        assert cache.get("a") is None
+        assert cache.put("a", np.zeros(10))
+        np.testing.assert_array_equal(cache.get("a"), np.zeros(10))
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+        assert cache.nbytes == 80
+        assert "a" in cache
+        assert len(cache) == 1
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(250)
+        cache.put("a", np.zeros(10))
+        cache.put("b", np.zeros(10))
+        cache.put("c", np.zeros(10))
+        # a becomes the most recently used, so b is evicted first
+        cache.get("a")
+        cache.put("d", np.zeros(10))
+        assert "b" not in cache
+        assert "a" in cache
+        assert "d" in cache
+        assert cache.evictions == 1
+        assert cache.nbytes == 240
+
+    def test_too_large_is_not_stored(self):
+        cache = MemoryCache(100)
+        cache.put("a", np.zeros(5))
+        assert not cache.put("b", np.zeros(100))
+        assert "b" not in cache
+        assert "a" in cache
+        assert cache.evictions == 0
+
+    def test_replace_and_clear(self):
+        cache = MemoryCache(1000)
+        cache.put("a", np.zeros(10))
+        cache.put("a", np.zeros(20))
+        assert cache.nbytes == 160
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.nbytes == 0
+
+    def test_dataframe_size(self):
+        df = pd.DataFrame({"a": np.zeros(100), "b": np.zeros(100)})
+        cache = MemoryCache(10_000)
+        cache.put("df", df)
+        assert cache.nbytes >= 1600
+
+    def test_negative_budget(self):
+        with pytest.raises(ValueError):
+            MemoryCache(-1)
+
+
+class TestCacheManager:
+    @pytest.fixture
+    def filled(self, tmp_path):
+        pipeline = Pipeline([AddSegment("add"), ScaleSegment("scale")], cache_dir=tmp_path)
+        for trial in range(3):
+            pipeline.run(x=np.full(1000, trial, dtype=float), input_key=f"trial-{trial}")
+        # an unchained run records the segment class but no input key
+        Pipeline([AddSegment("add", amount=5)], cache_dir=tmp_path).run(x=np.zeros(10))
+        return CacheManager(tmp_path)
+
+    def test_entries(self, filled):
+        entries = filled.entries()
+        assert entries.shape[0] == 7
+        assert set(entries["segment"]) == {f"{__name__}.AddSegment", f"{__name__}.ScaleSegment"}
+        assert set(entries["input_key"].dropna()) == {"trial-0", "trial-1", "trial-2"}
+        assert entries["input_key"].isna().sum() == 1
+        assert (entries["nbytes"] > 0).all()
+        assert filled.size() == entries["nbytes"].sum()
+
+    def test_report(self, filled):
+        report = filled.report()
+        assert report.loc[f"{__name__}.AddSegment", "entries"] == 4
+        assert report.loc[f"{__name__}.ScaleSegment", "inputs"] == 3
+        assert report["nbytes"].sum() == filled.size()
+
+    def test_invalidate_segment(self, filled):
+        assert filled.invalidate(segment=ScaleSegment) == 3
+        assert filled.invalidate(segment="AddSegment", input_key="trial-0") == 1
+        assert filled.entries().shape[0] == 3
+
+    def test_invalidate_input(self, filled):
+        assert filled.invalidate(input_key="trial-1") == 2
+        assert "trial-1" not in set(filled.entries()["input_key"])
+        with pytest.raises(ValueError):
+            filled.invalidate()
+
+    def test_evict_lru(self, filled):
+        entries = filled.entries()
+        # mark the trial-2 results as the most recently used
+        now = time.time()
+        for i, path in enumerate(entries["path"]):
+            stamp = now if entries["input_key"].iloc[i] == "trial-2" else now - 3600
+            for filename in os.listdir(path):
+                os.utime(os.path.join(path, filename), (stamp, stamp))
+        budget = int(entries.loc[entries["input_key"] == "trial-2", "nbytes"].sum())
+        assert filled.evict(max_bytes=budget) == 5
+        assert set(filled.entries()["input_key"]) == {"trial-2"}
+        assert filled.size() <= budget
+
+    def test_evict_age(self, filled):
+        assert filled.evict(max_age="1 day") == 0
+        path = filled.entries()["path"].iloc[0]
+        old = time.time() - 2 * 86400
+        for filename in os.listdir(path):
+            os.utime(os.path.join(path, filename), (old, old))
+        assert filled.evict(max_age=86400) == 1
+
+    def test_pipeline_max_cache_bytes(self, tmp_path):
+        pipeline = Pipeline([AddSegment("add")], cache_dir=tmp_path, max_cache_bytes=20_000)
+        for trial in range(10):
+            pipeline.run(x=np.full(1000, trial, dtype=float), input_key=f"trial-{trial}")
+        assert pipeline.cache_manager is not None
+        assert 0 < pipeline.cache_manager.size() <= 20_000
+
+    @pytest.mark.parametrize("input_key", [None, "trial"])
+    def test_pipeline_evicts_after_writes(self, tmp_path, monkeypatch, input_key):
+        pipeline = Pipeline([AddSegment("add")], cache_dir=tmp_path, max_cache_bytes=1 << 20)
+        evictions = []
+        monkeypatch.setattr(CacheManager, "evict", lambda _self, **kwargs: evictions.append(kwargs) or 0)
+        x = np.zeros(1000)
+        pipeline.run(x=x, input_key=input_key)
+        assert len(evictions) == 1
+        # a fully cached run writes nothing, so it does not walk the cache
+        pipeline.run(x=x, input_key=input_key)
+        assert len(evictions) == 1
+        pipeline.run(x=x + 1, input_key=None if input_key is None else "other")
+        assert len(evictions) == 2
+
+    def test_cli(self, filled, capsys):
+        assert main([str(filled.cache_dir), "report"]) == 0
+        assert "ScaleSegment" in capsys.readouterr().out
+        assert main([str(filled.cache_dir), "invalidate", "--segment", "ScaleSegment"]) == 0
+        assert "Removed 3 entries" in capsys.readouterr().out
+        assert main([str(filled.cache_dir), "evict", "--max-size", "0K"]) == 0
+        assert filled.size() == 0
+        with pytest.raises(SystemExit):
+            main([str(filled.cache_dir), "evict"])
+
+    def test_cli_max_age(self, filled, capsys):
+        path = filled.entries()["path"].iloc[0]
+        old = time.time() - 7200
+        for filename in os.listdir(path):
+            os.utime(os.path.join(path, filename), (old, old))
+        # a bare number is in seconds, not pandas' default of nanoseconds
+        assert main([str(filled.cache_dir), "evict", "--max-age", "10800"]) == 0
+        assert "Removed 0 entries" in capsys.readouterr().out
+        assert main([str(filled.cache_dir), "evict", "--max-age", "1h"]) == 0
+        assert "Removed 1 entries" in capsys.readouterr().out
+        assert filled.evict(max_age="60") == 0
+        with pytest.raises(SystemExit):
+            main([str(filled.cache_dir), "evict", "--max-age", "soon"])
+
+
+def _is_mapped(values):
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+class IdentitySegment(AnyInput, AnyOutput, OtherType, Segment):
+    def process(self, x, **kwargs):  # noqa: ARG002
+        return x
+
+
+class TestColumnarStorage:
+    def _roundtrip(self, cache_dir, value, storage="columnar"):
+        Pipeline([IdentitySegment("id")], cache_dir=cache_dir, storage=storage).run(x=value, input_key="k")
+        return Pipeline([IdentitySegment("id")], cache_dir=cache_dir, storage=storage).run(x=None, input_key="k")
+
+    def test_dataframe(self, tmp_path):
+        df = pd.DataFrame(
+            {
+                "x": np.arange(100, dtype=float),
+                "n": np.arange(100),
+                "label": [f"s{i}" for i in range(100)],
+                "cat": pd.Categorical(["a", "b"] * 50),
+                "time": pd.date_range("2024-01-01", periods=100, freq="s"),
+            },
+            index=pd.Index(np.arange(100) * 2, name="frame"),
+        )
+        df.attrs["stats"] = np.ones(3)
+        out = self._roundtrip(tmp_path, df)
+        pd.testing.assert_frame_equal(out, df)
+        np.testing.assert_array_equal(out.attrs["stats"], np.ones(3))
+        assert _is_mapped(out["x"].to_numpy())
+        assert _is_mapped(out["n"].to_numpy())
+        assert _is_mapped(out.index.to_numpy())
+        files = {f.name for f in tmp_path.rglob("*.npy")}
+        assert {"column_0.npy", "column_1.npy", "column_4.npy", "index.npy"} <= files
+
+    def test_mapped_results_are_copy_on_write(self, tmp_path):
+        df = pd.DataFrame({"x": np.zeros(10)})
+        out = self._roundtrip(tmp_path, df)
+        out.loc[0, "x"] = 1.0
+        again = Pipeline([IdentitySegment("id")], cache_dir=tmp_path, storage="columnar").run(x=None, input_key="k")
+        assert again.loc[0, "x"] == 0.0
+
+    def test_multiindex_columns_and_range_index(self, tmp_path):
+        df = pd.DataFrame(np.ones((5, 4)), columns=pd.MultiIndex.from_product([["a", "b"], ["x", "y"]]))
+        pd.testing.assert_frame_equal(self._roundtrip(tmp_path, df), df)
+
+    def test_series_and_array(self, tmp_path):
+        s = pd.Series(np.arange(10.0), index=pd.Index(list("abcdefghij"), name="key"), name="value")
+        out = self._roundtrip(tmp_path / "s", s)
+        pd.testing.assert_series_equal(out, s)
+        assert _is_mapped(out.to_numpy())
+        arr = np.arange(12.0).reshape(3, 4)
+        out = self._roundtrip(tmp_path / "a", arr)
+        np.testing.assert_array_equal(out, arr)
+        assert type(out) is np.ndarray
+        assert _is_mapped(out)
+
+    def test_other_results_are_pickled(self, tmp_path):
+        assert self._roundtrip(tmp_path, {"a": 1}) == {"a": 1}
+        assert not list(tmp_path.rglob("*.npy"))
+
+    def test_pickle_storage_reads_columnar_results(self, tmp_path):
+        df = pd.DataFrame({"x": np.arange(10.0)})
+        self._roundtrip(tmp_path, df)
+        out = Pipeline([IdentitySegment("id")], cache_dir=tmp_path).run(x=None, input_key="k")
+        pd.testing.assert_frame_equal(out, df)
+
+    def test_no_temporary_files_left(self, tmp_path):
+        self._roundtrip(tmp_path, pd.DataFrame({"x": np.zeros(10), "y": np.ones(10)}))
+        assert not list(tmp_path.rglob("*.tmp"))
+
+    def test_joblib_store_backend_interface(self, tmp_path):
+        # ColumnarStoreBackend extends joblib's private FileSystemStoreBackend, fail loudly if it changes
+        assert issubclass(FileSystemStoreBackend, StoreBackendBase)
+        expected = {
+            "configure": ["location", "verbose", "backend_options"],
+            "create_location": ["location"],
+            "dump_item": ["call_id", "item", "verbose"],
+            "load_item": ["call_id", "verbose", "timestamp", "metadata"],
+        }
+        for name, params in expected.items():
+            assert list(inspect.signature(getattr(FileSystemStoreBackend, name)).parameters)[1:] == params, name
+        backend = FileSystemStoreBackend()
+        backend.configure(str(tmp_path), verbose=0, backend_options={"mmap_mode": "c"})
+        assert (backend.location, backend.mmap_mode) == (str(tmp_path), "c")
+
+    def test_manager_counts_columns(self, tmp_path):
+        self._roundtrip(tmp_path, pd.DataFrame({"x": np.zeros(1000)}))
+        assert CacheManager(tmp_path).size() > 8000
+
+    def test_invalid_storage(self):
+        with pytest.raises(ValueError):
+            Pipeline([], storage="parquet")
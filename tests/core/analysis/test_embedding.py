@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest  # type: ignore
+
+from mopipe.core.analysis import (
+    average_mutual_information,
+    delay_embed,
+    false_nearest_neighbours,
+    suggest_dim,
+    suggest_tau,
+)
+
+
+def _loop_embed(x: np.ndarray, dim: int, tau: int) -> np.ndarray:
+    """Reference implementation, stacking shifted copies of the series."""
+    return np.array([x[i * tau : x.shape[0] - (dim - i - 1) * tau] for i in range(dim)]).T
+
+
+class TestDelayEmbed:
+    @pytest.mark.parametrize(("dim", "tau"), [(1, 1), (3, 1), (2, 4), (4, 3)])
+    def test_matches_reference(self, dim: int, tau: int) -> None:
+        x = np.arange(20, dtype=float) ** 2
+        np.testing.assert_array_equal(delay_embed(x, dim, tau), _loop_embed(x, dim, tau))
+
+    def test_is_view(self) -> None:
+        x = np.arange(50, dtype=float)
+        embedded = delay_embed(x, 3, 2)
+        assert np.shares_memory(embedded, x)
+        assert not embedded.flags.writeable
+
+    def test_series_values(self) -> None:
+        x = pd.Series(np.arange(10, dtype=float))
+        assert np.shares_memory(delay_embed(x.values, 2, 1), x.values)
+
+    def test_multivariate(self) -> None:
+        x = np.arange(20, dtype=float).reshape(10, 2)
+        embedded = delay_embed(x, 3, 1)
+        assert embedded.shape == (8, 6)
+        np.testing.assert_array_equal(embedded[0], [0, 1, 2, 3, 4, 5])
+        assert np.shares_memory(embedded, x)
+        np.testing.assert_array_equal(delay_embed(x), x)
+        np.testing.assert_array_equal(delay_embed(x, 2, 3)[1], [2, 3, 8, 9])
+
+    def test_too_short(self) -> None:
+        assert delay_embed(np.arange(3, dtype=float), 3, 2).shape == (0, 3)
+
+    def test_invalid(self) -> None:
+        with pytest.raises(ValueError):
+            delay_embed(np.arange(10), 0, 1)
+        with pytest.raises(ValueError):
+            delay_embed(np.zeros((2, 2, 2)))
+
+
+class TestAverageMutualInformation:
+    @staticmethod
+    def _reference(x: np.ndarray, lag: int, bins: int) -> float:
+        joint, _, _ = np.histogram2d(x[: x.shape[0] - lag], x[lag:], bins=bins, range=[[x.min(), x.max()]] * 2)
+        p = joint / joint.sum()
+        p_ab = p.sum(axis=1, keepdims=True) @ p.sum(axis=0, keepdims=True)
+        return (p[p > 0] * np.log(p[p > 0] / p_ab[p > 0])).sum()
+
+    def test_matches_reference(self) -> None:
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=3000).cumsum()
+        ami = average_mutual_information(x, max_lag=20, bins=12)
+        assert ami.shape == (21,)
+        for lag in (0, 1, 5, 20):
+            assert ami[lag] == pytest.approx(self._reference(x, lag, 12))
+
+    def test_noise(self) -> None:
+        x = np.random.default_rng(1).normal(size=20000)
+        ami = average_mutual_information(x, max_lag=5)
+        assert ami[0] > 1
+        assert np.all(ami[1:] < 0.01)
+
+    def test_suggest_tau(self) -> None:
+        assert suggest_tau(np.array([2.0, 1.5, 1.0, 1.2, 0.5])) == 2
+        assert suggest_tau(np.array([2.0, 1.5, 1.0, 0.8])) == 3
+
+
+class TestFalseNearestNeighbours:
+    def test_sine(self) -> None:
+        x = np.sin(np.arange(4000) * 2 * np.pi / 97.3)
+        fractions = false_nearest_neighbours(x, tau=25, max_dim=4)
+        assert fractions.shape == (4,)
+        assert fractions[0] > 0.1
+        assert np.all(fractions[1:] < 0.01)
+        assert suggest_dim(fractions) == 2
+
+    def test_short_series(self) -> None:
+        assert false_nearest_neighbours(np.arange(10, dtype=float), tau=3, max_dim=5).shape == (2,)
+
+    def test_suggest_dim(self) -> None:
+        assert suggest_dim(np.array([0.9, 0.2, 0.005, 0.0])) == 3
+        assert suggest_dim(np.array([0.9, 0.2, 0.1, 0.15])) == 3
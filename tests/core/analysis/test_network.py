@@ -0,0 +1,58 @@
+import numpy as np
+import pytest  # type: ignore
+import scipy  # type: ignore
+
+from mopipe.core.analysis.network import degree_distribution, network_measures, recurrence_network
+
+
+@pytest.fixture
+def series() -> np.ndarray:
+    rng = np.random.default_rng(12)
+    return np.sin(np.arange(250) * 0.1) + 0.1 * rng.normal(size=250)
+
+
+class TestRecurrenceNetwork:
+    def test_adjacency(self, series) -> None:
+        adjacency = recurrence_network(series, 2, 3, 0.3)
+        assert scipy.sparse.issparse(adjacency)
+        dense = adjacency.toarray()
+        embedded = np.stack([series[:-3], series[3:]], axis=1)
+        expected = scipy.spatial.distance_matrix(embedded, embedded) < 0.3
+        np.fill_diagonal(expected, False)
+        np.testing.assert_array_equal(dense, expected)
+        dense = recurrence_network(series, 2, 3, 0.3, theiler=4).toarray()
+        assert not np.any(np.triu(dense, -3) & np.tril(dense, 3))
+
+    def test_measures(self, series) -> None:
+        adjacency = recurrence_network(series, 2, 3, 0.3)
+        measures = network_measures(adjacency, block_size=64)
+        a = adjacency.toarray().astype(int)
+        degree = a.sum(axis=1)
+        triangles = np.diag(a @ a @ a)
+        triples = degree * (degree - 1)
+        lengths = scipy.sparse.csgraph.shortest_path(a, unweighted=True)
+        connected = np.isfinite(lengths) & (lengths > 0)
+        np.testing.assert_allclose(
+            measures,
+            [
+                degree.sum() / (250 - 3) / (250 - 4),
+                degree.mean(),
+                triangles.sum() / triples.sum(),
+                np.where(triples > 0, triangles / np.maximum(triples, 1), 0).mean(),
+                lengths[connected].mean(),
+            ],
+        )
+        distribution = degree_distribution(adjacency)
+        assert distribution.sum() == 247
+        np.testing.assert_array_equal(distribution, np.bincount(degree))
+
+    def test_empty_network(self) -> None:
+        measures = network_measures(recurrence_network(np.arange(10.0), threshold=0.5))
+        np.testing.assert_array_equal(measures[:2], [0, 0])
+        assert np.isnan(measures[2])
+        assert measures[3] == 0
+        assert np.isnan(measures[4])
+
+    def test_invalid_theiler(self, series) -> None:
+        with pytest.raises(ValueError):
+            recurrence_network(series, theiler=0)
@@ -2,9 +2,14 @@ import shutil
 import tempfile
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import pytest  # type: ignore
+from joblib.memory import MemorizedFunc
 
 from mopipe.core.analysis import Pipeline
+from mopipe.core.segments import AnyInput, AnyOutput, OtherType, Segment
+from mopipe.segment import CalcShift, ColMeans, SimpleGapFilling
 
 
 class MockSegment:
@@ -19,6 +24,26 @@ class MockSegment:
         return kwargs["x"] + 1
 
 
+class CountingSegment(AnyInput, AnyOutput, OtherType, Segment):
+    """Segment that counts how often it is processed, across instances."""
+
+    calls = 0
+
+    def process(self, x, **kwargs):  # noqa: ARG002
+        CountingSegment.calls += 1
+        return x + 1
+
+
+class Inc(AnyInput, AnyOutput, OtherType, Segment):
+    def process(self, x, **kwargs):  # noqa: ARG002
+        return x + 1
+
+
+class Dbl(AnyInput, AnyOutput, OtherType, Segment):
+    def process(self, x, **kwargs):  # noqa: ARG002
+        return x * 2
+
+
 class TestPipelineCaching:
     @pytest.fixture
     def cache_dir(self):
@@ -78,3 +103,120 @@ class TestPipelineCaching:
         pipeline = Pipeline([seg1, seg2], cache_dir=cache_dir)
         result = pipeline.run(x=1)
         assert result == 3
+
+    def test_cache_hits_across_pipelines(self, cache_dir):
+        CountingSegment.calls = 0
+        assert Pipeline([CountingSegment("a")], cache_dir=cache_dir).run(x=1) == 2
+        # new segments get new random ids, but the same fingerprint
+        assert Pipeline([CountingSegment("b")], cache_dir=cache_dir).run(x=1) == 2
+        assert CountingSegment.calls == 1
+        assert Pipeline([CountingSegment("c")], cache_dir=cache_dir).run(x=2) == 3
+        assert CountingSegment.calls == 2
+
+    def test_chained_keys_skip_hashing_input(self, cache_dir):
+        CountingSegment.calls = 0
+        pipeline = Pipeline([CountingSegment("a"), CountingSegment("b")], cache_dir=cache_dir)
+        assert pipeline.run(x=1, input_key="trial-1") == 3
+        assert CountingSegment.calls == 2
+        # the input is identified by its key alone, so a different x under the same key is a hit
+        assert pipeline.run(x=10, input_key="trial-1") == 3
+        assert CountingSegment.calls == 2
+        assert pipeline.run(x=10, input_key="trial-2") == 12
+        assert CountingSegment.calls == 4
+
+    def test_chained_keys_hash_input_once(self, cache_dir):
+        CountingSegment.calls = 0
+        pipeline = Pipeline([CountingSegment("a"), CountingSegment("b")], cache_dir=cache_dir, chain_keys=True)
+        assert pipeline.chain_keys
+        assert pipeline.run(x=1) == 3
+        assert pipeline.run(x=1) == 3
+        assert CountingSegment.calls == 2
+        assert pipeline.run(x=2) == 4
+        assert CountingSegment.calls == 4
+
+    def test_chained_keys_resume_from_cached_prefix(self, cache_dir):
+        CountingSegment.calls = 0
+        Pipeline([CountingSegment("a")], cache_dir=cache_dir).run(x=1, input_key="k")
+        pipeline = Pipeline([CountingSegment("a"), CountingSegment("b")], cache_dir=cache_dir)
+        assert pipeline.run(x=1, input_key="k") == 3
+        assert CountingSegment.calls == 2
+        # extra arguments are part of every key
+        assert pipeline.run(x=1, input_key="k", extra=1) == 3
+        assert CountingSegment.calls == 4
+
+    def test_chained_keys_resume_after_eviction(self, cache_dir, monkeypatch):
+        pipeline = Pipeline([Inc("inc"), Dbl("dbl")], cache_dir=cache_dir)
+        assert pipeline.run(x=1, input_key="k") == 4
+        check_call_in_cache = MemorizedFunc.check_call_in_cache
+
+        def evict_after_check(self, *args, **kwargs):
+            found = check_call_in_cache(self, *args, **kwargs)
+            shutil.rmtree(cache_dir / "joblib", ignore_errors=True)
+            return found
+
+        # the cached output of dbl is evicted between finding it and loading it
+        monkeypatch.setattr(MemorizedFunc, "check_call_in_cache", evict_after_check)
+        assert pipeline.run(x=1, input_key="k") == 4
+        monkeypatch.undo()
+        # nothing computed from the wrong input was cached
+        assert pipeline.run(x=1, input_key="k") == 4
+        assert pipeline.cache_stats["disk_hits"] == 1
+
+    def test_memory_cache_in_front_of_disk(self, cache_dir):
+        CountingSegment.calls = 0
+        pipeline = Pipeline([CountingSegment("a"), CountingSegment("b")], cache_dir=cache_dir, memory_budget=10_000)
+        assert pipeline.chain_keys
+        assert pipeline.run(x=1) == 3
+        assert pipeline.cache_stats["memory_misses"] == 2
+        assert pipeline.cache_stats["disk_misses"] == 2
+        assert pipeline.run(x=1) == 3
+        assert CountingSegment.calls == 2
+        assert pipeline.cache_stats["memory_hits"] == 1
+        assert pipeline.cache_stats["disk_hits"] == 0
+
+        # a new process has an empty memory cache, but finds the results on disk
+        other = Pipeline([CountingSegment("a"), CountingSegment("b")], cache_dir=cache_dir, memory_budget=10_000)
+        assert other.run(x=1) == 3
+        assert CountingSegment.calls == 2
+        assert other.cache_stats["disk_hits"] == 1
+        assert other.run(x=1) == 3
+        assert other.cache_stats["memory_hits"] == 1
+
+    def test_memory_cache_without_disk(self):
+        CountingSegment.calls = 0
+        pipeline = Pipeline([CountingSegment("a")], memory_budget=10_000)
+        assert pipeline.run(x=1) == 2
+        assert pipeline.run(x=1) == 2
+        assert CountingSegment.calls == 1
+        assert pipeline.memory_cache is not None
+        pipeline.clear_cache()
+        assert pipeline.run(x=1) == 2
+        assert CountingSegment.calls == 2
+
+    def test_memory_cache_series_results(self):
+        pipeline = Pipeline([ColMeans("means")], memory_budget=10_000)
+        x = pd.DataFrame({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+        pd.testing.assert_series_equal(pipeline.run(x=x), x.mean())
+        pd.testing.assert_series_equal(pipeline.run(x=x), x.mean())
+        assert pipeline.cache_stats["memory_hits"] == 1
+        assert 0 < pipeline.cache_stats["memory_nbytes"] <= 10_000
+
+    def test_memory_cache_keeps_results_from_in_place_changes(self):
+        class OtherShift(CalcShift):
+            pass
+
+        x = pd.DataFrame({"a": [1.0, np.nan, 3.0], "b": [2.0, 4.0, 8.0]})
+        pipeline = Pipeline([SimpleGapFilling("fill"), CalcShift("shift")], memory_budget=10_000)
+        assert list(pipeline.run(x=x).columns) == ["a", "b", "a_shift", "b_shift"]
+        # CalcShift adds its columns to its input, which must not be the cached output of fill
+        pipeline.segments[1] = OtherShift("shift")
+        out = pipeline.run(x=x)
+        assert pipeline.cache_stats["memory_hits"] == 1
+        assert list(out.columns) == ["a", "b", "a_shift", "b_shift"]
+
+    def test_memory_cache_eviction_counter(self):
+        pipeline = Pipeline([CountingSegment("a")], memory_budget=100)
+        for x in range(10):
+            pipeline.run(x=x)
+        assert pipeline.cache_stats["evictions"] > 0
+        assert pipeline.cache_stats["memory_nbytes"] <= 100
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest  # type: ignore
+
+from mopipe.core.analysis import BandedRecurrenceMatrix, PackedRecurrenceMatrix
+from mopipe.core.analysis.rqa import banded_recurrence_matrix, calc_rqa, packed_recurrence_matrix, rqa_from_matrix
+
+
+@pytest.fixture
+def dense() -> np.ndarray:
+    rng = np.random.default_rng(7)
+    x = rng.normal(size=37).cumsum()
+    return np.abs(x[:, None] - x[None, :]) < 1.5
+
+
+class TestPackedRecurrenceMatrix:
+    def test_round_trip(self, dense: np.ndarray) -> None:
+        rm = PackedRecurrenceMatrix.from_dense(dense)
+        assert rm.shape == dense.shape
+        assert rm.nbytes == 37 * 5
+        np.testing.assert_array_equal(rm.to_dense(), dense)
+
+    def test_count(self, dense: np.ndarray) -> None:
+        assert PackedRecurrenceMatrix.from_dense(dense).count() == dense.sum()
+
+    def test_rows_columns_diagonals(self, dense: np.ndarray) -> None:
+        rm = PackedRecurrenceMatrix.from_dense(dense)
+        np.testing.assert_array_equal(rm.row(3), dense[3])
+        np.testing.assert_array_equal(rm.column(11), dense[:, 11])
+        for k in (-36, -5, 0, 9, 36, 40):
+            np.testing.assert_array_equal(rm.diagonal(k), np.diagonal(dense, k))
+
+    def test_column_runs(self) -> None:
+        dense = np.array([[1, 0], [1, 1], [0, 1], [1, 1]], dtype=bool)
+        rm = PackedRecurrenceMatrix.from_dense(dense)
+        np.testing.assert_array_equal(rm.column_runs(0), [2, 1])
+        np.testing.assert_array_equal(rm.column_runs(1), [3])
+
+    def test_from_tiles(self, dense: np.ndarray) -> None:
+        tiles = ((dense[r : r + 8, c : c + 16], r, c) for r in range(0, 37, 8) for c in range(0, 37, 16))
+        rm = PackedRecurrenceMatrix.from_tiles(tiles, dense.shape)
+        np.testing.assert_array_equal(rm.packed, PackedRecurrenceMatrix.from_dense(dense).packed)
+
+    def test_from_tiles_unaligned(self, dense: np.ndarray) -> None:
+        with pytest.raises(ValueError):
+            PackedRecurrenceMatrix.from_tiles([(dense[:, 3:], 0, 3)], dense.shape)
+
+    def test_invalid_packed(self) -> None:
+        with pytest.raises(ValueError):
+            PackedRecurrenceMatrix(np.zeros((4, 2), dtype=np.uint8), (4, 4))
+
+    def test_to_image(self, dense: np.ndarray) -> None:
+        image = PackedRecurrenceMatrix.from_dense(dense).to_image()
+        assert image.dtype == np.uint8
+        np.testing.assert_array_equal(image == 0, dense)
+
+    def test_to_pbm(self, dense: np.ndarray, tmp_path) -> None:
+        path = tmp_path / "rp.pbm"
+        PackedRecurrenceMatrix.from_dense(dense).to_pbm(path)
+        content = path.read_bytes()
+        assert content.startswith(b"P4\n37 37\n")
+        assert len(content) == len(b"P4\n37 37\n") + 37 * 5
+
+
+class TestPackedRQA:
+    @pytest.mark.parametrize("block_size", [None, 5, 16])
+    def test_rqa_from_packed_matrix(self, block_size) -> None:
+        rng = np.random.default_rng(3)
+        x = rng.normal(size=90).cumsum() * 0.1
+        y = rng.normal(size=90).cumsum() * 0.1
+        rm = packed_recurrence_matrix(x, y, dim=2, threshold=0.3, block_size=block_size)
+        assert rqa_from_matrix(rm) == calc_rqa(x, y, dim=2, threshold=0.3)
+
+
+class TestBandedRecurrenceMatrix:
+    def test_blocks_and_diagonals(self) -> None:
+        rng = np.random.default_rng(8)
+        x = rng.normal(size=90).cumsum() * 0.1
+        y = rng.normal(size=90).cumsum() * 0.1
+        rm = banded_recurrence_matrix(x, y, dim=2, tau=3, threshold=0.4, width=20)
+        dense = packed_recurrence_matrix(x, y, dim=2, tau=3, threshold=0.4).to_dense()
+        assert rm.shape == (87, 87)
+        assert rm.nbytes == 87 * 39
+        for start in range(0, 68, 5):
+            for size in (1, 7, 20):
+                np.testing.assert_array_equal(rm.block(start, size), dense[start : start + size, start : start + size])
+        for k in (-19, -3, 0, 12, 19):
+            np.testing.assert_array_equal(rm.diagonal(k), np.diagonal(dense, k))
+        band = np.abs(np.subtract.outer(np.arange(87), np.arange(87))) < 20
+        np.testing.assert_array_equal(rm.to_dense(), dense & band)
+
+    def test_block_is_view(self, dense: np.ndarray) -> None:
+        band = np.zeros((37, 9), dtype=bool)
+        rm = BandedRecurrenceMatrix(band, dense.shape, 5)
+        band[10, 4] = True
+        assert rm.block(8, 5)[2, 2]
+        assert not rm.block(8, 5).flags.writeable
+
+    def test_invalid(self, dense: np.ndarray) -> None:
+        with pytest.raises(ValueError):
+            BandedRecurrenceMatrix(np.zeros((37, 8), dtype=bool), dense.shape, 5)
+        rm = BandedRecurrenceMatrix(np.zeros((37, 9), dtype=bool), dense.shape, 5)
+        with pytest.raises(ValueError):
+            rm.block(0, 6)
+        with pytest.raises(ValueError):
+            rm.block(33, 5)
+        with pytest.raises(ValueError):
+            rm.diagonal(5)
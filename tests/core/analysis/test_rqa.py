@@ -0,0 +1,476 @@
+import numpy as np
+import pytest  # type: ignore
+import scipy  # type: ignore
+
+from mopipe.core.analysis.embedding import delay_embed
+from mopipe.core.analysis.rqa import (
+    APPROXIMATE_RQA_MEASURES,
+    RQA_EXTENDED_MEASURES,
+    RQA_MEASURES,
+    LineDistAccumulator,
+    approximate_rqa,
+    auto_rqa,
+    calc_rqa,
+    cross_recurrence_profile,
+    diagonal_line_dist,
+    fan_recurrence_matrix,
+    fan_rqa,
+    pairwise_rqa,
+    rqa_from_matrix,
+    rqa_surrogate_test,
+    rqa_threshold_sweep,
+    rr_threshold,
+    sliding_window_recurrence,
+    sparse_recurrence_matrix,
+    surrogate_p_values,
+    vertical_line_dist,
+)
+from mopipe.core.analysis.rqa import recurrence_matrix as calc_recurrence_matrix
+from mopipe.core.analysis.surrogates import time_shift_shifts
+
+
+def _loop_line_dist(lines: list[np.ndarray], size: int) -> np.ndarray:
+    """Reference implementation, scanning every line element by element."""
+    line_dist = np.zeros(size + 1)
+    for line in lines:
+        cline = 0
+        for e in line:
+            if e:
+                cline += 1
+            else:
+                line_dist[cline] += 1
+                cline = 0
+        line_dist[cline] += 1
+    return line_dist
+
+
+@pytest.fixture
+def recurrence_matrix() -> np.ndarray:
+    rng = np.random.default_rng(42)
+    x = rng.normal(size=80).cumsum()
+    return np.abs(x[:, None] - x[None, :]) < 1.0
+
+
+class TestLineDist:
+    def test_diagonal_line_dist(self, recurrence_matrix: np.ndarray) -> None:
+        n = recurrence_matrix.shape[0]
+        expected = _loop_line_dist([np.diagonal(recurrence_matrix, i) for i in range(-n + 1, n)], n)
+        np.testing.assert_array_equal(diagonal_line_dist(recurrence_matrix), expected)
+
+    def test_vertical_line_dist(self, recurrence_matrix: np.ndarray) -> None:
+        n = recurrence_matrix.shape[0]
+        expected = _loop_line_dist([recurrence_matrix[:, i] for i in range(n)], n)
+        np.testing.assert_array_equal(vertical_line_dist(recurrence_matrix), expected)
+
+    def test_empty_and_full(self) -> None:
+        empty = np.zeros((5, 5), dtype=bool)
+        full = np.ones((5, 5), dtype=bool)
+        assert diagonal_line_dist(empty)[0] == 5 * 5 + 9
+        assert diagonal_line_dist(full)[1:].sum() == 9
+        assert vertical_line_dist(full)[5] == 5
+
+    @pytest.mark.parametrize("block_size", [1, 3, 7, 16, 80])
+    def test_tiled_accumulation(self, recurrence_matrix: np.ndarray, block_size: int) -> None:
+        n = recurrence_matrix.shape[0]
+        acc = LineDistAccumulator(recurrence_matrix.shape)
+        for row in range(0, n, block_size):
+            for col in range(0, n, block_size):
+                acc.add(recurrence_matrix[row : row + block_size, col : col + block_size], row, col)
+        assert acc.rr_sum == recurrence_matrix.sum()
+        np.testing.assert_array_equal(acc.d_line_dist, diagonal_line_dist(recurrence_matrix))
+        np.testing.assert_array_equal(acc.v_line_dist, vertical_line_dist(recurrence_matrix))
+
+    def test_sparse_matrix(self, recurrence_matrix: np.ndarray) -> None:
+        sparse = scipy.sparse.coo_matrix(recurrence_matrix)
+        np.testing.assert_array_equal(diagonal_line_dist(sparse), diagonal_line_dist(recurrence_matrix))
+        np.testing.assert_array_equal(vertical_line_dist(sparse), vertical_line_dist(recurrence_matrix))
+
+    def test_non_square(self) -> None:
+        rm = np.tri(4, 6, 2, dtype=bool)
+        expected = _loop_line_dist([np.diagonal(rm, i) for i in range(-3, 6)], 6)
+        np.testing.assert_array_equal(diagonal_line_dist(rm), expected)
+
+
+class TestCalcRQA:
+    def test_simple_series(self) -> None:
+        x = np.array([1, 1, 2, 2])
+        rr, det, lam, _, _, _, _ = calc_rqa(x, x)
+        assert rr == 0.5
+        assert det == 0.5
+        assert lam == 1.0
+
+    def test_no_recurrences(self) -> None:
+        x = np.arange(10, dtype=float)
+        res = calc_rqa(x, x + 100)
+        assert res[0] == 0
+        assert res[1] == 0
+        assert res[2] == 0
+
+    @pytest.mark.parametrize("block_size", [1, 5, 32])
+    def test_block_size(self, block_size: int) -> None:
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=120).cumsum() * 0.1
+        y = rng.normal(size=120).cumsum() * 0.1
+        expected = calc_rqa(x, y, dim=2, tau=2, threshold=0.3)
+        assert calc_rqa(x, y, dim=2, tau=2, threshold=0.3, block_size=block_size) == expected
+
+    def test_invalid_block_size(self) -> None:
+        x = np.arange(10, dtype=float)
+        with pytest.raises(ValueError):
+            calc_rqa(x, x, block_size=0)
+
+    def test_sparse_backend(self) -> None:
+        rng = np.random.default_rng(1)
+        x = rng.normal(size=150).cumsum() * 0.1
+        y = rng.normal(size=150).cumsum() * 0.1
+        expected = calc_rqa(x, y, dim=3, tau=1, threshold=0.2)
+        np.testing.assert_allclose(calc_rqa(x, y, dim=3, tau=1, threshold=0.2, backend="sparse"), expected)
+
+    def test_sparse_recurrence_matrix(self) -> None:
+        x = np.array([1.0, 1.0, 2.0, 2.0])
+        rm = sparse_recurrence_matrix(x, x)
+        assert scipy.sparse.issparse(rm)
+        assert rm.nnz == 8
+        np.testing.assert_array_equal(rm.toarray(), np.abs(x[:, None] - x[None, :]) < 0.1)
+
+    def test_invalid_backend(self) -> None:
+        x = np.arange(10, dtype=float)
+        with pytest.raises(ValueError):
+            calc_rqa(x, x, backend="gpu")
+
+
+class TestExtendedMeasures:
+    @staticmethod
+    def _runs(line: np.ndarray) -> list[int]:
+        padded = np.concatenate(([0], line.astype(int), [0]))
+        edges = np.flatnonzero(np.diff(padded))
+        return list(edges[1::2] - edges[::2])
+
+    @staticmethod
+    def _entropy(lengths: list[int]) -> float:
+        _, counts = np.unique(lengths, return_counts=True)
+        probs = counts / counts.sum()
+        return -(probs * np.log(probs)).sum()
+
+    def _expected(self, rm: np.ndarray) -> dict[str, float]:
+        n, m = rm.shape
+        d_lines = [r for k in range(-n + 1, m) for r in self._runs(np.diagonal(rm, k)) if r >= 2]
+        v_lines = [r for j in range(m) for r in self._runs(rm[:, j]) if r >= 2]
+        white = [g - 1 for j in range(m) for g in np.diff(np.flatnonzero(rm[:, j])) if g > 1]
+        rr = rm.sum() / rm.size
+        return {
+            "avg_vert_length": np.mean(v_lines),
+            "max_diag_length": max(d_lines),
+            "max_vert_length": max(v_lines),
+            "divergence": 1 / max(d_lines),
+            "trapping_time": np.mean(v_lines),
+            "ratio": sum(d_lines) / rm.sum() / rr,
+            "recurrence_time_entropy": self._entropy(white),
+        }
+
+    @pytest.mark.parametrize("kwargs", [{}, {"block_size": 9}, {"backend": "sparse"}], ids=["dense", "tiled", "sparse"])
+    def test_matches_reference(self, kwargs) -> None:
+        rng = np.random.default_rng(6)
+        x = rng.normal(size=90).cumsum() * 0.1
+        y = rng.normal(size=90).cumsum() * 0.1
+        embed_x, embed_y = delay_embed(x, 2, 1), delay_embed(y, 2, 1)
+        expected = self._expected(scipy.spatial.distance_matrix(embed_x, embed_y) < 0.3)
+        res = calc_rqa(x, y, dim=2, threshold=0.3, measures=list(expected), **kwargs)
+        np.testing.assert_allclose(res, list(expected.values()))
+
+    def test_selection_order(self) -> None:
+        x = np.array([1.0, 1.0, 2.0, 2.0, 1.0, 1.0])
+        all_measures = calc_rqa(x, x, measures=RQA_MEASURES + RQA_EXTENDED_MEASURES)
+        res = calc_rqa(x, x, measures=["ratio", "recurrence_rate"])
+        assert res == [all_measures[-2], all_measures[0]]
+        assert calc_rqa(x, x) == all_measures[: len(RQA_MEASURES)]
+
+    @pytest.mark.parametrize("backend", ["dense", "sparse"])
+    def test_auto_and_matrix(self, backend: str) -> None:
+        rng = np.random.default_rng(7)
+        x = rng.normal(size=60).cumsum() * 0.1
+        measures = RQA_MEASURES + RQA_EXTENDED_MEASURES
+        expected = calc_rqa(x, x, dim=2, threshold=0.2, measures=measures)
+        rm = calc_recurrence_matrix(x, x, dim=2, threshold=0.2, backend=backend)
+        np.testing.assert_allclose(rqa_from_matrix(rm, measures=measures), expected)
+        res = auto_rqa(x, dim=2, threshold=0.2, block_size=8, backend=backend, measures=measures)
+        np.testing.assert_allclose(res, expected)
+
+    def test_unknown_measure(self) -> None:
+        x = np.arange(10, dtype=float)
+        with pytest.raises(ValueError):
+            calc_rqa(x, x, measures=["determinism", "lmax"])
+
+
+class TestAutoRQA:
+    @pytest.fixture
+    def series(self) -> np.ndarray:
+        rng = np.random.default_rng(5)
+        return rng.normal(size=130).cumsum() * 0.1
+
+    @pytest.mark.parametrize("block_size", [None, 1, 7, 32])
+    def test_matches_calc_rqa(self, series, block_size) -> None:
+        expected = calc_rqa(series, series, dim=2, tau=2, threshold=0.3)
+        np.testing.assert_allclose(auto_rqa(series, dim=2, tau=2, threshold=0.3, block_size=block_size), expected)
+
+    def test_sparse_backend(self, series) -> None:
+        expected = calc_rqa(series, series, dim=3, threshold=0.2)
+        np.testing.assert_allclose(auto_rqa(series, dim=3, threshold=0.2, backend="sparse"), expected)
+
+    @pytest.mark.parametrize(
+        ("theiler", "block_size", "backend"), [(1, None, "dense"), (4, 9, "dense"), (4, None, "sparse")]
+    )
+    def test_theiler(self, series, theiler: int, block_size, backend: str) -> None:
+        embed = delay_embed(series, 2, 1)
+        lag = np.abs(np.subtract.outer(np.arange(embed.shape[0]), np.arange(embed.shape[0])))
+        rm = (scipy.spatial.distance_matrix(embed, embed) < 0.3) & (lag >= theiler)
+        res = auto_rqa(series, dim=2, threshold=0.3, theiler=theiler, block_size=block_size, backend=backend)
+        assert res[0] == pytest.approx(rm.sum() / (lag >= theiler).sum())
+        d_line_dist = diagonal_line_dist(rm)
+        lengths = np.arange(d_line_dist.shape[0])
+        assert res[1] == pytest.approx((d_line_dist[2:] * lengths[2:]).sum() / rm.sum())
+        v_line_dist = vertical_line_dist(rm)
+        assert res[2] == pytest.approx((v_line_dist[2:] * lengths[2:]).sum() / rm.sum())
+
+    @pytest.mark.parametrize("backend", ["dense", "sparse"])
+    @pytest.mark.parametrize("block_size", [None, 16])
+    def test_theiler_from_matrix(self, series, backend: str, block_size) -> None:
+        expected = auto_rqa(series, dim=2, threshold=0.3, theiler=3)
+        rm = calc_recurrence_matrix(series, series, 2, 1, 0.3, block_size=block_size, backend=backend)
+        dense = rm.toarray() if backend == "sparse" else rm.to_dense()
+        np.testing.assert_allclose(rqa_from_matrix(rm, theiler=3), expected)
+        np.testing.assert_allclose(rqa_from_matrix(dense, theiler=3), expected)
+        # the matrix itself is left unmasked
+        np.testing.assert_array_equal(rm.toarray() if backend == "sparse" else rm.to_dense(), dense)
+        assert dense.diagonal().all()
+
+    def test_invalid_theiler(self, series) -> None:
+        with pytest.raises(ValueError):
+            auto_rqa(series, theiler=-1)
+        with pytest.raises(ValueError):
+            rqa_from_matrix(np.eye(3, dtype=bool), theiler=-1)
+
+
+class TestCrossRecurrenceProfile:
+    @pytest.mark.parametrize(("n", "m", "dim"), [(120, 120, 1), (90, 130, 2), (140, 70, 3)])
+    def test_matches_diagonals(self, n, m, dim) -> None:
+        rng = np.random.default_rng(7)
+        x = rng.normal(size=n).cumsum() * 0.1
+        y = rng.normal(size=m).cumsum() * 0.1
+        profile = cross_recurrence_profile(x, y, dim=dim, tau=2, threshold=0.4, max_lag=30)
+        assert profile.shape == (61,)
+        rm = calc_recurrence_matrix(x, y, dim=dim, tau=2, threshold=0.4).to_dense()
+        for k, rate in zip(range(-30, 31), profile):
+            np.testing.assert_allclose(rate, np.diagonal(rm, k).mean())
+
+    def test_lags_beyond_series(self) -> None:
+        profile = cross_recurrence_profile(np.zeros(5), np.zeros(5), max_lag=6)
+        np.testing.assert_array_equal(np.isnan(profile), [True, True] + [False] * 9 + [True, True])
+        assert np.all(profile[2:-2] == 1)
+
+    def test_invalid_max_lag(self) -> None:
+        with pytest.raises(ValueError):
+            cross_recurrence_profile(np.zeros(5), np.zeros(5), max_lag=-1)
+
+
+class TestSurrogateTest:
+    @pytest.fixture
+    def coupled(self) -> tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(5)
+        x = np.sin(np.arange(300) * 0.1) + 0.1 * rng.normal(size=300)
+        return x, np.roll(x, 2) + 0.05 * rng.normal(size=300)
+
+    @pytest.mark.parametrize("method", ["shuffle", "iaaft", "time_shift"])
+    def test_reproducible(self, coupled, method) -> None:
+        x, y = coupled
+        observed, null = rqa_surrogate_test(x, y, 2, 3, 0.3, method=method, n_surrogates=6, seed=1)
+        np.testing.assert_array_equal(observed, calc_rqa(x, y, 2, 3, 0.3))
+        assert null.shape == (6, 7)
+        _, parallel = rqa_surrogate_test(x, y, 2, 3, 0.3, method=method, n_surrogates=6, seed=1, n_jobs=2)
+        np.testing.assert_array_equal(parallel, null)
+
+    def test_time_shift_matches_rolled_series(self, coupled) -> None:
+        x, y = coupled
+        _, null = rqa_surrogate_test(x, y, 2, 3, 0.3, method="time_shift", n_surrogates=3, seed=2, min_shift=20)
+        for row, shift in zip(null, time_shift_shifts(300, 3, np.random.default_rng(2), min_shift=20)):
+            np.testing.assert_array_equal(row, calc_rqa(x, np.roll(y, -shift), 2, 3, 0.3))
+
+    def test_p_values(self) -> None:
+        null = np.array([[0.1, 0.5], [0.2, 0.6], [0.3, np.nan]])
+        observed = np.array([0.4, 0.55])
+        np.testing.assert_allclose(surrogate_p_values(observed, null, "greater"), [1 / 4, 2 / 3])
+        np.testing.assert_allclose(surrogate_p_values(observed, null, "less"), [1, 2 / 3])
+        np.testing.assert_allclose(surrogate_p_values(observed, null), [1 / 2, 1])
+        with pytest.raises(ValueError):
+            surrogate_p_values(observed, null, "both")
+
+
+class TestPairwiseRQA:
+    @pytest.fixture
+    def series(self) -> np.ndarray:
+        rng = np.random.default_rng(6)
+        return rng.normal(size=(80, 3)).cumsum(axis=0) * 0.1
+
+    def test_matches_calc_rqa(self, series) -> None:
+        y = series[:, ::-1] * 2
+        stats = pairwise_rqa(series, y, dim=2, tau=2, threshold=0.3)
+        assert stats.shape == (3, 3, 7)
+        for i in range(3):
+            for j in range(3):
+                np.testing.assert_array_equal(stats[i, j], calc_rqa(series[:, i], y[:, j], 2, 2, 0.3))
+
+    def test_parallel(self, series) -> None:
+        serial = pairwise_rqa(series, dim=2, threshold=0.3, measures=["recurrence_rate", "laminarity"])
+        assert serial.shape == (3, 3, 2)
+        parallel = pairwise_rqa(series, dim=2, threshold=0.3, n_jobs=2, measures=["recurrence_rate", "laminarity"])
+        np.testing.assert_array_equal(parallel, serial)
+
+    def test_invalid_shapes(self, series) -> None:
+        with pytest.raises(ValueError):
+            pairwise_rqa(series[:, 0])
+        with pytest.raises(ValueError):
+            pairwise_rqa(series, series[1:])
+
+
+class TestApproximateRQA:
+    @pytest.fixture
+    def series(self) -> tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(11)
+        return rng.normal(size=400).cumsum() * 0.1, rng.normal(size=400).cumsum() * 0.1
+
+    def test_covers_exact(self, series) -> None:
+        x, y = series
+        exact = calc_rqa(x, y, 2, 2, 0.3, 3, measures=APPROXIMATE_RQA_MEASURES)
+        estimates = approximate_rqa(x, y, 2, 2, 0.3, 3, n_samples=20000, confidence=0.999, seed=0)
+        assert estimates.shape == (3, 3)
+        assert np.all(estimates[:, 1] <= exact)
+        assert np.all(exact <= estimates[:, 2])
+        np.testing.assert_allclose(estimates[:, 0], exact, atol=0.02)
+
+    def test_theiler(self, series) -> None:
+        x, _ = series
+        exact = auto_rqa(x, 2, 2, 0.3, 2, theiler=3, measures=APPROXIMATE_RQA_MEASURES)
+        estimates = approximate_rqa(x, x, 2, 2, 0.3, 2, n_samples=20000, confidence=0.999, theiler=3, seed=1)
+        assert np.all(estimates[:, 1] <= exact)
+        assert np.all(exact <= estimates[:, 2])
+
+    def test_reproducible(self, series) -> None:
+        x, y = series
+        np.testing.assert_array_equal(approximate_rqa(x, y, seed=3), approximate_rqa(x, y, seed=3))
+
+    def test_no_recurrences(self) -> None:
+        estimates = approximate_rqa(np.zeros(50), np.ones(50), n_samples=100, seed=0)
+        assert estimates[0, 0] == 0
+        assert np.all(np.isnan(estimates[1:]))
+
+    def test_invalid(self, series) -> None:
+        x, y = series
+        with pytest.raises(ValueError):
+            approximate_rqa(x, y, confidence=1.0)
+        with pytest.raises(ValueError):
+            approximate_rqa(x, y, n_samples=0)
+
+
+class TestFAN:
+    @pytest.fixture
+    def series(self) -> tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(13)
+        return rng.normal(size=150).cumsum() * 0.1, rng.normal(size=140).cumsum()
+
+    def _reference(self, x, y, k, theiler=0) -> np.ndarray:
+        distances = scipy.spatial.distance_matrix(delay_embed(x, 2, 2), delay_embed(y, 2, 2))
+        i, j = np.indices(distances.shape)
+        distances[np.abs(i - j) < theiler] = np.inf
+        rm = np.zeros(distances.shape, dtype=bool)
+        np.put_along_axis(rm, np.argsort(distances, axis=1, kind="stable")[:, :k], values=True, axis=1)
+        return rm
+
+    def test_matrix(self, series) -> None:
+        x, y = series
+        rm = fan_recurrence_matrix(x, y, 2, 2, 6, workers=2).toarray()
+        np.testing.assert_array_equal(rm, self._reference(x, y, 6))
+        assert np.all(rm.sum(axis=1) == 6)
+        rm = fan_recurrence_matrix(x, x, 2, 2, 4, theiler=3).toarray()
+        np.testing.assert_array_equal(rm, self._reference(x, x, 4, theiler=3))
+        assert not np.array_equal(rm, rm.T)
+
+    def test_rqa(self, series) -> None:
+        x, y = series
+        np.testing.assert_allclose(fan_rqa(x, y, 2, 2, 6), rqa_from_matrix(self._reference(x, y, 6)))
+        stats = fan_rqa(x, x, 2, 2, 4, theiler=3, measures=["recurrence_rate"])
+        n = 148
+        assert stats[0] == pytest.approx(4 * n / (n * n - n - 2 * (n - 1) - 2 * (n - 2)))
+
+    def test_invalid(self, series) -> None:
+        x, y = series
+        with pytest.raises(ValueError):
+            fan_rqa(x, y, neighbours=0)
+
+
+class TestThresholdSweep:
+    @pytest.mark.parametrize("block_size", [None, 16])
+    def test_matches_calc_rqa(self, block_size) -> None:
+        rng = np.random.default_rng(4)
+        x = rng.normal(size=70).cumsum() * 0.1
+        y = rng.normal(size=70).cumsum() * 0.1
+        thresholds = [0.5, 0.05, 0.2]
+        stats = rqa_threshold_sweep(x, y, thresholds, dim=2, block_size=block_size)
+        assert stats.shape == (3, 7)
+        for row, threshold in zip(stats, thresholds):
+            np.testing.assert_array_equal(row, calc_rqa(x, y, dim=2, threshold=threshold))
+
+
+class TestRRThreshold:
+    @pytest.fixture
+    def series(self) -> tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(8)
+        return rng.normal(size=400).cumsum() * 0.1, rng.normal(size=400).cumsum() * 0.1
+
+    def test_exact(self, series) -> None:
+        x, y = series
+        threshold = rr_threshold(x, y, 0.02, dim=2, sample_size=10**6)
+        assert calc_rqa(x, y, dim=2, threshold=threshold)[0] == pytest.approx(0.02, abs=1 / 399**2)
+
+    @pytest.mark.parametrize("refine", [True, False])
+    def test_sampled(self, series, refine: bool) -> None:  # noqa: FBT001
+        x, y = series
+        threshold = rr_threshold(x, y, 0.05, dim=2, sample_size=5000, refine=refine, seed=0)
+        tolerance = 0.0001 if refine else 0.01
+        assert calc_rqa(x, y, dim=2, threshold=threshold)[0] == pytest.approx(0.05, abs=tolerance)
+
+    @pytest.mark.parametrize("theiler", [1, 20, 100])
+    @pytest.mark.parametrize("sample_size", [10**6, 5000])
+    def test_theiler(self, series, theiler: int, sample_size: int) -> None:
+        x = series[0]
+        threshold = rr_threshold(x, x, 0.02, dim=2, sample_size=sample_size, seed=0, theiler=theiler)
+        achieved = auto_rqa(x, dim=2, threshold=threshold, theiler=theiler)[0]
+        assert achieved == pytest.approx(0.02, rel=0.002)
+
+    def test_invalid_target(self, series) -> None:
+        x, y = series
+        with pytest.raises(ValueError):
+            rr_threshold(x, y, 0)
+        with pytest.raises(ValueError):
+            rr_threshold(x, y, 0.1, theiler=-1)
+        with pytest.raises(ValueError):
+            rr_threshold(x, y, 0.1, theiler=400)
+
+
+class TestSlidingWindowRecurrence:
+    @pytest.mark.parametrize(("window", "step"), [(20, 1), (20, 7), (20, 20), (20, 30)])
+    def test_matches_per_window(self, window: int, step: int) -> None:
+        rng = np.random.default_rng(2)
+        x = rng.normal(size=100).cumsum() * 0.1
+        y = rng.normal(size=100).cumsum() * 0.1
+        windows = list(sliding_window_recurrence(x, y, dim=2, tau=3, threshold=0.3, window=window, step=step))
+        starts = range(0, 100 - window + 1, step)
+        assert len(windows) == len(starts)
+        for rm, w in zip(windows, starts):
+            ex, ey = delay_embed(x[w : w + window], 2, 3), delay_embed(y[w : w + window], 2, 3)
+            expected = np.linalg.norm(ex[:, None, :] - ey[None, :, :], axis=2) < 0.3
+            np.testing.assert_array_equal(rm, expected)
+
+    def test_window_too_short(self) -> None:
+        x = np.arange(10, dtype=float)
+        with pytest.raises(ValueError):
+            next(sliding_window_recurrence(x, x, dim=3, tau=2, window=4))
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest  # type: ignore
+
+from mopipe.core.analysis.surrogates import (
+    iaaft_surrogates,
+    shuffle_surrogates,
+    surrogates,
+    time_shift_shifts,
+    time_shift_surrogates,
+)
+
+
+@pytest.fixture
+def series() -> np.ndarray:
+    rng = np.random.default_rng(9)
+    return np.sin(np.arange(512) * 0.07) ** 3 + 0.1 * rng.normal(size=512)
+
+
+class TestSurrogates:
+    def test_shuffle(self, series) -> None:
+        s = shuffle_surrogates(series, 5, np.random.default_rng(0))
+        assert s.shape == (5, 512)
+        np.testing.assert_array_equal(np.sort(s, axis=1), np.broadcast_to(np.sort(series), (5, 512)))
+        assert not np.array_equal(s[0], s[1])
+
+    def test_time_shift(self, series) -> None:
+        s = time_shift_surrogates(series, 4, np.random.default_rng(1), min_shift=50)
+        shifts = time_shift_shifts(512, 4, np.random.default_rng(1), min_shift=50)
+        assert np.all((shifts >= 50) & (shifts <= 462))
+        for row, shift in zip(s, shifts):
+            np.testing.assert_array_equal(row, np.roll(series, -shift))
+
+    def test_iaaft(self, series) -> None:
+        s = iaaft_surrogates(series, 3, np.random.default_rng(2))
+        np.testing.assert_array_equal(np.sort(s, axis=1), np.broadcast_to(np.sort(series), (3, 512)))
+        amplitudes = np.abs(np.fft.rfft(series))
+        error = np.abs(np.abs(np.fft.rfft(s, axis=1)) - amplitudes).mean() / amplitudes.mean()
+        assert error < 0.05
+
+    def test_seed(self, series) -> None:
+        for method in ("shuffle", "iaaft", "time_shift"):
+            np.testing.assert_array_equal(surrogates(series, 3, method, seed=4), surrogates(series, 3, method, seed=4))
+
+    def test_invalid(self, series) -> None:
+        with pytest.raises(ValueError):
+            surrogates(series, 3, "phase")
+        with pytest.raises(ValueError):
+            surrogates(series[:, None], 3)
+        with pytest.raises(ValueError):
+            time_shift_shifts(10, 3, np.random.default_rng(0), min_shift=6)
@@ -46,3 +46,17 @@ def test_reading_events():
     metadata = reader.metadata
     assert metadata["event"] is not None
     assert len(metadata["event"]) == 3
+
+
+def test_content_key(tmp_path):
+    source = tmp_path / "trial.tsv"
+    source.write_bytes(Path("tests/fixtures/sample_dance_with_header.tsv").read_bytes())
+    key = MocapReader(source=source, name="a").content_key
+    # independent of the name and id of the reader
+    assert MocapReader(source=source, name="b").content_key == key
+    with open(source, "a") as f:
+        f.write("\n")
+    assert MocapReader(source=source, name="a").content_key != key
+
+    df = pd.DataFrame({"a": [1.0, 2.0]})
+    assert MocapReader(source=df, name="a").content_key == MocapReader(source=df.copy(), name="b").content_key
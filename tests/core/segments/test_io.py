@@ -65,3 +65,8 @@ class TestIOTypeBaseMixin:
     def test_validate_shape_with_invalid_shape(self, io_type_base_mixin: IOTypeBaseMixin):
         series = pd.Series([1, 2, 3])
         assert io_type_base_mixin._validate_shape(series, row_min=2, col_min=2) is False
+
+    def test_validate_shape_with_series(self, io_type_base_mixin: IOTypeBaseMixin):
+        series = pd.Series([1, 2, 3])
+        assert io_type_base_mixin._validate_shape(series, row_min=1, col_min=1) is True
+        assert io_type_base_mixin._validate_shape(series, row_min=1, col_min=1, col_max=1) is True
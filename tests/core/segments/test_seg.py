@@ -52,3 +52,17 @@ class TestSegment:
 
     def test_call_valid_input_and_output(self, segment: Segment) -> None:
         assert segment(a=1, b=2, x="output") == "output"
+
+    def test_fingerprint(self, segment: Segment) -> None:
+        other = AnyAnySegment("OtherName")
+        assert isinstance(segment.fingerprint, str)
+        assert segment.segment_id != other.segment_id
+        assert segment.fingerprint == other.fingerprint
+        other.threshold = 0.5
+        assert segment.fingerprint != other.fingerprint
+
+    def test_fingerprint_class_and_version(self, segment: Segment) -> None:
+        class VersionedSegment(AnyAnySegment):
+            version = "2"
+
+        assert VersionedSegment("TestSegment").fingerprint != segment.fingerprint
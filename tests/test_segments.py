@@ -2,7 +2,26 @@ import numpy as np
 import pandas as pd
 import pytest  # type: ignore
 
-from mopipe.segment import CalcShift, ColMeans, CrossRQAStats, Mean, RQAStats, SimpleGapFilling, WindowedCrossRQAStats
+from mopipe.core.analysis import Pipeline, rqa
+from mopipe.core.analysis.rqa import fan_rqa
+from mopipe.segment import (
+    AverageMutualInformation,
+    CalcShift,
+    ColMeans,
+    CrossRecurrenceProfile,
+    CrossRQAStats,
+    DelayEmbedding,
+    FalseNearestNeighbours,
+    MdRQAStats,
+    Mean,
+    PairwiseCrossRQAStats,
+    RecurrenceNetworkStats,
+    RQAStats,
+    RQASurrogateTest,
+    RQAThresholdSweep,
+    SimpleGapFilling,
+    WindowedCrossRQAStats,
+)
 
 
 class TestMean:
@@ -54,6 +73,57 @@ class TestColMeans:
             segment.process(df, col=1.5)  # type: ignore
 
 
+class TestDelayEmbedding:
+    @pytest.fixture
+    def segment(self) -> DelayEmbedding:
+        return DelayEmbedding("TestDelayEmbedding")
+
+    def test_embedding(self, segment: DelayEmbedding) -> None:
+        x = pd.Series(np.arange(10, dtype=float), name="a", index=pd.RangeIndex(5, 15))
+        res = segment(x=x, dim=3, tau=2)
+        assert list(res.columns) == ["a_0", "a_1", "a_2"]
+        assert res.index.tolist() == list(range(5, 11))
+        assert res.loc[5].tolist() == [0.0, 2.0, 4.0]
+        assert np.shares_memory(res.values, x.values)
+
+    def test_pre_embedded_rqa(self, segment: DelayEmbedding) -> None:
+        rng = np.random.default_rng(3)
+        x = pd.Series(rng.normal(size=80).cumsum(), name="a")
+        embedded = segment(x=x, dim=3, tau=2)
+        expected = RQAStats("rqa").process(x, dim=3, tau=2, threshold=0.5)
+        pd.testing.assert_frame_equal(RQAStats("rqa")(x=embedded, threshold=0.5), expected)
+        both = pd.concat([embedded, segment(x=x.rename("b"), dim=3, tau=2)], axis=1)
+        res = CrossRQAStats("cross").process(both, col_a=["a_0", "a_1", "a_2"], col_b=[3, 4, 5], threshold=0.5)
+        pd.testing.assert_frame_equal(res, expected)
+
+    def test_series_input(self) -> None:
+        rng = np.random.default_rng(3)
+        x = pd.Series(rng.normal(size=80).cumsum(), name="a")
+        expected = RQAStats("rqa").process(x, dim=3, tau=2, threshold=0.5)
+        pd.testing.assert_frame_equal(RQAStats("rqa")(x=x, dim=3, tau=2, threshold=0.5), expected)
+
+
+class TestEmbeddingParameters:
+    @pytest.fixture
+    def series(self) -> pd.Series:
+        return pd.Series(np.sin(np.arange(4000) * 2 * np.pi / 97.3), name="a")
+
+    def test_mutual_information(self, series: pd.Series) -> None:
+        res = AverageMutualInformation("ami")(x=series, max_lag=40)
+        assert list(res.columns) == ["lag", "mutual_information"]
+        assert res.shape[0] == 41
+        assert 1 <= res.attrs["tau"] <= 40
+
+    def test_false_nearest_neighbours(self, series: pd.Series) -> None:
+        res = FalseNearestNeighbours("fnn")(x=series, tau=25, max_dim=4)
+        assert res["dim"].tolist() == [1, 2, 3, 4]
+        assert res.attrs["dim"] == 2
+        assert res.attrs["tau"] == 25
+        stats = RQAStats("rqa")(x=series, dim=res.attrs["dim"], tau=res.attrs["tau"], threshold=0.1)
+        assert stats.shape[0] == 1
+        assert "tau" in FalseNearestNeighbours("fnn")(x=series, max_dim=3).attrs
+
+
 class TestRQAStats:
     @pytest.fixture
     def segment(self) -> RQAStats:
@@ -68,6 +138,158 @@ class TestRQAStats:
         assert res.loc[0, "determinism"] == 0
         res = segment.process(x, threshold=2)
         assert res.loc[0, "recurrence_rate"] == 1
+        res = segment.process(x, block_size=3)
+        assert res.loc[0, "recurrence_rate"] == 0.5
+        assert res.loc[0, "determinism"] == 0.5
+
+    def test_return_matrix(self, segment: RQAStats) -> None:
+        x = pd.Series([1, 1, 2, 2])
+        res = segment.process(x, return_matrix=True)
+        assert res.loc[0, "recurrence_rate"] == 0.5
+        assert res.attrs["recurrence_matrix"].value.count() == 8
+        res = segment.process(x, return_matrix=True, backend="sparse")
+        assert res.attrs["recurrence_matrix"].value.nnz == 8
+        # shared, not copied, by the frames derived from the output
+        assert res.copy().attrs["recurrence_matrix"].value is res.attrs["recurrence_matrix"].value
+        assert res[["determinism"]].attrs["recurrence_matrix"] is res.attrs["recurrence_matrix"]
+        assert "recurrence_matrix" not in segment.process(x).attrs
+
+    def test_return_matrix_cached(self, segment: RQAStats, tmp_path) -> None:
+        a = pd.Series(np.random.default_rng(0).normal(size=40))
+        b = pd.Series(np.random.default_rng(1).normal(size=80))
+        pipeline = Pipeline([segment], cache_dir=tmp_path)
+        first = pipeline.run(x=a, return_matrix=True)
+        pipeline.run(x=b, return_matrix=True)
+        # a cache hit, even in a new pipeline, restores the matrix of its own input
+        for cached in (pipeline, Pipeline([RQAStats("other")], cache_dir=tmp_path)):
+            res = cached.run(x=a, return_matrix=True)
+            assert res.attrs["recurrence_matrix"].value.shape == (40, 40)
+            np.testing.assert_array_equal(
+                res.attrs["recurrence_matrix"].value.to_dense(), first.attrs["recurrence_matrix"].value.to_dense()
+            )
+
+    def test_target_rr_is_reproducible(self, segment: RQAStats) -> None:
+        # enough pairs that rr_threshold samples them instead of using all
+        x = pd.Series(np.random.default_rng(1).normal(size=1500))
+        first = segment.process(x, dim=2, target_rr=0.05)
+        second = segment.process(x, dim=2, target_rr=0.05)
+        assert first.attrs["threshold"] == second.attrs["threshold"]
+        assert first.loc[0, "recurrence_rate"] == second.loc[0, "recurrence_rate"]
+
+    @pytest.mark.parametrize("theiler", [1, 20])
+    def test_target_rr_with_theiler(self, segment: RQAStats, theiler: int) -> None:
+        x = pd.Series(np.random.default_rng(3).normal(size=1500).cumsum())
+        res = segment.process(x, target_rr=0.02, theiler=theiler, backend="sparse")
+        assert res.loc[0, "recurrence_rate"] == pytest.approx(0.02, rel=0.002)
+
+    def test_theiler(self, segment: RQAStats) -> None:
+        x = pd.Series([1, 1, 2, 2])
+        res = segment.process(x, theiler=1)
+        assert res.loc[0, "recurrence_rate"] == 1 / 3
+        res = segment.process(x, theiler=1, return_matrix=True)
+        assert res.loc[0, "recurrence_rate"] == 1 / 3
+        assert res.attrs["recurrence_matrix"].value.count() == 8
+        x = pd.Series(np.random.default_rng(2).normal(size=200).cumsum() * 0.1)
+        for backend in ("dense", "sparse"):
+            expected = segment.process(x, dim=2, threshold=0.3, theiler=3, backend=backend)
+            res = segment.process(x, dim=2, threshold=0.3, theiler=3, backend=backend, return_matrix=True)
+            pd.testing.assert_frame_equal(res, expected)
+
+    def test_measures(self, segment: RQAStats) -> None:
+        x = pd.Series([1, 1, 2, 2])
+        res = segment.process(x, measures=["max_diag_length", "recurrence_rate"])
+        assert list(res.columns) == ["max_diag_length", "recurrence_rate"]
+        assert res.loc[0, "max_diag_length"] == 4
+        assert res.loc[0, "recurrence_rate"] == 0.5
+
+    def test_approximate(self, segment: RQAStats) -> None:
+        x = pd.Series(np.random.default_rng(4).normal(size=300).cumsum() * 0.1)
+        exact = segment.process(x, threshold=0.3, theiler=2)
+        res = segment.process(x, threshold=0.3, theiler=2, n_samples=5000, confidence=0.999, seed=0)
+        for m in ("recurrence_rate", "determinism", "laminarity"):
+            assert res.loc[0, f"{m}_lower"] <= exact.loc[0, m] <= res.loc[0, f"{m}_upper"]
+        assert list(segment.process(x.iloc[:0], n_samples=10).columns)[:2] == [
+            "recurrence_rate",
+            "recurrence_rate_lower",
+        ]
+
+    def test_fan(self, segment: RQAStats) -> None:
+        x = pd.Series(np.random.default_rng(5).normal(size=120).cumsum())
+        res = segment.process(x, neighbours=5, theiler=1, return_matrix=True)
+        assert res.loc[0, "recurrence_rate"] == pytest.approx(5 * 120 / (120 * 120 - 120))
+        assert res.attrs["recurrence_matrix"].value.nnz == 5 * 120
+        # the neighbour count, not the threshold, sets the recurrence rate, whatever the amplitude
+        pd.testing.assert_frame_equal(segment.process(x * 10, neighbours=5), segment.process(x, neighbours=5))
+        with pytest.raises(ValueError):
+            segment.process(x, neighbours=5, target_rr=0.1)
+
+    def test_fan_matrix_built_once(self, segment: RQAStats, monkeypatch: pytest.MonkeyPatch) -> None:
+        calls = []
+        fan_recurrence = rqa._fan_recurrence
+        monkeypatch.setattr(rqa, "_fan_recurrence", lambda *args: calls.append(args) or fan_recurrence(*args))
+        x = pd.Series(np.random.default_rng(5).normal(size=120).cumsum())
+        res = segment.process(x, neighbours=5, theiler=1, return_matrix=True)
+        assert len(calls) == 1
+        pd.testing.assert_frame_equal(res, segment.process(x, neighbours=5, theiler=1))
+        np.testing.assert_allclose(res.loc[0].to_numpy(float), fan_rqa(x.to_numpy(), x.to_numpy(), 1, 1, 5, theiler=1))
+
+
+class TestRecurrenceNetworkStats:
+    @pytest.fixture
+    def segment(self) -> RecurrenceNetworkStats:
+        return RecurrenceNetworkStats("TestRecurrenceNetworkStats")
+
+    def test_network_measures(self, segment: RecurrenceNetworkStats) -> None:
+        x = pd.Series([1, 1, 2, 2, 1, 5])
+        res = segment.process(x, return_matrix=True)
+        assert list(res.columns) == ["edge_density", "mean_degree", "transitivity", "clustering", "avg_path_length"]
+        # edges 0-1, 0-4, 1-4 and 2-3: one triangle and a separate pair
+        assert res.loc[0, "mean_degree"] == pytest.approx(8 / 6)
+        assert res.loc[0, "transitivity"] == 1.0
+        assert res.loc[0, "clustering"] == pytest.approx(0.5)
+        assert res.loc[0, "avg_path_length"] == 1.0
+        np.testing.assert_array_equal(res.attrs["degree_distribution"], [1, 2, 3])
+        assert res.attrs["adjacency"].value.nnz == 8
+        res = segment.process(x, dim=2, target_rr=0.5)
+        assert res.attrs["threshold"] > 0
+        assert res.loc[0, "edge_density"] > 0
+
+    def test_target_rr_link_density(self, segment: RecurrenceNetworkStats) -> None:
+        # the threshold is calibrated without the self-loops that theiler=1 leaves out
+        x = pd.Series(np.random.default_rng(0).normal(size=1500).cumsum())
+        res = segment.process(x, target_rr=0.05)
+        assert res.loc[0, "edge_density"] == pytest.approx(0.05, rel=0.002)
+
+
+class TestMdRQAStats:
+    @pytest.fixture
+    def segment(self) -> MdRQAStats:
+        return MdRQAStats("TestMdRQAStats")
+
+    @pytest.fixture
+    def markers(self) -> pd.DataFrame:
+        rng = np.random.default_rng(9)
+        return pd.DataFrame(rng.normal(size=(120, 4)).cumsum(axis=0), columns=["a", "b", "c", "d"])
+
+    def test_single_column(self, segment: MdRQAStats, markers: pd.DataFrame) -> None:
+        res = segment(x=markers, cols=["b"], dim=2, tau=3, threshold=1.0)
+        expected = RQAStats("rqa").process(markers["b"], dim=2, tau=3, threshold=1.0)
+        pd.testing.assert_frame_equal(res, expected)
+
+    def test_joint_distances(self, segment: MdRQAStats, markers: pd.DataFrame) -> None:
+        points = markers[["a", "c"]].to_numpy()
+        points = (points - points.mean(axis=0)) / points.std(axis=0)
+        rm = np.linalg.norm(points[:, None] - points[None, :], axis=2) < 0.5
+        res = segment(x=markers, cols=[0, 2], normalize=True, threshold=0.5, return_matrix=True)
+        np.testing.assert_array_equal(res.attrs["recurrence_matrix"].value.to_dense(), rm)
+        assert res.loc[0, "recurrence_rate"] == rm.mean()
+        sparse = segment(x=markers, cols=["a", "c"], normalize=True, threshold=0.5, backend="sparse")
+        np.testing.assert_allclose(sparse.values, res.values)
+
+    def test_all_columns(self, segment: MdRQAStats, markers: pd.DataFrame) -> None:
+        res = segment(x=markers, normalize=True, dim=2, target_rr=0.05)
+        assert res.loc[0, "recurrence_rate"] == pytest.approx(0.05, abs=0.01)
+        assert "threshold" in res.attrs
 
 
 class TestCrossRQAStats:
@@ -83,9 +305,110 @@ class TestCrossRQAStats:
         assert res.loc[0, "recurrence_rate"] == 0.25
         res = segment.process(x, col_a="a", col_b="a")
         assert res.loc[0, "recurrence_rate"] == 0.5
+        res = segment.process(x, col_a="a", col_b="b", backend="sparse")
+        assert res.loc[0, "recurrence_rate"] == 0.25
+        res = segment.process(x, col_a="a", col_b="a", target_rr=0.5)
+        assert res.loc[0, "recurrence_rate"] == 0.5
+        assert res.attrs["threshold"] > 0
         res = segment.process(x)
         assert res.loc[0, "recurrence_rate"] == 0.5
 
+    def test_approximate(self, segment: CrossRQAStats) -> None:
+        rng = np.random.default_rng(2)
+        x = pd.DataFrame({"a": rng.normal(size=300).cumsum() * 0.1, "b": rng.normal(size=300).cumsum() * 0.1})
+        exact = segment.process(x, col_a="a", col_b="b", threshold=0.3)
+        res = segment.process(x, col_a="a", col_b="b", threshold=0.3, n_samples=5000, confidence=0.999, seed=0)
+        assert list(res.columns[:3]) == ["recurrence_rate", "recurrence_rate_lower", "recurrence_rate_upper"]
+        assert res.shape == (1, 9)
+        for m in ("recurrence_rate", "determinism", "laminarity"):
+            assert res.loc[0, f"{m}_lower"] <= exact.loc[0, m] <= res.loc[0, f"{m}_upper"]
+        res = segment.process(x, col_a="a", col_b="b", n_samples=100, measures=["laminarity"])
+        assert list(res.columns) == ["laminarity", "laminarity_lower", "laminarity_upper"]
+        with pytest.raises(ValueError):
+            segment.process(x, n_samples=100, measures=["d_entropy"])
+        with pytest.raises(ValueError):
+            segment.process(x, n_samples=100, return_matrix=True)
+
+    def test_fan(self, segment: CrossRQAStats) -> None:
+        rng = np.random.default_rng(6)
+        x = pd.DataFrame({"a": rng.normal(size=100).cumsum(), "b": 20 * rng.normal(size=100).cumsum()})
+        res = segment.process(x, col_a="a", col_b="b", neighbours=3, workers=2)
+        assert res.loc[0, "recurrence_rate"] == pytest.approx(0.03)
+        assert segment.process(x, col_a="a", col_b="b", threshold=0.5).loc[0, "recurrence_rate"] < 0.03
+
+
+class TestCrossRecurrenceProfile:
+    @pytest.fixture
+    def segment(self) -> CrossRecurrenceProfile:
+        return CrossRecurrenceProfile("TestCrossRecurrenceProfile")
+
+    def test_profile(self, segment: CrossRecurrenceProfile) -> None:
+        rng = np.random.default_rng(3)
+        a = rng.normal(size=300)
+        x = pd.DataFrame({"a": a, "b": np.roll(a, 4)})
+        res = segment.process(x, col_a="a", col_b="b", max_lag=10)
+        assert isinstance(res, pd.Series)
+        assert res.index.name == "lag"
+        assert list(res.index) == list(range(-10, 11))
+        assert res.idxmax() == 4
+        assert res[4] > 0.95
+        res = segment.process(x, col_a=1, col_b=0, dim=2, max_lag=10)
+        assert res.idxmax() == -4
+
+
+class TestRQASurrogateTest:
+    @pytest.fixture
+    def segment(self) -> RQASurrogateTest:
+        return RQASurrogateTest("TestRQASurrogateTest")
+
+    def test_coupled_series(self, segment: RQASurrogateTest) -> None:
+        rng = np.random.default_rng(1)
+        a = rng.normal(size=400)
+        x = pd.DataFrame({"a": a, "b": a + 0.01 * rng.normal(size=400)})
+        res = segment.process(
+            x,
+            col_a="a",
+            col_b="b",
+            dim=3,
+            threshold=0.2,
+            method="shuffle",
+            n_surrogates=19,
+            seed=0,
+            alternative="greater",
+        )
+        assert res.index.name == "measure"
+        assert list(res.columns) == ["observed", "null_mean", "null_std", "p_value"]
+        assert res.loc["recurrence_rate", "observed"] > res.loc["recurrence_rate", "null_mean"]
+        assert res.loc["determinism", "observed"] > res.loc["determinism", "null_mean"]
+        assert res.loc["recurrence_rate", "p_value"] == 0.05
+        assert res.attrs["null_distribution"].shape == (19, 7)
+
+    def test_reproducible_by_default(self, segment: RQASurrogateTest) -> None:
+        a = np.random.default_rng(2).normal(size=200)
+        x = pd.DataFrame({"a": a, "b": np.roll(a, 3)})
+        kwargs = {"col_a": "a", "col_b": "b", "threshold": 0.3, "method": "shuffle", "n_surrogates": 9}
+        pd.testing.assert_frame_equal(segment.process(x, **kwargs), segment.process(x, **kwargs))
+
+
+class TestPairwiseCrossRQAStats:
+    @pytest.fixture
+    def segment(self) -> PairwiseCrossRQAStats:
+        return PairwiseCrossRQAStats("TestPairwiseCrossRQAStats")
+
+    def test_tidy_output(self, segment: PairwiseCrossRQAStats) -> None:
+        x = pd.DataFrame({"a": [1, 1, 2, 2, 1, 1, 2, 2], "b": [3, 3, 2, 2, 3, 3, 2, 2], "c": [1] * 8})
+        res = segment.process(x)
+        assert list(res.columns) == ["col_a", "col_b", "measure", "value"]
+        assert len(res) == 3 * 3 * 7
+        assert res.attrs["stats"].shape == (3, 3, 7)
+        rr = res[res["measure"] == "recurrence_rate"].set_index(["col_a", "col_b"])["value"]
+        assert rr["a", "b"] == 0.25
+        assert rr["a", "a"] == 0.5
+        assert rr["c", "c"] == 1.0
+        res = segment.process(x, cols_a=[0], cols_b=["b", "c"], measures=["recurrence_rate"], n_jobs=2)
+        assert list(res["col_b"]) == ["b", "c"]
+        assert list(res["value"]) == [0.25, 0.5]
+
 
 class TestWindowedCrossRQAStats:
     @pytest.fixture
@@ -99,6 +422,71 @@ class TestWindowedCrossRQAStats:
         assert res.loc[0, "recurrence_rate"] == 0.25
         assert res.loc[1, "recurrence_rate"] == 0.25
         assert res.loc[2, "recurrence_rate"] == 0.0
+        res = segment.process(x, col_a=0, col_b=1, window=4, step=2, return_matrix=True)
+        assert len(res.attrs["recurrence_matrix"].value) == 3
+        assert res.loc[1, "recurrence_rate"] == 0.25
+
+    def test_window_start(self, segment: WindowedCrossRQAStats) -> None:
+        x = pd.DataFrame(
+            {"a": [1, 1, 2, 2, 1, 1, 1, 1], "b": [3, 3, 2, 2, 3, 3, 2, 2], "t": np.arange(8) / 10},
+            index=pd.RangeIndex(1, 9, name="frame"),
+        )
+        res = segment.process(x, col_a="a", col_b="b", window=4, step=2, time_col="t")
+        assert res["window_start"].tolist() == [1, 3, 5]
+        assert res["window_start_time"].tolist() == [0.0, 0.2, 0.4]
+
+    def test_parallel(self, segment: WindowedCrossRQAStats) -> None:
+        rng = np.random.default_rng(0)
+        x = pd.DataFrame({"a": rng.normal(size=200).cumsum(), "b": rng.normal(size=200).cumsum()})
+        serial = segment.process(x, col_a=0, col_b=1, threshold=1.0, window=50, step=5)
+        parallel = segment.process(x, col_a=0, col_b=1, threshold=1.0, window=50, step=5, n_jobs=2)
+        pd.testing.assert_frame_equal(serial, parallel)
+        parallel = segment.process(x, col_a=0, col_b=1, threshold=1.0, window=50, step=5, n_jobs=2, backend="sparse")
+        np.testing.assert_allclose(parallel.values, serial.values)
+
+    def test_banded(self, segment: WindowedCrossRQAStats) -> None:
+        rng = np.random.default_rng(0)
+        x = pd.DataFrame({"a": rng.normal(size=200).cumsum(), "b": rng.normal(size=200).cumsum()})
+        dense = segment.process(x, col_a=0, col_b=1, dim=2, tau=2, threshold=1.0, window=50, step=3)
+        banded = segment.process(x, col_a=0, col_b=1, dim=2, tau=2, threshold=1.0, window=50, step=3, backend="banded")
+        pd.testing.assert_frame_equal(banded, dense)
+        banded = segment.process(
+            x, col_a=0, col_b=1, threshold=1.0, window=50, step=3, backend="banded", n_jobs=2, return_matrix=True
+        )
+        assert len(banded.attrs["recurrence_matrix"].value) == banded.shape[0]
+
+    def test_measures(self, segment: WindowedCrossRQAStats) -> None:
+        x = pd.DataFrame({"a": [1, 1, 2, 2, 1, 1, 1, 1], "b": [3, 3, 2, 2, 3, 3, 2, 2]})
+        res = segment.process(x, col_a=0, col_b=1, window=4, step=2, measures=["ratio", "trapping_time"])
+        assert list(res.columns) == ["window_start", "ratio", "trapping_time"]
+        assert res.shape[0] == 3
+
+    def test_fan(self, segment: WindowedCrossRQAStats) -> None:
+        rng = np.random.default_rng(0)
+        x = pd.DataFrame({"a": rng.normal(size=200).cumsum(), "b": rng.normal(size=200).cumsum()})
+        res = segment.process(x, col_a=0, col_b=1, window=50, step=10, neighbours=5, return_matrix=True)
+        assert np.allclose(res["recurrence_rate"], 0.1)
+        assert all(rm.nnz == 250 for rm in res.attrs["recurrence_matrix"].value)
+        parallel = segment.process(x, col_a=0, col_b=1, window=50, step=10, neighbours=5, n_jobs=2)
+        pd.testing.assert_frame_equal(parallel, res)
+
+
+class TestRQAThresholdSweep:
+    @pytest.fixture
+    def segment(self) -> RQAThresholdSweep:
+        return RQAThresholdSweep("TestRQAThresholdSweep")
+
+    def test_sweep(self, segment: RQAThresholdSweep) -> None:
+        x = pd.DataFrame({"a": [1, 1, 2, 2, 1, 1, 2, 2], "b": [3, 3, 2, 2, 3, 3, 2, 2]})
+        res = segment.process(x, col_a="a", col_b="b", thresholds=[0.1, 3])
+        assert res["threshold"].tolist() == [0.1, 3.0]
+        assert res.loc[0, "recurrence_rate"] == 0.25
+        assert res.loc[1, "recurrence_rate"] == 1.0
+
+    def test_no_thresholds(self, segment: RQAThresholdSweep) -> None:
+        x = pd.DataFrame({"a": [1, 1, 2, 2], "b": [3, 3, 2, 2]})
+        with pytest.raises(ValueError):
+            segment.process(x)
 
 
 class TestCalcShift: